@@ -32,6 +32,11 @@ printf "\033c" > /dev/tty0
 
 
 mkdir -p "$gamedir/logs"
+
+# Keep run.log bounded: rotate once it passes 1 MiB
+if [ -f "$gamedir/run.log" ] && [ "$(wc -c < "$gamedir/run.log")" -gt 1048576 ]; then
+  mv -f "$gamedir/run.log" "$gamedir/run.log.1"
+fi
 $ESUDO chmod 666 /dev/tty0 || true
 printf "\033c" > /dev/tty0 || true
 
@@ -1,32 +1,56 @@
 #!/usr/bin/env python3
+import os
 import sys
+import time
 from pathlib import Path
 
+T_LAUNCH = time.perf_counter()   # startup timeline origin, taken before the heavy imports
+
 EXLIBS = Path(__file__).parent / "exlibs"
 if EXLIBS.exists():
     sys.path.insert(0, str(EXLIBS))
 
-import time
 import sdl2
-import sdl2.ext
 
-from config import WIDTH, HEIGHT, BG_COLOR, FPS, FULLSCREEN, STICK_DEADZONE, TRIGGER_DEADZONE, AXIS_EVENT_STEP
-from input_device import DeviceManager
+from config import (WIDTH, HEIGHT, BG_COLOR, FPS, FULLSCREEN, STICK_DEADZONE, TRIGGER_DEADZONE, AXIS_EVENT_STEP,
+                    PRESENT_ON_CHANGE, MAX_IDLE_REFRESH_MS, SAMPLER_ENABLED, SAMPLER_HZ,
+                    EVENT_LOG_ENABLED, FONT_BACKGROUND_LOAD, ANTI_DEADZONE_STEP, PAD, EVDEV_ENV,
+                    RECORD_ENV, REPLAY_ENV, REPLAY_FAST_ENV)
+from input_device import DeviceManager, button_name, axis_name
 from ui import UIRenderer, EventLog
 from ui_header import HeaderRenderer
 from ui_footer import FooterRenderer
 from ui_body import BodyRenderer
+from ui_layers import LayerCompositor
+from latency import LatencyTracker
+from profiler import FrameProfiler, StartupTimeline
+from frametime import FrameTimeRecorder
+from scheduler import FrameScheduler
+from heatmap import HeatmapStore
+from calibration import CalibrationStore
+from deadzone import DeadzoneEngine
+from resolution import ResolutionStore
 
 
 def sdl_init():
+    # No SDL_INIT_HAPTIC: nothing uses rumble and its init probes every device node
     flags = (sdl2.SDL_INIT_VIDEO | sdl2.SDL_INIT_GAMECONTROLLER |
-             sdl2.SDL_INIT_JOYSTICK | sdl2.SDL_INIT_HAPTIC | sdl2.SDL_INIT_EVENTS)
+             sdl2.SDL_INIT_JOYSTICK | sdl2.SDL_INIT_EVENTS)
     if sdl2.SDL_Init(flags) != 0:
         raise RuntimeError(sdl2.SDL_GetError().decode())
 
 
 def main():
+    timeline = StartupTimeline(T_LAUNCH)
+    timeline.mark('import')
     sdl_init()
+    timeline.mark('sdl_init')
+    sampler = None
+    evdev = None
+    replayer = None
+    recorder = None
+    writer = None
+    prof = None
     try:
         dm = sdl2.SDL_DisplayMode()
         sdl2.SDL_GetCurrentDisplayMode(0, dm)
@@ -42,39 +66,100 @@ def main():
             win_w, win_h, flags)
         if not window:
             raise RuntimeError(sdl2.SDL_GetError().decode())
+        timeline.mark('window')
 
         renderer = sdl2.SDL_CreateRenderer(window, -1,
             sdl2.SDL_RENDERER_ACCELERATED | sdl2.SDL_RENDERER_PRESENTVSYNC)
         if not renderer:
             raise RuntimeError(sdl2.SDL_GetError().decode())
+        timeline.mark('renderer')
 
         devmgr = DeviceManager()
-        devmgr.initial_scan()
+        if os.environ.get(EVDEV_ENV):
+            from evdev_input import EvdevBackend
+            evdev = EvdevBackend(devmgr)
+            evdev.open_spec(os.environ[EVDEV_ENV])
+            devmgr.backends.append(evdev)
+        if os.environ.get(REPLAY_ENV):
+            from session import SessionReplayer
+            replayer = SessionReplayer(devmgr, os.environ[REPLAY_ENV],
+                                       realtime=not os.environ.get(REPLAY_FAST_ENV))
+            devmgr.backends.append(replayer)
+        if os.environ.get(RECORD_ENV):
+            from session import SessionRecorder
+            path = os.environ[RECORD_ENV]
+            recorder = SessionRecorder({**devmgr.devices, **devmgr.joysticks}, path=None if path == '1' else path)
+            devmgr.set_recorder(recorder)
+        timeline.mark('devices')
+        if SAMPLER_ENABLED:
+            from sampler import InputSampler
+            sampler = InputSampler(devmgr, rate_hz=SAMPLER_HZ)
+            devmgr.sampler = sampler
+            sampler.start()
 
         log = EventLog(max_lines=200)
-        ui = UIRenderer(renderer, devmgr, log)
+        if EVENT_LOG_ENABLED:
+            from logwriter import LogWriter
+            writer = LogWriter()
+            writer.start()
+            writer.write('start', devices=[{'id': iid, 'name': dev.name}
+                                           for iid, dev in devmgr.devices.items()])
+        ui = UIRenderer(renderer, devmgr, log, background_font=FONT_BACKGROUND_LOAD)
+        if not ui.font.loading:
+            timeline.mark('font')
         header = HeaderRenderer(ui)
         footer = FooterRenderer(ui)
         body = BodyRenderer(ui)
+        layers = LayerCompositor(ui)
+        latency = LatencyTracker()
+        heatmaps = HeatmapStore()
+        calibration = CalibrationStore()
+        resolution = ResolutionStore()
+        prof = FrameProfiler(ui)
+        frametimes = FrameTimeRecorder(refresh_hz=dm.refresh_rate)
+        info = sdl2.SDL_RendererInfo()
+        sdl2.SDL_GetRendererInfo(renderer, info)
+        scheduler = FrameScheduler(fps=FPS, refresh_hz=dm.refresh_rate,
+                                   vsync=bool(info.flags & sdl2.SDL_RENDERER_PRESENTVSYNC))
 
         stick_dz = float(STICK_DEADZONE)
         trig_dz = float(TRIGGER_DEADZONE)
+        deadzones = DeadzoneEngine(stick_dz, trig_dz)
         fps_avg = 0.0
-        last_frame = time.time()
+        last_frame = time.perf_counter()
         fn_key = False
         show_log = False
+        tiled = False
+        show_graph = False
         running = True
-        clock_per_frame_ms = int(1000 / FPS)
         event = sdl2.SDL_Event()
         last_title_update = 0.0
+        # Present-on-change bookkeeping
+        last_frame_key = None
+        input_version = devmgr.state_version
+        last_present = 0.0
+        frames_total = 0
+        frames_skipped = 0
 
         while running:
+            frame_start = time.perf_counter()
+            prof.begin_frame()
+            if ui.font.loading:
+                # TTF finished loading in the background: re-layout with it
+                if ui.font.poll_loaded():
+                    ui.invalidate()
+                    body.invalidate()
+                    layers.invalidate()
+                    last_frame_key = None
+                if not ui.font.loading:
+                    timeline.mark('font')
             while sdl2.SDL_PollEvent(event):
                 etype = event.type
                 if etype == sdl2.SDL_QUIT:
                     running = False
                     break
                 elif etype == sdl2.SDL_KEYDOWN:
+                    scheduler.note_input()
                     key = event.key.keysym.sym
                     if key in (sdl2.SDLK_ESCAPE, sdl2.SDLK_q):
                         running = False
@@ -83,27 +168,117 @@ def main():
                         log.clear()
                     elif key == sdl2.SDLK_l:
                         show_log = not show_log
+                    elif key == sdl2.SDLK_g:             # G single device / grid of all
+                        tiled = not tiled
+                    elif key == sdl2.SDLK_t:             # T toggle latency mode
+                        latency.toggle()
+                    elif key == sdl2.SDLK_h:             # H stick heatmaps
+                        heatmaps.toggle()
+                    elif key == sdl2.SDLK_r:             # R reset heatmaps, calibration and resolution data
+                        heatmaps.reset()
+                        calibration.reset()
+                        resolution.reset(devmgr.devices)
+                        if latency.enabled:              # and the latency histograms while shown
+                            latency.reset()
+                    elif key == sdl2.SDLK_a:             # A stick calibration analyzer
+                        calibration.toggle()
+                    elif key == sdl2.SDLK_b:             # B axis resolution analyzer
+                        resolution.toggle()
+                    elif key == sdl2.SDLK_j:             # J export calibration JSON
+                        for path in calibration.export_json(devmgr.devices):
+                            log.add(f"CALIB JSON {path.name}")
+                    elif key == sdl2.SDLK_d:             # D heatmap decay on/off
+                        heatmaps.toggle_decay()
+                    elif key == sdl2.SDLK_v:             # V frame-time graph
+                        show_graph = not show_graph
+                    elif key == sdl2.SDLK_p:             # P profiler overlay
+                        if prof.enabled:
+                            prof.disable()
+                        else:
+                            prof.enable()
+                    elif key == sdl2.SDLK_e:             # E export latency CSV
+                        path = latency.export_csv()
+                        if path:
+                            log.add(f"LATENCY CSV {path.name}")
                     elif key == sdl2.SDLK_LEFTBRACKET:   # [ decrease stick deadzone
                         stick_dz = max(0.0, round(stick_dz - 0.01, 3))
+                        deadzones.configure(stick_dz, trig_dz)   # rebuilds tables only on change
                     elif key == sdl2.SDLK_RIGHTBRACKET:  # ] increase stick deadzone
                         stick_dz = min(1.0, round(stick_dz + 0.01, 3))
+                        deadzones.configure(stick_dz, trig_dz)
                     elif key == sdl2.SDLK_SEMICOLON:     # ; decrease trigger deadzone
                         trig_dz = max(0.0, round(trig_dz - 0.01, 3))
+                        deadzones.configure(stick_dz, trig_dz)
                     elif key == sdl2.SDLK_QUOTE:         # ' increase trigger deadzone
                         trig_dz = min(1.0, round(trig_dz + 0.01, 3))
+                        deadzones.configure(stick_dz, trig_dz)
+                    elif key == sdl2.SDLK_z:             # Z cycle deadzone shape
+                        deadzones.cycle_shape()
+                    elif key == sdl2.SDLK_x:             # X anti-deadzone on/off
+                        deadzones.configure(anti=0.0 if deadzones.anti else ANTI_DEADZONE_STEP)
                     elif key == sdl2.SDLK_F1:            # FN fallback
                         fn_key = True
                 elif etype == sdl2.SDL_KEYUP:
                     if event.key.keysym.sym == sdl2.SDLK_F1:
                         fn_key = False
                         show_log = False
+                elif etype == sdl2.SDL_WINDOWEVENT:
+                    if event.window.event == sdl2.SDL_WINDOWEVENT_SIZE_CHANGED:
+                        ui.invalidate()
+                        body.invalidate()
+                        layers.invalidate()
+                    last_frame_key = None  # exposed/resized: always redraw
+                elif etype in (sdl2.SDL_RENDER_TARGETS_RESET, sdl2.SDL_RENDER_DEVICE_RESET):
+                    ui.invalidate()
+                    body.invalidate()
+                    layers.invalidate()
+                    heatmaps.invalidate()
+                    last_frame_key = None
+                elif etype in (sdl2.SDL_CONTROLLERBUTTONDOWN, sdl2.SDL_CONTROLLERBUTTONUP,
+                               sdl2.SDL_CONTROLLERAXISMOTION):
+                    devmgr.handle_event(event)
                 elif etype == sdl2.SDL_CONTROLLERDEVICEADDED:
                     devmgr.add_by_index(event.cdevice.which)
+                    if writer is not None:
+                        writer.write('added', index=event.cdevice.which)
+                elif etype in (sdl2.SDL_JOYAXISMOTION, sdl2.SDL_JOYBUTTONDOWN, sdl2.SDL_JOYBUTTONUP,
+                               sdl2.SDL_JOYHATMOTION, sdl2.SDL_JOYBALLMOTION):
+                    devmgr.handle_joy_event(event)   # unmapped devices only
+                elif etype == sdl2.SDL_JOYDEVICEADDED:
+                    devmgr.add_joystick_by_index(event.jdevice.which)
+                elif etype == sdl2.SDL_JOYDEVICEREMOVED:
+                    devmgr.remove_joystick(event.jdevice.which)
                 elif etype == sdl2.SDL_CONTROLLERDEVICEREMOVED:
                     devmgr.remove_by_instance_id(event.cdevice.which)
+                    heatmaps.prune(devmgr.devices)
+                    calibration.prune(devmgr.devices)
+                    resolution.prune(devmgr.devices)
+                    if writer is not None:
+                        writer.write('removed', dev=event.cdevice.which)
 
             # Update devices state
             devmgr.update_states()
+            if evdev is not None:
+                for line in evdev.drain_notes():
+                    log.add(line)
+            # Any state change (events, resync polls, backends, hotplug) counts
+            # as input for the idle governor, however small the axis motion
+            if devmgr.state_version != input_version:
+                input_version = devmgr.state_version
+                scheduler.note_input()
+            for iid, dev in devmgr.devices.items():
+                trail = dev.drain_trail()
+                heatmaps.feed(iid, trail)
+            calibration.sample(time.perf_counter(), devmgr.devices)
+            heatmaps.tick(time.perf_counter())
+            calibration.tick(time.perf_counter())
+            resolution.tick(time.perf_counter(), next(iter(devmgr.devices.values()), None))
+
+            for iid, btn, pressed, t in devmgr.button_edges():
+                latency.on_edge(iid, btn, pressed, t * 1000.0)
+                log.add(f"{iid} {button_name(btn)} {'DOWN' if pressed else 'UP'}")
+                if writer is not None:
+                    writer.write('button', dev=iid, btn=btn, pressed=pressed, ticks=round(t, 3))
 
             # Mandatory exit: BACK + START within ~200 ms
             if devmgr.check_combo_exit(window_ms=200):
@@ -115,8 +290,11 @@ def main():
             except TypeError:
                 # Backward compatibility if diff_events() had no parameter
                 diffs = list(devmgr.diff_events())
-            for msg in diffs:
-                log.add(msg)
+            for iid, axis, prev, cur in diffs:
+                log.add(f"{iid} {axis_name(axis)} {prev:+.2f} > {cur:+.2f}")
+                if writer is not None:
+                    writer.write('axis', dev=iid, axis=axis, prev=round(prev, 4), cur=round(cur, 4))
+            prof.lap('input')
 
             # Render
             cur_w = sdl2.Sint32()
@@ -124,40 +302,145 @@ def main():
             sdl2.SDL_GetWindowSize(window, cur_w, cur_h)
             vw, vh = int(cur_w.value), int(cur_h.value)
 
-            sdl2.SDL_SetRenderDrawBlendMode(renderer, sdl2.SDL_BLENDMODE_BLEND)
-            sdl2.SDL_SetRenderDrawColor(renderer, *BG_COLOR)
-            sdl2.SDL_RenderClear(renderer)
-
-            now = time.time()
+            now = time.perf_counter()
             dt = max(1e-6, now - last_frame)
             inst_fps = 1.0 / dt
             fps_avg = inst_fps if fps_avg == 0.0 else fps_avg * 0.9 + inst_fps * 0.1
             last_frame = now
 
+            if now - last_title_update > 1.0:
+                sdl2.SDL_SetWindowTitle(window, f"JoyCheck • devices={len(devmgr.devices)}".encode())
+                last_title_update = now
+
+            # Skip the whole draw/present if nothing visible changed
+            frames_total += 1
+            frame_key = (devmgr.state_version, log.version, vw, vh,
+                         show_log, tiled, stick_dz, trig_dz, latency.enabled, latency.version,
+                         prof.enabled, prof.version,
+                         show_graph, frametimes.frames if show_graph else 0,
+                         heatmaps.enabled, heatmaps.version,
+                         calibration.enabled, calibration.version, deadzones.version,
+                         resolution.enabled, resolution.version)
+            if (PRESENT_ON_CHANGE and frame_key == last_frame_key
+                    and (now - last_present) * 1000.0 < MAX_IDLE_REFRESH_MS):
+                frames_skipped += 1
+                frametimes.gap()
+                scheduler.wait(frame_start, presented=False)
+                continue
+            last_frame_key = frame_key
+            last_present = now
+
+            sdl2.SDL_SetRenderDrawBlendMode(renderer, sdl2.SDL_BLENDMODE_BLEND)
+
             stats = {'fps': round(fps_avg, 1),
                      'stick_dz': stick_dz,
                      'trig_dz': trig_dz,
-                     'devices': len(devmgr.devices)}
+                     'dz_shape': deadzones.shape,
+                     'anti_dz': deadzones.anti,
+                     'devices': len(devmgr.devices) + len(devmgr.joysticks)}
+            if PRESENT_ON_CHANGE:
+                stats['skip'] = round(100.0 * frames_skipped / frames_total)
+            if sampler is not None:
+                stats['hz'] = sampler.rates()
 
             header_h = int(vh * 0.10)
             footer_h = int(vh * 0.10)
 
+            body_args = dict(stick_deadzone=stick_dz,
+                             trigger_deadzone=trig_dz,
+                             show_log=show_log,
+                             latency=latency,
+                             tiled=tiled,
+                             heatmaps=heatmaps,
+                             calibration=calibration,
+                             deadzones=deadzones,
+                             resolution=resolution)
+
+            def draw_static():
+                header.draw(vw, header_h, stats)
+                body.draw(vw, vh, header_h, footer_h, **body_args)
+                footer.draw(vw, vh, footer_h)
+
+            # Chrome and idle controller come from one cached layer; only
+            # what moves is drawn each frame
+            layer_key = (vw, vh, show_log, tiled, stick_dz, deadzones.shape,
+                         latency.enabled, calibration.enabled, resolution.enabled,
+                         body.layout_name())
+            if not layers.draw(layer_key, vw, vh, draw_static):
+                sdl2.SDL_SetRenderDrawColor(renderer, *BG_COLOR)
+                sdl2.SDL_RenderClear(renderer)
+            prof.lap('layer')
             header.draw(vw, header_h, stats)
-            body.draw(vw, vh, header_h, footer_h,
-                      stick_deadzone=stick_dz,
-                      trigger_deadzone=trig_dz,
-                      show_log=show_log)
+            prof.lap('header')
+            body.draw(vw, vh, header_h, footer_h, **body_args)
+            prof.lap('body')
             footer.draw(vw, vh, footer_h)
+            layers.end()
+            prof.lap('footer')
+            if show_graph:
+                graph_w = min(vw - PAD * 2, max(240, int(vw * 0.45)))
+                graph_h = max(80, int(vh * 0.18))
+                ui._draw_frame_graph(PAD, vh - footer_h - PAD - graph_h, graph_w, graph_h, frametimes)
+            if prof.enabled:
+                ui._draw_profile(vw - PAD, header_h + PAD, prof.overlay_lines())
+                prof.lap('overlay')
 
+            ui.flush()
             sdl2.SDL_RenderPresent(renderer)
+            latency.on_present(sdl2.SDL_GetTicks())
+            frametimes.tick()
+            scheduler.presented()
+            prof.lap('present')
+            prof.end_frame()
+            if not timeline.has('first_present'):
+                timeline.mark('first_present')
+            if not timeline.written and timeline.has('font'):
+                timeline.write()
+                print(f"JoyCheck: startup ms {timeline.line()}")
 
-            if time.time() - last_title_update > 1.0:
-                sdl2.SDL_SetWindowTitle(window, f"JoyCheck • devices={len(devmgr.devices)}".encode())
-                last_title_update = time.time()
-
-            sdl2.SDL_Delay(clock_per_frame_ms)
+            if scheduler.wait(frame_start, presented=True):
+                frametimes.gap()   # idle pacing is not a slow frame
 
+        if frames_total:
+            print(f"JoyCheck: frames={frames_total} skipped={frames_skipped} "
+                  f"({100.0 * frames_skipped / frames_total:.1f}%)")
+        if not timeline.written:
+            timeline.write()
+            print(f"JoyCheck: startup ms {timeline.line()}")
+        ft = frametimes.summary()
+        if ft is not None:
+            print(f"JoyCheck: frame ms p50={ft['p50_ms']:.2f} p95={ft['p95_ms']:.2f} "
+                  f"p99={ft['p99_ms']:.2f} max={ft['max_ms']:.2f} jitter={ft['jitter_ms']:.2f} "
+                  f"missed={frametimes.missed}/{frametimes.frames}")
+            path = frametimes.export_csv()
+            if path:
+                print(f"JoyCheck: frame times written to {path}")
+        for path in calibration.export_json(devmgr.devices):
+            print(f"JoyCheck: calibration written to {path}")
+        path = latency.export_csv()
+        if path:
+            print(f"JoyCheck: latency summary written to {path}")
+        if writer is not None:
+            print(f"JoyCheck: event log records={writer.written} dropped={writer.dropped}")
+        if evdev is not None:
+            for line in evdev.summary():
+                print(f"JoyCheck: evdev {line}")
+        if recorder is not None:
+            print(f"JoyCheck: session records={recorder.records} written to {recorder.path}")
+        tc = ui.font.cache.stats()
+        print(f"JoyCheck: text cache hits={tc['hits']} misses={tc['misses']} "
+              f"evictions={tc['evictions']} entries={tc['entries']} bytes={tc['bytes']}")
     finally:
+        if prof is not None:
+            prof.close()
+        if sampler is not None:
+            sampler.stop()
+        if evdev is not None:
+            evdev.close()
+        if recorder is not None:
+            recorder.close()
+        if writer is not None:
+            writer.close()
         sdl2.SDL_Quit()
 
 
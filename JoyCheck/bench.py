@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Headless render benchmark.
+
+Runs the real UIRenderer / HeaderRenderer / BodyRenderer / FooterRenderer
+stack offscreen (dummy video driver, software renderer) with 1, 4 and 8
+virtual controllers driven by scripted button/axis patterns, over a matrix
+of resolutions, log panel on/off and TTF vs TinyFont. Frames go through
+LayerCompositor like the app's; --flat adds the same cases drawn without
+the layer. Prints JSON with frame time percentiles and SDL draw calls per
+frame (the first, layer-building frame reported on its own).
+
+    python3 bench.py [--frames 120] [--flat] [--out logs/bench.json]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+HERE = Path(__file__).resolve().parent
+EXLIBS = HERE / "exlibs"
+if EXLIBS.exists():
+    sys.path.insert(0, str(EXLIBS))
+
+import sdl2
+
+from config import BG_COLOR, STICK_DEADZONE, TRIGGER_DEADZONE
+from input_device import DeviceManager
+from ui import UIRenderer, EventLog
+from ui_header import HeaderRenderer
+from ui_footer import FooterRenderer
+from ui_body import BodyRenderer
+from ui_layers import LayerCompositor
+from profiler import CallCounter, DRAW_FUNCS
+
+RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080))
+PAD_COUNTS = (1, 4, 8)
+
+def _percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round((len(sorted_vals) - 1) * p / 100.0))))
+    return sorted_vals[k]
+
+
+def _attach_pads(n):
+    joys = []
+    for _ in range(n):
+        idx = sdl2.SDL_JoystickAttachVirtual(sdl2.SDL_JOYSTICK_TYPE_GAMECONTROLLER,
+                                             sdl2.SDL_CONTROLLER_AXIS_MAX, 15, 0)
+        if idx < 0:
+            raise RuntimeError(sdl2.SDL_GetError().decode())
+        joys.append(sdl2.SDL_JoystickOpen(idx))
+    return joys
+
+
+def _detach_pads(joys):
+    for joy in joys:
+        sdl2.SDL_JoystickClose(joy)
+    for i in range(sdl2.SDL_NumJoysticks() - 1, -1, -1):
+        if sdl2.SDL_JoystickIsVirtual(i):
+            sdl2.SDL_JoystickDetachVirtual(i)
+
+
+def _drive(joys, frame):
+    """Scripted input: a rolling button press and circular stick sweeps."""
+    for k, joy in enumerate(joys):
+        btn = (frame // 4 + k) % 15
+        for b in range(15):
+            sdl2.SDL_JoystickSetVirtualButton(joy, b, 1 if b == btn and b not in (4, 6) else 0)
+        ang = (frame + k * 7) * 0.1
+        sdl2.SDL_JoystickSetVirtualAxis(joy, 0, int(32767 * math.cos(ang)))
+        sdl2.SDL_JoystickSetVirtualAxis(joy, 1, int(32767 * math.sin(ang)))
+        sdl2.SDL_JoystickSetVirtualAxis(joy, 2, int(20000 * math.sin(ang * 0.5)))
+        sdl2.SDL_JoystickSetVirtualAxis(joy, 3, int(20000 * math.cos(ang * 0.5)))
+        trig = int(32767 * (0.5 + 0.5 * math.sin(ang * 0.3)))
+        sdl2.SDL_JoystickSetVirtualAxis(joy, 4, trig)
+        sdl2.SDL_JoystickSetVirtualAxis(joy, 5, 32767 - trig)
+
+
+def run_case(width, height, pads, show_log, use_ttf, frames, counter, layered=True):
+    window = sdl2.SDL_CreateWindow(b"JoyCheck bench", 0, 0, width, height, sdl2.SDL_WINDOW_HIDDEN)
+    if not window:
+        raise RuntimeError(sdl2.SDL_GetError().decode())
+    renderer = sdl2.SDL_CreateRenderer(window, -1, sdl2.SDL_RENDERER_SOFTWARE)
+    if not renderer:
+        raise RuntimeError(sdl2.SDL_GetError().decode())
+    joys = _attach_pads(pads)
+    devmgr = ui = layers = None
+    try:
+        devmgr = DeviceManager()
+        log = EventLog(max_lines=200)
+        for i in range(40):
+            log.add(f"0 B{i % 15} DOWN")
+        ui = UIRenderer(renderer, devmgr, log, use_ttf=use_ttf)
+        header = HeaderRenderer(ui)
+        footer = FooterRenderer(ui)
+        body = BodyRenderer(ui)
+        layers = LayerCompositor(ui)
+        tiled = pads > 1
+        event = sdl2.SDL_Event()
+        header_h = int(height * 0.10)
+        footer_h = int(height * 0.10)
+        times = []
+        calls = []
+        draws = []
+        for frame in range(frames):
+            _drive(joys, frame)
+            counter.reset()
+            t0 = time.perf_counter()
+            while sdl2.SDL_PollEvent(event):
+                devmgr.handle_event(event)
+            devmgr.update_states()
+            devmgr.button_edges()
+            sdl2.SDL_SetRenderDrawBlendMode(renderer, sdl2.SDL_BLENDMODE_BLEND)
+            stats = {'fps': 60.0, 'stick_dz': STICK_DEADZONE,
+                     'trig_dz': TRIGGER_DEADZONE, 'devices': len(devmgr.devices)}
+            body_args = dict(stick_deadzone=STICK_DEADZONE, trigger_deadzone=TRIGGER_DEADZONE,
+                             show_log=show_log, tiled=tiled)
+
+            def draw_static():
+                header.draw(width, header_h, stats)
+                body.draw(width, height, header_h, footer_h, **body_args)
+                footer.draw(width, height, footer_h)
+
+            layer_key = (width, height, show_log, tiled, STICK_DEADZONE, body.layout_name())
+            if not (layered and layers.draw(layer_key, width, height, draw_static)):
+                sdl2.SDL_SetRenderDrawColor(renderer, *BG_COLOR)
+                sdl2.SDL_RenderClear(renderer)
+            draw_static()
+            layers.end()
+            ui.flush()
+            sdl2.SDL_RenderPresent(renderer)
+            times.append((time.perf_counter() - t0) * 1000.0)
+            calls.append(counter.total())
+            draws.append(counter.total(DRAW_FUNCS))
+        # First frames warm the text/sprite caches; report them separately
+        warm = min(len(times), 5)
+        steady = sorted(times[warm:]) or sorted(times)
+        return {
+            'width': width, 'height': height, 'pads': pads, 'view': 'grid' if tiled else 'single',
+            'log_panel': show_log, 'font': 'ttf' if ui.font.ttf else 'tiny',
+            'layered': layers.rebuilds > 0, 'layer_rebuilds': layers.rebuilds,
+            'frames': frames, 'first_frame_ms': round(times[0], 3),
+            'mean_ms': round(sum(steady) / len(steady), 3),
+            'p50_ms': round(_percentile(steady, 50), 3),
+            'p95_ms': round(_percentile(steady, 95), 3),
+            'p99_ms': round(_percentile(steady, 99), 3),
+            'max_ms': round(steady[-1], 3),
+            'first_frame_draw_calls': draws[0],
+            'draw_calls_per_frame': round(sum(draws[warm:]) / max(1, len(draws) - warm), 1),
+            'sdl_calls_per_frame': round(sum(calls[warm:]) / max(1, len(calls) - warm), 1),
+        }
+    finally:
+        if layers is not None:
+            layers.invalidate()
+        if ui is not None:
+            ui.font.close()
+        if devmgr is not None:
+            for dev in list(devmgr.devices.values()):
+                dev.close()
+        _detach_pads(joys)
+        sdl2.SDL_DestroyRenderer(renderer)
+        sdl2.SDL_DestroyWindow(window)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="JoyCheck headless render benchmark")
+    ap.add_argument('--frames', type=int, default=120, help="frames per case")
+    ap.add_argument('--out', help="write JSON here instead of stdout")
+    ap.add_argument('--quick', action='store_true', help="smallest resolution, 1 pad, TTF only")
+    ap.add_argument('--flat', action='store_true', help="also run every case without LayerCompositor")
+    args = ap.parse_args(argv)
+
+    os.chdir(HERE)   # Font looks for Roboto-Regular.ttf in the working directory
+    # The hidden bench window never has focus; keep virtual pad events flowing
+    sdl2.SDL_SetHint(sdl2.SDL_HINT_JOYSTICK_ALLOW_BACKGROUND_EVENTS, b"1")
+    if sdl2.SDL_Init(sdl2.SDL_INIT_VIDEO | sdl2.SDL_INIT_GAMECONTROLLER | sdl2.SDL_INIT_EVENTS) != 0:
+        raise RuntimeError(sdl2.SDL_GetError().decode())
+    counter = CallCounter()
+    counter.install()
+    try:
+        resolutions = RESOLUTIONS[:1] if args.quick else RESOLUTIONS
+        pad_counts = PAD_COUNTS[:1] if args.quick else PAD_COUNTS
+        fonts = (True,) if args.quick else (True, False)
+        modes = (True, False) if args.flat else (True,)
+        cases = []
+        for width, height in resolutions:
+            for pads in pad_counts:
+                for show_log in (False, True):
+                    for use_ttf in fonts:
+                        for layered in modes:
+                            cases.append(run_case(width, height, pads, show_log, use_ttf,
+                                                  max(10, args.frames), counter, layered))
+        ver = sdl2.SDL_version()
+        sdl2.SDL_GetVersion(ver)
+        result = {
+            'sdl': f"{ver.major}.{ver.minor}.{ver.patch}",
+            'video_driver': (sdl2.SDL_GetCurrentVideoDriver() or b'').decode(),
+            'renderer': 'software',
+            'cases': cases,
+        }
+    finally:
+        counter.uninstall()
+        sdl2.SDL_Quit()
+    text = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
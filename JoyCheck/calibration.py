@@ -0,0 +1,225 @@
+import json
+import math
+import time
+from array import array
+from pathlib import Path
+
+from config import (CALIB_SAMPLES, CALIB_SECTORS, CALIB_REST_RADIUS, CALIB_INTERVAL_S, CALIB_SAMPLE_HZ,
+                    LOG_DIR)
+from lazy_numpy import load_numpy
+
+
+def _recommend_deadzone(offset, noise):
+    """Smallest deadzone that hides the resting offset plus 4 sigma of noise."""
+    return round(min(0.5, max(0.02, offset + 4.0 * noise + 0.01)), 2)
+
+
+def _analyze_numpy(np, xy, sectors, rest_r):
+    x = xy[0::2].astype(np.float32) / 32767.0
+    y = xy[1::2].astype(np.float32) / 32767.0
+    r = np.hypot(x, y)
+    out = {'samples': int(len(r))}
+    rest = r < rest_r
+    n_rest = int(rest.sum())
+    if n_rest >= 16:
+        cx, cy = float(x[rest].mean()), float(y[rest].mean())
+        noise = float(np.sqrt(((x[rest] - cx) ** 2 + (y[rest] - cy) ** 2).mean()))
+        out.update(center=(cx, cy), noise=noise, rest_samples=n_rest)
+    outer = r >= 0.5
+    if outer.any():
+        sec = ((np.arctan2(y[outer], x[outer]) + math.pi) * (sectors / (2 * math.pi))).astype(np.int32) % sectors
+        maxr = np.zeros(sectors, dtype=np.float32)
+        np.maximum.at(maxr, sec, r[outer])
+        out['sector_max'] = [float(v) for v in maxr]
+    return out
+
+
+def _analyze_python(xy, sectors, rest_r):
+    n = len(xy) // 2
+    out = {'samples': n}
+    sx = sy = 0.0
+    rest = []
+    maxr = [0.0] * sectors
+    seen_outer = False
+    scale = 1.0 / 32767.0
+    k = sectors / (2 * math.pi)
+    for i in range(n):
+        x = xy[2 * i] * scale
+        y = xy[2 * i + 1] * scale
+        r = math.hypot(x, y)
+        if r < rest_r:
+            rest.append((x, y))
+            sx += x
+            sy += y
+        elif r >= 0.5:
+            seen_outer = True
+            s = int((math.atan2(y, x) + math.pi) * k) % sectors
+            if r > maxr[s]:
+                maxr[s] = r
+    if len(rest) >= 16:
+        cx, cy = sx / len(rest), sy / len(rest)
+        noise = math.sqrt(sum((x - cx) ** 2 + (y - cy) ** 2 for x, y in rest) / len(rest))
+        out.update(center=(cx, cy), noise=noise, rest_samples=len(rest))
+    if seen_outer:
+        out['sector_max'] = maxr
+    return out
+
+
+class StickAnalyzer:
+    """Ring buffer of raw int16 (x, y) samples for one stick and its calibration stats.
+
+    analyze() reports the resting center offset and noise (samples inside
+    rest_r), the maximum radius per angular sector, the outer range, the
+    circularity error (mean deviation of the sector maxima from their
+    mean), the asymmetry between opposite sectors and a recommended
+    deadzone. Radii are in normalized units (1.0 = 32767).
+    """
+    def __init__(self, size=CALIB_SAMPLES, sectors=CALIB_SECTORS, rest_r=CALIB_REST_RADIUS):
+        self.size = int(size)
+        self.sectors = int(sectors)
+        self.rest_r = float(rest_r)
+        self.ring = array('h', bytes(4 * self.size))   # x0, y0, x1, y1, ...
+        self.index = 0
+        self.count = 0
+
+    def add_raw(self, xs, ys):
+        """Append raw int16 positions (two equal-length arrays) with slice copies."""
+        n = len(xs)
+        if not n:
+            return
+        size = self.size
+        if n > size:
+            xs, ys, n = xs[-size:], ys[-size:], size
+        ring = self.ring
+        i = self.index
+        first = min(n, size - i)
+        ring[2 * i:2 * (i + first):2] = xs[:first]
+        ring[2 * i + 1:2 * (i + first):2] = ys[:first]
+        if first < n:
+            ring[0:2 * (n - first):2] = xs[first:]
+            ring[1:2 * (n - first):2] = ys[first:]
+        self.index = (i + n) % size
+        self.count = min(size, self.count + n)
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+
+    def _samples(self):
+        if self.count < self.size:
+            return self.ring[:2 * self.count]
+        return self.ring   # order does not matter for the statistics
+
+    def analyze(self):
+        if not self.count:
+            return None
+        xy = self._samples()
+        np = load_numpy()   # first analysis (A); the pure-Python path gives the same numbers
+        if np is not None:
+            out = _analyze_numpy(np, np.frombuffer(xy, dtype=np.int16), self.sectors, self.rest_r)
+        else:
+            out = _analyze_python(xy, self.sectors, self.rest_r)
+        center = out.get('center')
+        if center is not None:
+            out['offset'] = math.hypot(*center)
+            out['deadzone'] = _recommend_deadzone(out['offset'], out['noise'])
+        maxr = out.get('sector_max')
+        if maxr is not None:
+            reached = [r for r in maxr if r > 0.0]
+            out['sectors_reached'] = len(reached)
+            mean_r = sum(reached) / len(reached)
+            out['range'] = mean_r
+            out['circularity_error'] = sum(abs(r - mean_r) for r in reached) / len(reached) / mean_r
+            half = self.sectors // 2
+            pairs = [(maxr[s], maxr[s + half]) for s in range(half) if maxr[s] > 0.0 and maxr[s + half] > 0.0]
+            if pairs:
+                out['asymmetry'] = sum(abs(a - b) for a, b in pairs) / len(pairs) / mean_r
+        return out
+
+
+class CalibrationStore:
+    """Stick analyzers per controller, sampling the current stick positions
+    at a fixed rate so each position weighs by how long it was held."""
+    def __init__(self, interval_s=CALIB_INTERVAL_S, sample_hz=CALIB_SAMPLE_HZ):
+        self.enabled = False
+        self.version = 0
+        self.interval_s = float(interval_s)
+        self.period = 1.0 / float(sample_hz)
+        self._next_sample = None
+        self.analyzers = {}   # (instance_id, 0 left / 1 right) -> StickAnalyzer
+        self.results = {}     # (instance_id, side) -> analyze() dict
+        self._last_run = 0.0
+        self._dirty = False
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.version += 1
+
+    def sample(self, now, devices):
+        """Add each controller's raw stick position once per sample period
+        elapsed since the last call (now in seconds), so slow frames while
+        idle still count the resting position for the time it was held."""
+        if not self.enabled:
+            self._next_sample = None
+            return
+        if self._next_sample is None:
+            self._next_sample = now
+        if now < self._next_sample:
+            return
+        n = int((now - self._next_sample) / self.period) + 1
+        if n > CALIB_SAMPLES:   # a long stall: the ring only holds this many anyway
+            n = CALIB_SAMPLES
+            self._next_sample = now + self.period
+        else:
+            self._next_sample += n * self.period
+        for iid, dev in devices.items():
+            raw = dev.raw
+            for side in (0, 1):
+                an = self.analyzers.get((iid, side))
+                if an is None:
+                    an = self.analyzers[(iid, side)] = StickAnalyzer()
+                an.add_raw(array('h', [raw[2 * side]]) * n, array('h', [raw[2 * side + 1]]) * n)
+        self._dirty = True
+
+    def tick(self, now):
+        """Re-run the batch analysis at most every interval_s (now in seconds)."""
+        if not self._dirty or now - self._last_run < self.interval_s:
+            return
+        self._last_run = now
+        self._dirty = False
+        self.results = {key: an.analyze() for key, an in self.analyzers.items()}
+        self.version += 1
+
+    def get(self, instance_id, side):
+        return self.results.get((instance_id, side))
+
+    def reset(self):
+        for an in self.analyzers.values():
+            an.reset()
+        self.results.clear()
+        self.version += 1
+
+    def prune(self, live_ids):
+        for key in [k for k in self.analyzers if k[0] not in live_ids]:
+            del self.analyzers[key]
+            self.results.pop(key, None)
+
+    def export_json(self, devices, directory=LOG_DIR):
+        """Write logs/calib-<guid>.json per controller with results; returns the paths."""
+        paths = []
+        out_dir = Path(directory)
+        for iid, dev in devices.items():
+            sticks = {}
+            for side, label in ((0, 'left'), (1, 'right')):
+                res = self.results.get((iid, side))
+                if res:
+                    sticks[label] = res
+            if not sticks:
+                continue
+            out_dir.mkdir(parents=True, exist_ok=True)
+            path = out_dir / f"calib-{dev.guid or iid}.json"
+            doc = {'name': dev.name, 'guid': dev.guid,
+                   'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'sticks': sticks}
+            path.write_text(json.dumps(doc, indent=2) + "\n")
+            paths.append(path)
+        return paths
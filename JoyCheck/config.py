@@ -5,6 +5,11 @@ FPS = 60
 PAD = 12
 FULLSCREEN = True
 
+# Skip clear/draw/present when nothing visible changed since the last frame,
+# but still redraw at least this often so the FPS/header stays alive.
+PRESENT_ON_CHANGE = True
+MAX_IDLE_REFRESH_MS = 500
+
 # Colors (RGBA)
 BG_COLOR = (20, 22, 24, 255)
 PANEL_BG = (35, 38, 42, 255)
@@ -16,3 +21,107 @@ AXIS_BAR_FG = (180, 180, 200, 255)
 STICK_DEADZONE = 0.15   # LX/LY/RX/RY
 TRIGGER_DEADZONE = 0.05 # LT/RT
 AXIS_EVENT_STEP = 0.20  # log khi thay đổi trục vượt ngưỡng này
+
+# Input ingestion: take button/axis state from SDL controller events and only
+# poll every device as a periodic resync (ms). False = poll every frame.
+INPUT_EVENT_DRIVEN = True
+INPUT_RESYNC_MS = 1000
+
+# Optional background sampler thread (replaces events/polling when enabled)
+SAMPLER_ENABLED = False
+SAMPLER_HZ = 1000       # capped at 1000
+
+# Diagnostics output directory (created by JoyCheck.sh next to app.py)
+LOG_DIR = "logs"
+
+# Structured event log (button edges, axis diffs) written by a background thread
+EVENT_LOG_ENABLED = True
+EVENT_LOG_FILE = "events.log"
+EVENT_LOG_MAX_BYTES = 1024 * 1024   # rotate to events.log.1 .. .N past this size
+EVENT_LOG_BACKUPS = 3
+EVENT_LOG_QUEUE = 4096              # records beyond this are dropped, never block
+EVENT_LOG_FSYNC_S = 2.0
+
+# Input-to-photon latency histogram range (1 ms buckets)
+LATENCY_MAX_MS = 500
+
+# Rendered text texture cache (TTF path)
+TEXT_CACHE_MAX_ENTRIES = 256
+TEXT_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# Pre-rasterized stick well sprites, rebuilt on layout change
+SPRITE_CACHE_MAX_ENTRIES = 128
+SPRITE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Frame profiler stats file (JOYCHECK_STATS) rolls over to .1 past this size
+PROFILE_STATS_MAX_BYTES = 512 * 1024
+
+# Startup timeline (time to first frame), one line appended per launch
+STARTUP_LOG_FILE = "startup.log"
+# Open the TTF font on a worker thread and draw the first frames with TinyFont
+FONT_BACKGROUND_LOAD = True
+
+# Frame-time telemetry ring buffer (V toggles the graph)
+FRAME_TIME_SAMPLES = 600
+FRAME_TIME_MISS_FACTOR = 1.5        # frame > 1.5 refresh intervals counts as a missed vsync
+
+# Idle governor: after this long without input drop to IDLE_FPS and block on events
+IDLE_AFTER_MS = 10000
+IDLE_FPS = 5
+
+# Stick samples kept per controller between frames (heatmap / analyzers drain them)
+STICK_TRAIL_MAX = 4096
+
+# Stick heatmap (H toggle, R reset, D decay): grid cells per side, samples
+# for full colour, and the once-per-second decay factor
+HEATMAP_SIZE = 64
+HEATMAP_SATURATION = 24
+HEATMAP_DECAY = 0.85
+
+# Stick calibration analyzer (A toggle, J export JSON): samples kept per
+# stick, angular sectors for the outer range, radius counted as resting,
+# how often the batch analysis re-runs and the rate the stick positions are
+# sampled at (fixed, so a resting stick counts by time, not by value changes)
+CALIB_SAMPLES = 4096
+CALIB_SECTORS = 32
+CALIB_REST_RADIUS = 0.2
+CALIB_INTERVAL_S = 0.5
+CALIB_SAMPLE_HZ = 100
+
+# Deadzone engine: 'axial', 'radial' or 'scaled_radial' (Z cycles), the
+# anti-deadzone applied when toggled with X, and radial gain table size
+DEADZONE_SHAPE = 'scaled_radial'
+ANTI_DEADZONE = 0.0
+ANTI_DEADZONE_STEP = 0.20
+DEADZONE_GAIN_STEPS = 8192
+
+# Axis resolution analyzer (B toggles the panel) and the trigger value
+# that counts as pressed for L2/R2
+RESOLUTION_INTERVAL_S = 0.5
+TRIGGER_PRESS_THRESHOLD = 0.5
+
+# Controller layouts: layouts/<name>.json files, the one used for devices no
+# layout matches, and how many compiled panel sizes each layout keeps
+LAYOUT_DIR = "layouts"
+LAYOUT_DEFAULT = "default"
+LAYOUT_CACHE_SIZE = 8
+
+# Direct evdev backend: the environment switch (comma-separated event nodes
+# or recorded files, "auto" = every gamepad node) and input_event records
+# read per node per poll into one preallocated buffer
+EVDEV_ENV = "JOYCHECK_EVDEV"
+EVDEV_READ_EVENTS = 256
+
+# Session recorder / replayer: JOYCHECK_RECORD=1 (or a file path) records
+# the session, JOYCHECK_REPLAY=<file> replays one, JOYCHECK_REPLAY_FAST=1
+# replays one recorded frame per frame instead of in real time; file name
+# under LOG_DIR (strftime pattern) and bytes buffered between file appends
+RECORD_ENV = "JOYCHECK_RECORD"
+REPLAY_ENV = "JOYCHECK_REPLAY"
+REPLAY_FAST_ENV = "JOYCHECK_REPLAY_FAST"
+SESSION_FILE = "session-%Y%m%d-%H%M%S.jcs"
+SESSION_FLUSH_BYTES = 64 * 1024
+
+# Open joysticks without a GameController mapping as raw devices
+# (any number of axes, buttons, hats and balls, shown as a generated grid)
+RAW_JOYSTICKS = True
@@ -0,0 +1,102 @@
+import math
+from array import array
+
+from config import (STICK_DEADZONE, TRIGGER_DEADZONE, DEADZONE_SHAPE, ANTI_DEADZONE,
+                    DEADZONE_GAIN_STEPS)
+from input_device import _norm, norm_lut
+
+SHAPES = ('axial', 'radial', 'scaled_radial')
+LUT_SHIFT = 3   # axial/trigger tables step 8 raw units: 8192/4096 entries, finer than the display
+
+
+def _axial(v, dz, anti):
+    """One axis (or a trigger): zero inside dz, rescaled outside, lifted by anti."""
+    m = abs(v)
+    if m <= dz:
+        return 0.0
+    m = min(1.0, (m - dz) / (1.0 - dz)) if dz < 1.0 else 0.0
+    if m > 0.0 and anti > 0.0:
+        m = anti + (1.0 - anti) * m
+    return math.copysign(m, v)
+
+
+def _radial_gain(r, dz, anti, scaled):
+    """Factor applied to (x, y) at stick radius r."""
+    if r <= dz or r <= 0.0:
+        return 0.0
+    if scaled:
+        m = min(1.0, (r - dz) / (1.0 - dz)) if dz < 1.0 else 0.0
+    else:
+        m = r
+    if m > 0.0 and anti > 0.0:
+        m = anti + (1.0 - anti) * m
+    return m / r
+
+
+class DeadzoneEngine:
+    """Deadzone shapes as lookup tables indexed by raw int16 values.
+
+    axial applies the deadzone to each axis on its own; radial zeroes the
+    stick inside the deadzone radius and passes it through unchanged
+    outside; scaled_radial rescales the remaining range to 0..1. An
+    anti-deadzone lifts every non-zero output to at least `anti`, like
+    emulators do to cancel a game's own deadzone. Tables are rebuilt only
+    by configure() when a value changes; stick() and trigger() are then
+    lookups plus, for the radial shapes, one squared-radius bucket.
+    """
+    def __init__(self, stick_dz=STICK_DEADZONE, trig_dz=TRIGGER_DEADZONE,
+                 shape=DEADZONE_SHAPE, anti=ANTI_DEADZONE, gain_steps=DEADZONE_GAIN_STEPS):
+        self.gain_steps = int(gain_steps)
+        self.gain_scale = (self.gain_steps - 1) / 2.0   # r^2 in [0, 2] -> bucket
+        self.stick_dz = self.trig_dz = self.shape = self.anti = None
+        self.axis_lut = array('f')
+        self.gain_lut = array('f')
+        self.trigger_lut = array('f')
+        self.version = 0
+        self.configure(stick_dz, trig_dz, shape, anti)
+
+    def configure(self, stick_dz=None, trig_dz=None, shape=None, anti=None) -> bool:
+        """Apply new settings; rebuilds only the tables they affect. True if anything changed."""
+        stick_dz = self.stick_dz if stick_dz is None else float(stick_dz)
+        trig_dz = self.trig_dz if trig_dz is None else float(trig_dz)
+        shape = self.shape if shape is None else shape
+        anti = self.anti if anti is None else float(anti)
+        if shape not in SHAPES:
+            shape = SHAPES[0]
+        stick_changed = (stick_dz, shape, anti) != (self.stick_dz, self.shape, self.anti)
+        trig_changed = (trig_dz, anti) != (self.trig_dz, self.anti)
+        self.stick_dz, self.trig_dz, self.shape, self.anti = stick_dz, trig_dz, shape, anti
+        if stick_changed:
+            if shape == 'axial':
+                self.axis_lut = array('f', [_axial(_norm(v), stick_dz, anti)
+                                               for v in range(-32768, 32768, 1 << LUT_SHIFT)])
+            else:
+                scaled = shape == 'scaled_radial'
+                scale = self.gain_scale
+                self.gain_lut = array('f', (_radial_gain(math.sqrt(i / scale), stick_dz, anti, scaled)
+                                            for i in range(self.gain_steps)))
+        if trig_changed:
+            self.trigger_lut = array('f', [_axial(_norm(v), trig_dz, anti)
+                                          for v in range(0, 32768, 1 << LUT_SHIFT)])
+        if stick_changed or trig_changed:
+            self.version += 1
+            return True
+        return False
+
+    def cycle_shape(self):
+        return self.configure(shape=SHAPES[(SHAPES.index(self.shape) + 1) % len(SHAPES)])
+
+    def stick(self, raw_x, raw_y):
+        """Processed (x, y) in -1..1 for raw int16 stick values."""
+        if self.shape == 'axial':
+            lut = self.axis_lut
+            return lut[(raw_x + 32768) >> LUT_SHIFT], lut[(raw_y + 32768) >> LUT_SHIFT]
+        lut = norm_lut()
+        x = lut[raw_x + 32768]
+        y = lut[raw_y + 32768]
+        g = self.gain_lut[int((x * x + y * y) * self.gain_scale)]
+        return x * g, y * g
+
+    def trigger(self, raw):
+        """Processed trigger value 0..1 for a raw int16 (negative reads as 0)."""
+        return self.trigger_lut[raw >> LUT_SHIFT if raw > 0 else 0]
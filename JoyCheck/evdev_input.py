@@ -0,0 +1,313 @@
+import glob
+import io
+import os
+import selectors
+import stat
+import struct
+import time
+from pathlib import Path
+
+import sdl2
+
+from config import EVDEV_READ_EVENTS
+from input_device import N_STICK_AXES
+
+# struct input_event: struct timeval (native longs), __u16 type, __u16 code, __s32 value
+EVENT = struct.Struct('@llHHi')
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+SYN_REPORT, SYN_DROPPED = 0, 3
+BTN_GAMEPAD = 0x130
+
+
+def _B(name):
+    return getattr(sdl2, 'SDL_CONTROLLER_BUTTON_' + name)
+
+
+def _A(name):
+    return getattr(sdl2, 'SDL_CONTROLLER_AXIS_' + name)
+
+
+# Kernel key codes -> SDL GameController buttons (SDL X/Y sit west/north)
+KEY_BUTTONS = {
+    0x130: _B('A'), 0x131: _B('B'), 0x134: _B('X'), 0x133: _B('Y'),
+    0x136: _B('LEFTSHOULDER'), 0x137: _B('RIGHTSHOULDER'),
+    0x13a: _B('BACK'), 0x13b: _B('START'), 0x13c: _B('GUIDE'),
+    0x13d: _B('LEFTSTICK'), 0x13e: _B('RIGHTSTICK'),
+    0x220: _B('DPAD_UP'), 0x221: _B('DPAD_DOWN'), 0x222: _B('DPAD_LEFT'), 0x223: _B('DPAD_RIGHT'),
+}
+# Digital L2/R2 (BTN_TL2/BTN_TR2) drive the trigger axes to full scale
+KEY_TRIGGERS = {0x138: _A('TRIGGERLEFT'), 0x139: _A('TRIGGERRIGHT')}
+# ABS codes -> SDL axes; ABS_GAS/ABS_BRAKE are triggers on some pads
+ABS_AXES = {0x00: _A('LEFTX'), 0x01: _A('LEFTY'), 0x03: _A('RIGHTX'), 0x04: _A('RIGHTY'),
+            0x02: _A('TRIGGERLEFT'), 0x05: _A('TRIGGERRIGHT'),
+            0x0a: _A('TRIGGERLEFT'), 0x09: _A('TRIGGERRIGHT')}
+# Hat axes -> (negative button, positive button)
+ABS_HATS = {0x10: (_B('DPAD_LEFT'), _B('DPAD_RIGHT')), 0x11: (_B('DPAD_UP'), _B('DPAD_DOWN'))}
+TRIGGER_AXES = (_A('TRIGGERLEFT'), _A('TRIGGERRIGHT'))
+
+# Ranges assumed for recorded streams without absinfo: sticks already int16
+STREAM_ABSINFO = {code: ((0, 32767) if axis in TRIGGER_AXES else (-32768, 32767))
+                  for code, axis in ABS_AXES.items()}
+
+
+def _ioc_read(nr, size):
+    """_IOR('E', nr, size) from <linux/input.h>."""
+    return (2 << 30) | (size << 16) | (ord('E') << 8) | nr
+
+
+def _ioctl(fd, nr, size):
+    import fcntl   # Linux only; recorded streams never get here
+    buf = bytearray(size)
+    fcntl.ioctl(fd, _ioc_read(nr, size), buf, True)
+    return buf
+
+
+def _node_info(fd):
+    """(name, guid, absinfo) of an event node via EVIOCGNAME/EVIOCGID/EVIOCGABS."""
+    name = bytes(_ioctl(fd, 0x06, 256)).split(b'\0', 1)[0].decode('utf-8', 'replace')
+    bus, vendor, product, version = struct.unpack('4H', _ioctl(fd, 0x02, 8))
+    absinfo = {}
+    for code in list(ABS_AXES) + list(ABS_HATS):
+        try:
+            _value, lo, hi = struct.unpack('3i', _ioctl(fd, 0x40 + code, 24)[:12])
+        except OSError:
+            continue
+        if hi > lo:
+            absinfo[code] = (lo, hi)
+    return name, _guid(bus, vendor, product, version), absinfo
+
+
+def _guid(bus, vendor, product, version):
+    """Same field layout as SDL's joystick GUID string (CRC left zero)."""
+    return struct.pack('<8H', bus, 0, vendor, 0, product, 0, version, 0).hex()
+
+
+def _is_gamepad(fd):
+    try:
+        keys = _ioctl(fd, 0x20 + EV_KEY, 96)   # EVIOCGBIT(EV_KEY)
+    except OSError:
+        return False
+    return bool(keys[BTN_GAMEPAD >> 3] >> (BTN_GAMEPAD & 7) & 1)
+
+
+class _Source:
+    """One event node or recorded stream feeding one Controller."""
+    __slots__ = ('dev', 'fd', 'stream', 'scale', 'tail', 'reports', 'dropped',
+                 'last_us', 'syncing', 'stick_moved', 'unmapped')
+
+    def __init__(self, dev, absinfo, fd=None, stream=None):
+        self.dev = dev
+        self.fd = fd
+        self.stream = stream
+        self.scale = {}   # abs code -> (axis, factor, bias) mapping to int16
+        for code, axis in ABS_AXES.items():
+            lo, hi = absinfo.get(code) or STREAM_ABSINFO[code]
+            top, bottom = (32767, 0) if axis in TRIGGER_AXES else (32767, -32768)
+            factor = (top - bottom) / float(hi - lo)
+            self.scale[code] = (axis, factor, bottom - lo * factor)
+        self.tail = 0          # bytes of a partial event left at the buffer start (streams)
+        self.reports = 0       # SYN_REPORT frames seen
+        self.dropped = 0       # SYN_DROPPED: the kernel buffer overflowed
+        self.last_us = None    # kernel timestamp of the last report, microseconds
+        self.syncing = False   # discarding until the next SYN_REPORT after a drop
+        self.stick_moved = False
+        self.unmapped = {}     # (type, code) -> count of events with no mapping
+
+
+class EvdevBackend:
+    """Controllers read straight from /dev/input/event* nodes.
+
+    Every node is opened non-blocking and watched by one selector; poll()
+    reads each ready node with a single read into a preallocated buffer and
+    decodes the struct input_event records in bulk. Kernel timestamps go to
+    the Controller as button edge times, and stick moves are committed to
+    the trail once per EV_SYN report. A recorded stream (a file made with `cat /dev/input/eventN`,
+    or any binary file object) can stand in for a node; it is replayed as fast
+    as poll() is called. Each source is a DeviceManager virtual controller.
+
+    Raw diagnostics are kept per source: SYN_DROPPED overflows and the
+    first event of every code with no mapping are queued as log lines for
+    drain_notes(), and summary() totals them for the exit report.
+    """
+    def __init__(self, devmgr, read_events=EVDEV_READ_EVENTS):
+        self.devmgr = devmgr
+        self.selector = selectors.DefaultSelector()
+        self.buf = bytearray(EVENT.size * max(1, int(read_events)))
+        self.view = memoryview(self.buf)
+        self.sources = {}    # instance_id -> _Source
+        self.events = 0
+        self.notes = []      # diagnostics not yet shown, see drain_notes()
+
+    def open_spec(self, spec):
+        """Open a JOYCHECK_EVDEV value: comma-separated paths, or "auto"."""
+        for part in (p.strip() for p in spec.split(',')):
+            if part == 'auto':
+                self.scan()
+            elif part:
+                self.open(part)
+
+    def scan(self, pattern='/dev/input/event*'):
+        """Open every readable node that reports gamepad buttons."""
+        opened = []
+        for path in sorted(glob.glob(pattern)):
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            except OSError:
+                continue
+            if _is_gamepad(fd):
+                opened.append(self._add_node(path, fd))
+            else:
+                os.close(fd)
+        return opened
+
+    def open(self, path):
+        """Open an event node, or a recorded file when path is not a char device."""
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        if not stat.S_ISCHR(os.fstat(fd).st_mode):
+            os.close(fd)
+            return self.open_stream(open(path, 'rb'), Path(path).name)
+        return self._add_node(path, fd)
+
+    def open_stream(self, stream, name="evdev replay", absinfo=None, guid=""):
+        """Replay recorded input_event bytes (file object or bytes) as a controller."""
+        if isinstance(stream, (bytes, bytearray, memoryview)):
+            stream = io.BytesIO(bytes(stream))
+        dev = self.devmgr.add_virtual(name, guid)
+        src = _Source(dev, absinfo or {}, stream=stream)
+        self.sources[dev.instance_id] = src
+        return dev
+
+    def _add_node(self, path, fd):
+        try:
+            name, guid, absinfo = _node_info(fd)
+        except OSError:
+            name, guid, absinfo = Path(path).name, "", {}
+        dev = self.devmgr.add_virtual(name, guid)
+        src = _Source(dev, absinfo, fd=fd)
+        self.sources[dev.instance_id] = src
+        self.selector.register(fd, selectors.EVENT_READ, src)
+        return dev
+
+    def poll(self) -> bool:
+        """Read whatever is pending on every source. True if any state changed."""
+        changed = False
+        if self.selector.get_map():
+            for key, _mask in self.selector.select(0):
+                changed |= self._read_node(key.data)
+        for src in [s for s in self.sources.values() if s.stream is not None]:
+            changed |= self._read_stream(src)
+        return changed
+
+    def _read_node(self, src):
+        try:
+            n = os.readv(src.fd, [self.buf])
+        except BlockingIOError:
+            return False
+        except OSError:   # unplugged (ENODEV)
+            self.close_source(src)
+            return False
+        # Node timestamps are CLOCK_REALTIME; map them onto SDL ticks
+        offset = sdl2.SDL_GetTicks() / 1000.0 - time.time()
+        return self._decode(src, n - n % EVENT.size, offset)
+
+    def _read_stream(self, src):
+        n = src.stream.readinto(self.view[src.tail:])
+        if not n:
+            src.stream.close()
+            src.stream = None   # finished: the controller keeps its last state
+            return False
+        n += src.tail
+        whole = n - n % EVENT.size
+        changed = self._decode(src, whole)
+        src.tail = n - whole
+        if src.tail:
+            self.buf[:src.tail] = self.buf[whole:n]
+        return changed
+
+    def _decode(self, src, nbytes, offset=None):
+        """Apply nbytes of whole events from the buffer. Kernel times plus
+        `offset` land on the SDL tick clock; without one (recorded streams,
+        whose times are in the past) every event gets the current tick."""
+        dev = src.dev
+        now = sdl2.SDL_GetTicks() / 1000.0
+        changed = False
+        count = 0
+        for sec, usec, etype, code, value in EVENT.iter_unpack(self.view[:nbytes]):
+            count += 1
+            if etype == EV_SYN:
+                if code == SYN_REPORT:
+                    src.reports += 1
+                    src.last_us = sec * 1000000 + usec
+                    src.syncing = False
+                    if src.stick_moved:
+                        dev.push_stick(*dev.raw[:N_STICK_AXES])
+                        src.stick_moved = False
+                elif code == SYN_DROPPED:
+                    src.dropped += 1
+                    src.syncing = True
+                    self.notes.append(f"{dev.instance_id} EVDEV SYN_DROPPED #{src.dropped}")
+                continue
+            if src.syncing:
+                continue
+            t = now if offset is None else sec + usec * 1e-6 + offset
+            if etype == EV_KEY:
+                btn = KEY_BUTTONS.get(code)
+                if btn is not None:
+                    if value != 2:   # 2 = autorepeat
+                        changed |= dev.set_button(btn, value != 0, t)
+                    continue
+                axis = KEY_TRIGGERS.get(code)
+                if axis is not None:
+                    changed |= dev.set_axis(axis, 32767 if value else 0, track=False)
+                    continue
+            elif etype == EV_ABS:
+                entry = src.scale.get(code)
+                if entry is not None:
+                    axis, factor, bias = entry
+                    raw = max(-32768, min(32767, int(value * factor + bias)))
+                    if dev.set_axis(axis, raw, track=False):
+                        changed = True
+                        src.stick_moved = src.stick_moved or axis < N_STICK_AXES
+                    continue
+                hat = ABS_HATS.get(code)
+                if hat is not None:
+                    neg, pos = hat
+                    changed |= dev.set_button(neg, value < 0, t)
+                    changed |= dev.set_button(pos, value > 0, t)
+                    continue
+            n = src.unmapped.get((etype, code), 0)
+            if not n:
+                self.notes.append(f"{dev.instance_id} EVDEV UNMAPPED {etype:#x}:{code:#x}")
+            src.unmapped[(etype, code)] = n + 1
+        self.events += count
+        return changed
+
+    def drain_notes(self):
+        """Return and clear the diagnostic lines queued since the last drain."""
+        notes, self.notes = self.notes, []
+        return notes
+
+    def summary(self):
+        """One line per open source: reports, drops and unmapped event codes."""
+        lines = []
+        for src in self.sources.values():
+            unmapped = ' '.join(f"{t:#x}:{c:#x}*{n}" for (t, c), n in sorted(src.unmapped.items()))
+            lines.append(f"{src.dev.name} reports={src.reports} dropped={src.dropped} "
+                         f"unmapped={unmapped or 'none'}")
+        return lines
+
+    def close_source(self, src):
+        if src.fd is not None:
+            self.selector.unregister(src.fd)
+            os.close(src.fd)
+            src.fd = None
+        if src.stream is not None:
+            src.stream.close()
+            src.stream = None
+        self.sources.pop(src.dev.instance_id, None)
+        self.devmgr.remove_by_instance_id(src.dev.instance_id)
+
+    def close(self):
+        for src in list(self.sources.values()):
+            self.close_source(src)
+        self.selector.close()
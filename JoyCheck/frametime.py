@@ -0,0 +1,79 @@
+import time
+from array import array
+from pathlib import Path
+
+from config import FRAME_TIME_SAMPLES, FRAME_TIME_MISS_FACTOR, LOG_DIR
+
+
+class FrameTimeRecorder:
+    """Present-to-present intervals in a fixed-size ring buffer.
+
+    tick() is called right after each SDL_RenderPresent and stores the time
+    since the previous one (perf_counter, milliseconds). gap() marks a frame
+    the loop skipped, so the idle pause is not counted as a slow frame. A
+    frame longer than miss_factor refresh intervals counts as a missed vsync.
+    """
+    def __init__(self, refresh_hz=60, size=FRAME_TIME_SAMPLES, miss_factor=FRAME_TIME_MISS_FACTOR):
+        self.refresh_ms = 1000.0 / (refresh_hz if refresh_hz and refresh_hz > 0 else 60)
+        self.miss_ms = self.refresh_ms * miss_factor
+        self.size = max(2, int(size))
+        self.buf = array('d', bytes(8 * self.size))
+        self.index = 0
+        self.count = 0
+        self.frames = 0       # all-time recorded intervals
+        self.missed = 0       # all-time intervals above miss_ms
+        self._last = None
+
+    def tick(self, t=None):
+        t = time.perf_counter() if t is None else t
+        if self._last is not None:
+            ms = (t - self._last) * 1000.0
+            self.buf[self.index] = ms
+            self.index = (self.index + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+            self.frames += 1
+            if ms > self.miss_ms:
+                self.missed += 1
+        self._last = t
+
+    def gap(self):
+        self._last = None
+
+    def samples(self):
+        """Recorded intervals, oldest first."""
+        if self.count < self.size:
+            return self.buf[:self.count]
+        return self.buf[self.index:] + self.buf[:self.index]
+
+    def summary(self):
+        """Stats over the ring buffer, or None before the first interval."""
+        vals = self.samples()
+        n = len(vals)
+        if not n:
+            return None
+        ordered = sorted(vals)
+        def pct(p):
+            return ordered[min(n - 1, int(round((n - 1) * p / 100.0)))]
+        jitter = (sum(abs(vals[i] - vals[i - 1]) for i in range(1, n)) / (n - 1)) if n > 1 else 0.0
+        mean = sum(vals) / n
+        return {'count': n, 'mean_ms': mean, 'fps': 1000.0 / mean if mean > 0 else 0.0,
+                'p50_ms': pct(50), 'p95_ms': pct(95), 'p99_ms': pct(99), 'max_ms': ordered[-1],
+                'jitter_ms': jitter, 'missed': sum(1 for v in vals if v > self.miss_ms),
+                'refresh_ms': self.refresh_ms}
+
+    def export_csv(self, directory=LOG_DIR):
+        """Write the buffered intervals to logs/frametime-<time>.csv; returns the path."""
+        s = self.summary()
+        if s is None:
+            return None
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / time.strftime("frametime-%Y%m%d-%H%M%S.csv")
+        with open(path, 'w') as f:
+            f.write(f"# frames={self.frames} missed={self.missed} refresh_ms={self.refresh_ms:.3f} "
+                    f"p50_ms={s['p50_ms']:.3f} p95_ms={s['p95_ms']:.3f} p99_ms={s['p99_ms']:.3f} "
+                    f"max_ms={s['max_ms']:.3f} jitter_ms={s['jitter_ms']:.3f}\n")
+            f.write("frame,ms\n")
+            for i, ms in enumerate(self.samples()):
+                f.write(f"{i},{ms:.3f}\n")
+        return path
@@ -0,0 +1,189 @@
+import ctypes
+from array import array
+
+import sdl2
+
+from config import HEATMAP_SIZE, HEATMAP_SATURATION, HEATMAP_DECAY
+from lazy_numpy import load_numpy
+
+
+class StickHeatmap:
+    """Density grid of one stick's raw positions, shown through a streaming texture.
+
+    Counts saturate at `saturation`, so a new sample only recolours its own
+    cell; texture() re-uploads just the bounding rect of cells touched since
+    the previous upload.
+    """
+    def __init__(self, size=HEATMAP_SIZE, saturation=HEATMAP_SATURATION):
+        self.size = int(size)
+        self.saturation = float(saturation)
+        n = self.size * self.size
+        np = load_numpy()   # first heatmap (H); the array path does the same work without it
+        self.counts = np.zeros(n, dtype=np.float32) if np is not None else array('f', bytes(4 * n))
+        self.pixels = bytearray(4 * n)   # RGBA32
+        self._cpixels = (ctypes.c_ubyte * len(self.pixels)).from_buffer(self.pixels)
+        self.samples = 0
+        self.texture_ptr = None
+        self._dirty = None               # [x0, y0, x1, y1), cells not yet uploaded
+        self._live = set()               # indices of cells with a non-zero count
+
+    def _touch(self, cx, cy):
+        d = self._dirty
+        if d is None:
+            self._dirty = [cx, cy, cx + 1, cy + 1]
+        else:
+            if cx < d[0]: d[0] = cx
+            if cy < d[1]: d[1] = cy
+            if cx >= d[2]: d[2] = cx + 1
+            if cy >= d[3]: d[3] = cy + 1
+
+    def _shade(self, idx):
+        t = min(1.0, self.counts[idx] / self.saturation)
+        o = idx * 4
+        if t <= 0.0:
+            self.pixels[o:o + 4] = b'\0\0\0\0'
+        else:
+            self.pixels[o:o + 4] = bytes((int(60 + 195 * t), int(220 * t * t), int(200 * (1.0 - t)),
+                                          int(70 + 185 * t)))
+
+    def add_raw(self, xs, ys):
+        """Accumulate raw int16 stick positions (two equal-length sequences)."""
+        n = len(xs)
+        if not n:
+            return
+        size = self.size
+        self.samples += n
+        np = load_numpy()
+        if np is not None:
+            cx = (np.asarray(xs, dtype=np.int32) + 32768) * size >> 16
+            cy = (np.asarray(ys, dtype=np.int32) + 32768) * size >> 16
+            idx = cy * size + cx
+            np.add.at(self.counts, idx, 1.0)
+            cells = np.unique(idx).tolist()
+        else:
+            counts = self.counts
+            cells = set()
+            for x, y in zip(xs, ys):
+                i = ((y + 32768) * size >> 16) * size + ((x + 32768) * size >> 16)
+                counts[i] += 1.0
+                cells.add(i)
+        self._live.update(cells)
+        for i in cells:
+            self._shade(i)
+            self._touch(i % size, i // size)
+
+    def decay(self, factor=HEATMAP_DECAY):
+        """Fade the non-zero cells; only they are recoloured, and only their
+        bounding rect is re-uploaded."""
+        if not self._live:
+            return
+        counts = self.counts
+        size = self.size
+        faded = []
+        for i in self._live:
+            v = counts[i] * factor
+            if v < 0.05:
+                v = 0.0
+                faded.append(i)
+            counts[i] = v
+            self._shade(i)
+            self._touch(i % size, i // size)
+        self._live.difference_update(faded)
+
+    def reset(self):
+        if load_numpy() is not None:
+            self.counts[:] = 0.0
+        else:
+            self.counts = array('f', bytes(4 * self.size * self.size))
+        self.pixels[:] = bytes(len(self.pixels))
+        self.samples = 0
+        self._live.clear()
+        self._dirty = [0, 0, self.size, self.size]
+
+    def texture(self, renderer):
+        """Streaming texture with every pending cell uploaded, or None."""
+        if self.texture_ptr is None:
+            tex = sdl2.SDL_CreateTexture(renderer, sdl2.SDL_PIXELFORMAT_RGBA32,
+                                         sdl2.SDL_TEXTUREACCESS_STREAMING, self.size, self.size)
+            if not tex:
+                return None
+            sdl2.SDL_SetTextureBlendMode(tex, sdl2.SDL_BLENDMODE_BLEND)
+            self.texture_ptr = tex
+            self._dirty = [0, 0, self.size, self.size]
+        if self._dirty is not None:
+            self._upload(*self._dirty)
+            self._dirty = None
+        return self.texture_ptr
+
+    def _upload(self, x0, y0, x1, y1):
+        w = x1 - x0
+        rect = sdl2.SDL_Rect(x0, y0, w, y1 - y0)
+        pixels = ctypes.c_void_p()
+        pitch = ctypes.c_int()
+        if sdl2.SDL_LockTexture(self.texture_ptr, rect, ctypes.byref(pixels), ctypes.byref(pitch)) != 0:
+            return
+        base = ctypes.addressof(self._cpixels)
+        row = w * 4
+        for y in range(y0, y1):
+            ctypes.memmove(pixels.value + (y - y0) * pitch.value, base + (y * self.size + x0) * 4, row)
+        sdl2.SDL_UnlockTexture(self.texture_ptr)
+
+    def invalidate(self):
+        """Drop the texture (renderer reset); the next texture() re-uploads everything."""
+        if self.texture_ptr is not None:
+            sdl2.SDL_DestroyTexture(self.texture_ptr)
+            self.texture_ptr = None
+
+
+class HeatmapStore:
+    """Left/right stick heatmaps per controller, fed from Controller stick trails."""
+    def __init__(self):
+        self.enabled = False
+        self.decay_on = False
+        self.version = 0
+        self.maps = {}   # (instance_id, 0 left / 1 right) -> StickHeatmap
+        self._last_decay = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.version += 1
+
+    def toggle_decay(self):
+        self.decay_on = not self.decay_on
+        self.version += 1
+
+    def get(self, instance_id, side):
+        return self.maps.get((instance_id, side))
+
+    def feed(self, instance_id, trail):
+        """Accumulate a drained trail (flat raw int16 LX, LY, RX, RY, ...)."""
+        if not self.enabled or not trail:
+            return
+        for side in (0, 1):
+            hm = self.maps.get((instance_id, side))
+            if hm is None:
+                hm = self.maps[(instance_id, side)] = StickHeatmap()
+            hm.add_raw(trail[2 * side::4], trail[2 * side + 1::4])
+        self.version += 1
+
+    def tick(self, now):
+        """Apply decay once per second while enabled (now in seconds)."""
+        if not (self.enabled and self.decay_on) or now - self._last_decay < 1.0:
+            return
+        self._last_decay = now
+        for hm in self.maps.values():
+            hm.decay()
+        self.version += 1
+
+    def reset(self):
+        for hm in self.maps.values():
+            hm.reset()
+        self.version += 1
+
+    def prune(self, live_ids):
+        for key in [k for k in self.maps if k[0] not in live_ids]:
+            self.maps.pop(key).invalidate()
+
+    def invalidate(self):
+        for hm in self.maps.values():
+            hm.invalidate()
@@ -1,7 +1,29 @@
+import ctypes
+from array import array
+from collections.abc import Mapping
 
-import time
 import sdl2
 
+from config import INPUT_EVENT_DRIVEN, INPUT_RESYNC_MS, STICK_TRAIL_MAX, RAW_JOYSTICKS
+from resolution import AxisLevels
+
+N_AXES = sdl2.SDL_CONTROLLER_AXIS_MAX  # LX, LY, RX, RY, LT, RT
+N_STICK_AXES = 4                       # LX, LY, RX, RY come first
+
+
+def button_name(btn: int) -> str:
+    name = sdl2.SDL_GameControllerGetStringForButton(btn)
+    if isinstance(name, (bytes, bytearray)) and name:
+        return name.decode('utf-8').upper()
+    return f"B{btn}"
+
+
+def axis_name(axis: int) -> str:
+    name = sdl2.SDL_GameControllerGetStringForAxis(axis)
+    if isinstance(name, (bytes, bytearray)) and name:
+        return name.decode('utf-8').upper()
+    return f"AX{axis}"
+
 # Normalize signed 16-bit to [-1.0, 1.0]
 def _norm(value: int) -> float:
     if value < 0:
@@ -9,71 +31,225 @@ def _norm(value: int) -> float:
     return min(1.0, value / 32767.0)
 
 
+# _norm for every int16, indexed by raw + 32768: one lookup per sample.
+# Built by norm_lut() for the first Controller, not at import (65536 floats
+# cost more than the rest of the module on a slow handheld)
+NORM_LUT = None
+
+
+def norm_lut():
+    global NORM_LUT
+    if NORM_LUT is None:
+        lut = array('f', [v / 32768.0 for v in range(-32768, 0)])
+        lut.extend([v / 32767.0 for v in range(32768)])
+        NORM_LUT = lut
+    return NORM_LUT
+
+
+def _guid_string(joy) -> str:
+    buf = ctypes.create_string_buffer(33)
+    sdl2.SDL_JoystickGetGUIDString(sdl2.SDL_JoystickGetGUID(joy), buf, len(buf))
+    return buf.value.decode('ascii')
+
+
+class _ButtonView(Mapping):
+    """Read-only {btn: 0/1} view of a button bitmask attribute."""
+    __slots__ = ('_dev', '_attr')
+    def __init__(self, dev, attr):
+        self._dev = dev
+        self._attr = attr
+    def __getitem__(self, btn):
+        if not 0 <= btn < self._dev.n_buttons:
+            raise KeyError(btn)
+        return getattr(self._dev, self._attr) >> btn & 1
+    def get(self, btn, default=0):
+        if not 0 <= btn < self._dev.n_buttons:
+            return default
+        return getattr(self._dev, self._attr) >> btn & 1
+    def __iter__(self):
+        return iter(range(self._dev.n_buttons))
+    def __len__(self):
+        return self._dev.n_buttons
+
+
+class _AxisView(Mapping):
+    """Read-only {axis: value} view of an axis array attribute."""
+    __slots__ = ('_dev', '_attr')
+    def __init__(self, dev, attr):
+        self._dev = dev
+        self._attr = attr
+    def __getitem__(self, axis):
+        values = getattr(self._dev, self._attr)
+        if not 0 <= axis < len(values):
+            raise KeyError(axis)
+        return values[axis]
+    def get(self, axis, default=0.0):
+        values = getattr(self._dev, self._attr)
+        if not 0 <= axis < len(values):
+            return default
+        return values[axis]
+    def __iter__(self):
+        return iter(range(len(getattr(self._dev, self._attr))))
+    def __len__(self):
+        return len(getattr(self._dev, self._attr))
+
+
 class Controller:
-    def __init__(self, ctrl_ptr, instance_id: int, name: str):
+    """Compact controller state.
+
+    Buttons are one int bitmask (plus the previous frame's), so edges are
+    cur ^ prev. Axes are raw int16 values in an array('h') with normalized
+    copies in array('f'). buttons/axes/prev_* are read-only mapping views
+    for callers that use dev.buttons.get(btn, 0) / dev.axes.get(axis, 0.0).
+    Every stick sample is also appended to `trail` (flat raw LX, LY, RX, RY)
+    until a consumer takes it with drain_trail(), and every raw axis value
+    seen is recorded in `levels` (resolution.AxisLevels per axis).
+    """
+    __slots__ = ('ctrl', 'instance_id', 'name', 'guid', 'n_buttons',
+                 'mask', 'prev_mask', '_latched_mask',
+                 'raw', 'norm', 'prev_norm', '_latched_norm',
+                 'buttons', 'prev_buttons', 'axes', 'prev_axes',
+                 'down_time', '_edge_buf', 'version', 'trail', 'levels', 'recorder')
+
+    def __init__(self, ctrl_ptr, instance_id: int, name: str, guid: str = ""):
         self.ctrl = ctrl_ptr
         self.instance_id = instance_id
         self.name = name
+        self.guid = guid
 
-        # Axes and buttons snapshots
-        self.axes = {
-            sdl2.SDL_CONTROLLER_AXIS_LEFTX: 0.0,
-            sdl2.SDL_CONTROLLER_AXIS_LEFTY: 0.0,
-            sdl2.SDL_CONTROLLER_AXIS_RIGHTX: 0.0,
-            sdl2.SDL_CONTROLLER_AXIS_RIGHTY: 0.0,
-            sdl2.SDL_CONTROLLER_AXIS_TRIGGERLEFT: 0.0,
-            sdl2.SDL_CONTROLLER_AXIS_TRIGGERRIGHT: 0.0,
-        }
-        self.prev_axes = dict(self.axes)
+        # SDL_CONTROLLER_AXIS_* are 0..5, so the axis id is the array index
+        self.n_buttons = sdl2.SDL_CONTROLLER_BUTTON_MAX
+        self.mask = 0
+        self.prev_mask = 0
+        self._latched_mask = 0   # mask at the last latch(); becomes prev_mask at the next
+        norm_lut()   # set_axis() indexes NORM_LUT
+        self.raw = array('h', bytes(2 * N_AXES))
+        self.norm = array('f', bytes(4 * N_AXES))
+        self.prev_norm = array('f', self.norm)
+        self._latched_norm = array('f', self.norm)
 
-        self.buttons = {btn: 0 for btn in range(sdl2.SDL_CONTROLLER_BUTTON_MAX)}
-        self.prev_buttons = dict(self.buttons)
+        self.buttons = _ButtonView(self, 'mask')
+        self.prev_buttons = _ButtonView(self, 'prev_mask')
+        self.axes = _AxisView(self, 'norm')
+        self.prev_axes = _AxisView(self, 'prev_norm')
 
         self.down_time = {}   # btn -> t when pressed
-        self._edge_buf = []   # list of (btn, pressed: bool)
-
-    def update(self):
-        """Poll current states and compute edges."""
-        # Buttons
-        for btn in range(sdl2.SDL_CONTROLLER_BUTTON_MAX):
-            cur = sdl2.SDL_GameControllerGetButton(self.ctrl, btn)
-            cur = 1 if cur else 0
-            prev = self.buttons.get(btn, 0)
-            if cur != prev:
-                # edge
-                self._edge_buf.append((btn, cur == 1))
-                if cur == 1:
-                    self.down_time[btn] = time.time()
-                else:
-                    self.down_time.pop(btn, None)
-            self.prev_buttons[btn] = prev
-            self.buttons[btn] = cur
-
-        # Axes
-        for axis in list(self.axes.keys()):
-            raw = sdl2.SDL_GameControllerGetAxis(self.ctrl, axis)
-            self.prev_axes[axis] = self.axes.get(axis, 0.0)
-            self.axes[axis] = _norm(int(raw))
+        self._edge_buf = []   # list of (btn, pressed: bool, t)
+        self.version = 0      # bumped whenever any button/axis value changes
+        self.trail = array('h')
+        self.levels = [AxisLevels() for _ in range(N_AXES)]
+        self.recorder = None  # session.SessionRecorder seeing every state change
+
+    def set_button(self, btn: int, pressed: bool, t: float) -> bool:
+        """Apply one button state at time t (seconds, SDL tick clock)."""
+        if not 0 <= btn < self.n_buttons:
+            return False
+        bit = 1 << btn
+        mask = (self.mask | bit) if pressed else (self.mask & ~bit)
+        return self.set_buttons(mask, t)
+
+    def set_buttons(self, mask: int, t: float) -> bool:
+        """Apply a full button bitmask at time t; edges are mask ^ current."""
+        diff = mask ^ self.mask
+        if not diff:
+            return False
+        self.mask = mask
+        while diff:
+            low = diff & -diff
+            btn = low.bit_length() - 1
+            pressed = bool(mask & low)
+            self._edge_buf.append((btn, pressed, t))
+            if self.recorder is not None:
+                self.recorder.button(self.instance_id, btn, pressed)
+            if pressed:
+                self.down_time[btn] = t
+            else:
+                self.down_time.pop(btn, None)
+            diff ^= low
+        self.version += 1
+        return True
+
+    def set_axis(self, axis: int, raw: int, track=True) -> bool:
+        """Apply one raw int16 axis value; stick changes go to the trail unless track=False."""
+        if not 0 <= axis < N_AXES:
+            return False
+        self.levels[axis].add(raw)
+        if self.raw[axis] == raw:
+            return False
+        self.raw[axis] = raw
+        self.norm[axis] = NORM_LUT[raw + 32768]
+        self.version += 1
+        if self.recorder is not None:
+            self.recorder.axis(self.instance_id, axis, raw)
+        if track and axis < N_STICK_AXES:
+            self.push_stick(*self.raw[:N_STICK_AXES])
+        return True
+
+    def push_stick(self, lx, ly, rx, ry):
+        """Append one stick sample to the trail. An undrained trail grows to
+        2 * STICK_TRAIL_MAX samples and is then cut back to the newest
+        STICK_TRAIL_MAX in one slice, instead of trimming on every append."""
+        trail = self.trail
+        trail.extend((lx, ly, rx, ry))
+        if len(trail) > 8 * STICK_TRAIL_MAX:
+            del trail[:len(trail) - 4 * STICK_TRAIL_MAX]
+
+    def drain_trail(self):
+        """Return and clear the stick samples since the last drain."""
+        out = self.trail
+        self.trail = array('h')
+        return out
+
+    def latch(self):
+        """Start a new frame: the state at the previous latch becomes prev_*."""
+        self.prev_mask = self._latched_mask
+        self._latched_mask = self.mask
+        self.prev_norm[:] = self._latched_norm
+        self._latched_norm[:] = self.norm
+
+    def poll(self) -> bool:
+        """Read every button and axis from SDL. Returns True if anything changed."""
+        ctrl = self.ctrl
+        if not ctrl:
+            return False   # fed by a backend (evdev, session replay): nothing to poll
+        get_button = sdl2.SDL_GameControllerGetButton
+        mask = 0
+        for btn in range(self.n_buttons):
+            if get_button(ctrl, btn):
+                mask |= 1 << btn
+        changed = self.set_buttons(mask, sdl2.SDL_GetTicks() / 1000.0)
+        get_axis = sdl2.SDL_GameControllerGetAxis
+        stick_moved = False
+        for axis in range(N_AXES):
+            if self.set_axis(axis, get_axis(ctrl, axis), track=False):
+                changed = True
+                stick_moved = stick_moved or axis < N_STICK_AXES
+        if stick_moved:
+            self.push_stick(*self.raw[:N_STICK_AXES])
+        return changed
+
+    def update(self) -> bool:
+        """Poll current states and compute edges. Returns True if anything changed."""
+        self.latch()
+        return self.poll()
 
     def button_edges(self):
-        """Return and clear edge buffer as [(btn, pressed_bool), ...]."""
+        """Return and clear edge buffer as [(btn, pressed_bool, t), ...]."""
         out = self._edge_buf[:]
         self._edge_buf.clear()
         return out
 
     def diffs(self, axis_step=0.2):
         """Return axis change events above threshold [(axis, prev, cur), ...]."""
-        events = []
-        for axis, cur in self.axes.items():
-            prev = self.prev_axes.get(axis, 0.0)
-            if abs(cur - prev) >= float(axis_step):
-                events.append((axis, prev, cur))
-        return events
+        step = float(axis_step)
+        prev = self.prev_norm
+        return [(axis, prev[axis], cur) for axis, cur in enumerate(self.norm)
+                if abs(cur - prev[axis]) >= step]
 
     def combo_exit_pressed(self, window_ms=200) -> bool:
         back = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_BACK', 4)
         start = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_START', 6)
-        if self.buttons.get(back, 0) == 1 and self.buttons.get(start, 0) == 1:
+        if self.mask >> back & 1 and self.mask >> start & 1:
             t_back = self.down_time.get(back)
             t_start = self.down_time.get(start)
             if t_back is None or t_start is None:
@@ -83,13 +259,132 @@ class Controller:
 
     def close(self):
         if self.ctrl:
-            sdl2.SDL_GameControllerClose(self.ctrl)
-            self.ctrl = None
+            # Under the joystick lock so a sampler thread never sees a closed handle
+            sdl2.SDL_LockJoysticks()
+            try:
+                sdl2.SDL_GameControllerClose(self.ctrl)
+                self.ctrl = None
+            finally:
+                sdl2.SDL_UnlockJoysticks()
+
+
+class RawJoystick:
+    """A joystick SDL has no GameController mapping for, kept as raw state.
+
+    Sized from SDL once when opened and read in full once; after that only
+    SDL_JOY* events update it, so a device with 128 buttons costs no ctypes
+    calls per frame. Buttons are one int bitmask, axes an int16 array, hats
+    their SDL_HAT_* bits and balls the relative motion summed since open.
+    Without an SDL handle (joy=None, a replayed device) the counts come
+    from `shape` = (axes, buttons, hats, balls).
+    """
+    __slots__ = ('joy', 'instance_id', 'name', 'guid', 'n_axes', 'n_buttons', 'n_hats', 'n_balls',
+                 'mask', 'axes', 'hats', 'balls', 'version', 'recorder')
+
+    def __init__(self, joy, instance_id: int, name: str, guid: str = "", shape=None):
+        self.joy = joy
+        self.instance_id = instance_id
+        self.name = name
+        self.guid = guid
+        if joy:
+            shape = (sdl2.SDL_JoystickNumAxes(joy), sdl2.SDL_JoystickNumButtons(joy),
+                     sdl2.SDL_JoystickNumHats(joy), sdl2.SDL_JoystickNumBalls(joy))
+        self.n_axes, self.n_buttons, self.n_hats, self.n_balls = (max(0, int(n)) for n in shape)
+        self.mask = 0
+        self.axes = array('h', bytes(2 * self.n_axes))
+        self.hats = bytearray(self.n_hats)
+        self.balls = array('i', bytes(8 * self.n_balls))   # dx, dy per ball
+        self.version = 0
+        self.recorder = None   # SessionRecorder, set by DeviceManager while recording
+        if joy:
+            self.sync()
+
+    @property
+    def shape(self):
+        return (self.n_axes, self.n_buttons, self.n_hats, self.n_balls)
+
+    def sync(self):
+        """Read every button, axis and hat once (on open)."""
+        joy = self.joy
+        mask = 0
+        for btn in range(self.n_buttons):
+            if sdl2.SDL_JoystickGetButton(joy, btn):
+                mask |= 1 << btn
+        self.mask = mask
+        for axis in range(self.n_axes):
+            self.axes[axis] = sdl2.SDL_JoystickGetAxis(joy, axis)
+        for hat in range(self.n_hats):
+            self.hats[hat] = sdl2.SDL_JoystickGetHat(joy, hat) & 0x0f
+        self.version += 1
+
+    def set_button(self, btn: int, pressed: bool) -> bool:
+        if not 0 <= btn < self.n_buttons:
+            return False
+        bit = 1 << btn
+        mask = (self.mask | bit) if pressed else (self.mask & ~bit)
+        if mask == self.mask:
+            return False
+        self.mask = mask
+        self.version += 1
+        if self.recorder is not None:
+            self.recorder.button(self.instance_id, btn, pressed)
+        return True
+
+    def set_axis(self, axis: int, value: int) -> bool:
+        if not 0 <= axis < self.n_axes or self.axes[axis] == value:
+            return False
+        self.axes[axis] = value
+        self.version += 1
+        if self.recorder is not None:
+            self.recorder.axis(self.instance_id, axis, value)
+        return True
+
+    def set_hat(self, hat: int, value: int) -> bool:
+        if not 0 <= hat < self.n_hats or self.hats[hat] == value & 0x0f:
+            return False
+        self.hats[hat] = value & 0x0f
+        self.version += 1
+        if self.recorder is not None:
+            self.recorder.hat(self.instance_id, hat, value & 0x0f)
+        return True
+
+    def move_ball(self, ball: int, dx: int, dy: int) -> bool:
+        if not 0 <= ball < self.n_balls or not (dx or dy):
+            return False
+        self.balls[2*ball] += dx
+        self.balls[2*ball + 1] += dy
+        self.version += 1
+        if self.recorder is not None:
+            self.recorder.ball(self.instance_id, ball, dx, dy)
+        return True
+
+    def close(self):
+        if self.joy:
+            sdl2.SDL_JoystickClose(self.joy)
+            self.joy = None
 
 
 class DeviceManager:
-    def __init__(self):
+    """Open game controllers and keep their state current.
+
+    In event-driven mode state comes from SDL_CONTROLLER* events fed through
+    handle_event(); a full poll of every device still runs every
+    resync_ms as a fallback. Otherwise every device is polled each frame.
+    With a running sampler attached, its samples replace both.
+    Joysticks without a GameController mapping are kept apart in
+    `joysticks` as RawJoystick, fed only by SDL_JOY* events.
+    """
+    def __init__(self, event_driven=INPUT_EVENT_DRIVEN, resync_ms=INPUT_RESYNC_MS):
         self.devices = {}  # instance_id -> Controller
+        self.joysticks = {}  # instance_id -> RawJoystick (unmapped devices)
+        self.sampler = None  # optional sampler.InputSampler feeding state instead
+        self.backends = []   # extra sources with poll() feeding virtual controllers (evdev, replay)
+        self.recorder = None  # optional session.SessionRecorder, see set_recorder()
+        self.state_version = 0  # bumped on hotplug and on any device state change
+        self.event_driven = bool(event_driven)
+        self.resync_ms = int(resync_ms)
+        self._last_resync = None
+        self._next_virtual_id = -1
         self.initial_scan()
 
     def initial_scan(self):
@@ -97,8 +392,14 @@ class DeviceManager:
         for i in range(n):
             if sdl2.SDL_IsGameController(i):
                 self.add_by_index(i)
+            else:
+                self.add_joystick_by_index(i)
 
     def add_by_index(self, device_index: int):
+        """Open a game controller, unless it is already open (the initial scan
+        and its SDL_CONTROLLERDEVICEADDED event both name it)."""
+        if sdl2.SDL_JoystickGetDeviceInstanceID(device_index) in self.devices:
+            return
         ctrl = sdl2.SDL_GameControllerOpen(device_index)
         if not ctrl:
             return
@@ -106,29 +407,166 @@ class DeviceManager:
         instance_id = sdl2.SDL_JoystickInstanceID(joy)
         name = sdl2.SDL_GameControllerName(ctrl)
         name = name.decode('utf-8') if isinstance(name, (bytes, bytearray)) else str(name)
-        self.devices[instance_id] = Controller(ctrl, instance_id, name)
+        self._add(Controller(ctrl, instance_id, name, _guid_string(joy)))
+
+    def add_joystick_by_index(self, device_index: int) -> bool:
+        """Open an unmapped joystick raw; False for game controllers and ones already open."""
+        if not RAW_JOYSTICKS or sdl2.SDL_IsGameController(device_index):
+            return False
+        if sdl2.SDL_JoystickGetDeviceInstanceID(device_index) in self.joysticks:
+            return False
+        joy = sdl2.SDL_JoystickOpen(device_index)
+        if not joy:
+            return False
+        name = sdl2.SDL_JoystickName(joy)
+        name = name.decode('utf-8', 'replace') if isinstance(name, (bytes, bytearray)) else str(name)
+        instance_id = sdl2.SDL_JoystickInstanceID(joy)
+        self._add_joystick(RawJoystick(joy, instance_id, name, _guid_string(joy)))
+        return True
+
+    def add_virtual_joystick(self, name: str, guid: str, shape) -> RawJoystick:
+        """A raw joystick without an SDL handle (replay), with a negative instance id."""
+        instance_id = self._next_virtual_id
+        self._next_virtual_id -= 1
+        return self._add_joystick(RawJoystick(None, instance_id, name, guid, shape))
+
+    def _add_joystick(self, joy):
+        self.joysticks[joy.instance_id] = joy
+        joy.recorder = self.recorder
+        if self.recorder is not None:
+            self.recorder.added(joy)
+        self.state_version += 1
+        return joy
+
+    def remove_joystick(self, instance_id: int):
+        joy = self.joysticks.pop(instance_id, None)
+        if joy:
+            joy.close()
+            if self.recorder is not None:
+                self.recorder.removed(instance_id)
+            self.state_version += 1
+
+    def handle_joy_event(self, event) -> bool:
+        """Apply an SDL_JOY* event to its RawJoystick. Returns True if state changed;
+        events of mapped controllers (not in `joysticks`) are ignored."""
+        etype = event.type
+        if etype == sdl2.SDL_JOYAXISMOTION:
+            ev = event.jaxis
+            joy = self.joysticks.get(ev.which)
+            changed = joy is not None and joy.set_axis(ev.axis, ev.value)
+        elif etype in (sdl2.SDL_JOYBUTTONDOWN, sdl2.SDL_JOYBUTTONUP):
+            ev = event.jbutton
+            joy = self.joysticks.get(ev.which)
+            changed = joy is not None and joy.set_button(ev.button, etype == sdl2.SDL_JOYBUTTONDOWN)
+        elif etype == sdl2.SDL_JOYHATMOTION:
+            ev = event.jhat
+            joy = self.joysticks.get(ev.which)
+            changed = joy is not None and joy.set_hat(ev.hat, ev.value)
+        elif etype == sdl2.SDL_JOYBALLMOTION:
+            ev = event.jball
+            joy = self.joysticks.get(ev.which)
+            changed = joy is not None and joy.move_ball(ev.ball, ev.xrel, ev.yrel)
+        else:
+            return False
+        if changed:
+            self.state_version += 1
+        return changed
+
+    def add_virtual(self, name: str, guid: str = "") -> Controller:
+        """A controller without an SDL handle, fed by a backend. Virtual
+        controllers get negative instance ids so they never collide with SDL's."""
+        instance_id = self._next_virtual_id
+        self._next_virtual_id -= 1
+        return self._add(Controller(None, instance_id, name, guid))
+
+    def _add(self, dev):
+        self.devices[dev.instance_id] = dev
+        dev.recorder = self.recorder
+        if self.recorder is not None:
+            self.recorder.added(dev)
+        self.state_version += 1
+        return dev
 
     def remove_by_instance_id(self, instance_id: int):
         dev = self.devices.pop(instance_id, None)
         if dev:
             dev.close()
+            if self.recorder is not None:
+                self.recorder.removed(instance_id)
+            self.state_version += 1
+
+    def set_recorder(self, recorder):
+        """Attach (or with None detach) a recorder to every current and future device."""
+        self.recorder = recorder
+        for dev in self.devices.values():
+            dev.recorder = recorder
+        for joy in self.joysticks.values():
+            joy.recorder = recorder
+
+    def handle_event(self, event) -> bool:
+        """Apply a controller button/axis event. Returns True if it was consumed."""
+        if not self.event_driven:
+            return False
+        etype = event.type
+        if self.sampler is not None and self.sampler.running:
+            return etype in (sdl2.SDL_CONTROLLERBUTTONDOWN, sdl2.SDL_CONTROLLERBUTTONUP,
+                             sdl2.SDL_CONTROLLERAXISMOTION)
+        if etype in (sdl2.SDL_CONTROLLERBUTTONDOWN, sdl2.SDL_CONTROLLERBUTTONUP):
+            ev = event.cbutton
+            dev = self.devices.get(ev.which)
+            if dev and dev.set_button(ev.button, etype == sdl2.SDL_CONTROLLERBUTTONDOWN,
+                                      ev.timestamp / 1000.0):
+                self.state_version += 1
+            return True
+        if etype == sdl2.SDL_CONTROLLERAXISMOTION:
+            ev = event.caxis
+            dev = self.devices.get(ev.which)
+            if dev and dev.set_axis(ev.axis, ev.value):
+                self.state_version += 1
+            return True
+        return False
 
     def update_states(self):
-        # Hotplug handling via events is optional; here we just poll existing devices
+        """Start a new frame; poll devices if not event-driven or a resync is due."""
+        if self.sampler is not None and self.sampler.running:
+            for dev in list(self.devices.values()):
+                dev.latch()
+            if self.sampler.apply(self):
+                self.state_version += 1
+            self._poll_backends()
+            return
+        now = sdl2.SDL_GetTicks()
+        resync = (not self.event_driven or self._last_resync is None
+                  or now - self._last_resync >= self.resync_ms)
+        if resync:
+            self._last_resync = now
         for dev in list(self.devices.values()):
-            dev.update()
+            dev.latch()
+            if resync and dev.poll():
+                self.state_version += 1
+        self._poll_backends()
+
+    def _poll_backends(self):
+        for backend in self.backends:
+            if backend.poll():
+                self.state_version += 1
+        if self.recorder is not None:
+            self.recorder.frame()
 
     def diff_events(self, axis_step=0.2):
+        """Axis changes above threshold as [(instance_id, axis, prev, cur), ...]."""
         out = []
-        for dev in self.devices.values():
-            out.extend(dev.diffs(axis_step=axis_step))
+        for iid, dev in self.devices.items():
+            for axis, prev, cur in dev.diffs(axis_step=axis_step):
+                out.append((iid, axis, prev, cur))
         return out
 
     def button_edges(self):
+        """Drain edges of all devices as [(instance_id, btn, pressed, t), ...]."""
         out = []
         for iid, dev in self.devices.items():
-            for btn, pressed in dev.button_edges():
-                out.append((iid, btn, pressed))
+            for btn, pressed, t in dev.button_edges():
+                out.append((iid, btn, pressed, t))
         return out
 
     def check_combo_exit(self, window_ms=200) -> bool:
@@ -0,0 +1,99 @@
+import csv
+import time
+from pathlib import Path
+
+from config import LATENCY_MAX_MS, LOG_DIR
+from input_device import button_name
+
+
+class LatencyHistogram:
+    """1 ms buckets from 0 to max_ms; the last bucket collects everything above."""
+    def __init__(self, max_ms=LATENCY_MAX_MS):
+        self.max_ms = int(max_ms)
+        self.counts = [0] * (self.max_ms + 2)
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, ms: int):
+        ms = max(0, int(round(ms)))
+        self.counts[min(ms, self.max_ms + 1)] += 1
+        self.count += 1
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentile(self, p: float):
+        if not self.count:
+            return None
+        rank = max(1, int(round(self.count * p / 100.0)))
+        seen = 0
+        for ms, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return ms
+        return self.max_ms + 1
+
+
+class LatencyTracker:
+    """Input-to-photon latency per button.
+
+    on_edge() records the SDL event timestamp of a button edge; the next
+    on_present() (time the SDL_RenderPresent that first shows it returned)
+    closes every pending edge. Both take milliseconds on the SDL tick clock,
+    so synthetic values can be fed without a window or a controller.
+    """
+    def __init__(self, max_ms=LATENCY_MAX_MS):
+        self.max_ms = int(max_ms)
+        self.enabled = False
+        self.version = 0
+        self.hist = {}       # btn -> LatencyHistogram
+        self._pending = []   # [(btn, t_event_ms), ...]
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._pending.clear()
+        self.version += 1
+
+    def on_edge(self, instance_id: int, btn: int, pressed: bool, t_ms: float):
+        if self.enabled:
+            self._pending.append((btn, t_ms))
+
+    def on_present(self, t_ms: float):
+        if not self._pending:
+            return
+        for btn, t_event in self._pending:
+            hist = self.hist.get(btn)
+            if hist is None:
+                hist = self.hist[btn] = LatencyHistogram(self.max_ms)
+            hist.add(t_ms - t_event)
+        self._pending.clear()
+        self.version += 1
+
+    def reset(self):
+        self.hist.clear()
+        self._pending.clear()
+        self.version += 1
+
+    def summary(self):
+        """[(btn, count, min, p50, p95, p99, max), ...] sorted by button."""
+        rows = []
+        for btn in sorted(self.hist):
+            h = self.hist[btn]
+            rows.append((btn, h.count, h.min, h.percentile(50),
+                         h.percentile(95), h.percentile(99), h.max))
+        return rows
+
+    def export_csv(self, directory=LOG_DIR):
+        """Write the per-button summary to logs/latency-<time>.csv; returns the path."""
+        rows = self.summary()
+        if not rows:
+            return None
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / time.strftime("latency-%Y%m%d-%H%M%S.csv")
+        with open(path, 'w', newline='') as f:
+            w = csv.writer(f)
+            w.writerow(['button', 'name', 'count', 'min_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+            for btn, n, mn, p50, p95, p99, mx in rows:
+                w.writerow([btn, button_name(btn), n, mn, p50, p95, p99, mx])
+        return path
@@ -0,0 +1,260 @@
+import json
+import math
+from collections import namedtuple
+from pathlib import Path
+
+import sdl2
+
+from config import PAD, PANEL_ACCENT, LAYOUT_DIR, LAYOUT_DEFAULT, LAYOUT_CACHE_SIZE
+
+KINDS = ('frame', 'dpad', 'button', 'pill', 'trigger_bar', 'stick')
+
+# One compiled display-list entry. Fields a kind does not use are None:
+#   frame        rect, style=color
+#   dpad         rect=hub, parts=((arm rect, button, arrow triangle), ...)
+#   button       cx, cy, r, label, button, style=(color on, color off)
+#   pill         rect, cx, cy, label, and button or a trigger axis
+#   trigger_bar  rect, axis
+#   stick        cx, cy, r, axis=(x axis, y axis)
+# RawLayout kinds (cx, cy place the label):
+#   raw_axis     rect (bar), cx, cy, label, axis index
+#   raw_hat      rect=hub, cx, cy, label, axis=hat index, parts as dpad with hat bit numbers
+#   raw_ball     rect, cx, cy, label, axis=ball index
+#   raw_button   rect, cx, cy (cell center), label, button index
+Widget = namedtuple('Widget', 'kind rect cx cy r label button axis style parts')
+
+
+def _button(name):
+    return getattr(sdl2, 'SDL_CONTROLLER_BUTTON_' + name.upper())
+
+
+def _axis(name):
+    return getattr(sdl2, 'SDL_CONTROLLER_AXIS_' + name.upper())
+
+
+def dpad_geometry(cx, cy, size):
+    """Hub rect and the four (arm rect, button, arrow triangle) of a D-pad."""
+    arm = size // 3
+    gap = max(8, size // 8)  # increased spacing between D-Pad buttons
+    up_r = sdl2.SDL_Rect(cx - arm//2, cy - gap - arm, arm, arm)
+    down_r = sdl2.SDL_Rect(cx - arm//2, cy + gap, arm, arm)
+    left_r = sdl2.SDL_Rect(cx - gap - arm, cy - arm//2, arm, arm)
+    right_r = sdl2.SDL_Rect(cx + gap, cy - arm//2, arm, arm)
+    hub_r = sdl2.SDL_Rect(cx - arm//2, cy - arm//2, arm, arm)
+    m = 4
+    arms = (
+        (up_r, _button('dpad_up'),
+         ((up_r.x + up_r.w//2, up_r.y + m), (up_r.x + m, up_r.y + up_r.h - m),
+          (up_r.x + up_r.w - m, up_r.y + up_r.h - m))),
+        (down_r, _button('dpad_down'),
+         ((down_r.x + down_r.w//2, down_r.y + down_r.h - m), (down_r.x + m, down_r.y + m),
+          (down_r.x + down_r.w - m, down_r.y + m))),
+        (left_r, _button('dpad_left'),
+         ((left_r.x + m, left_r.y + left_r.h//2), (left_r.x + left_r.w - m, left_r.y + m),
+          (left_r.x + left_r.w - m, left_r.y + left_r.h - m))),
+        (right_r, _button('dpad_right'),
+         ((right_r.x + right_r.w - m, right_r.y + right_r.h//2), (right_r.x + m, right_r.y + m),
+          (right_r.x + m, right_r.y + right_r.h - m))),
+    )
+    return hub_r, arms
+
+
+# D-pad arm button -> bit number of its SDL_HAT_* direction
+_HAT_BITS = {_button('dpad_up'): 0, _button('dpad_right'): 1,
+             _button('dpad_down'): 2, _button('dpad_left'): 3}
+
+
+class Layout:
+    """A controller layout described in layouts/<name>.json.
+
+    Widgets are placed in the panel rect (x0, y0, w, h): "center" is a
+    fraction of w and h, sizes and radii are fractions of min(w, h) with
+    an optional pixel "min". A button "offset" moves it by multiples of
+    its radius. Pills may instead sit on the top "edge" ("left"/"right",
+    counted from the corner by "slot"), or "under" another widget's id,
+    "gap" pixels below it; a trigger_bar under a pill takes its width.
+    compile() turns that into a tuple of Widget entries once per rect.
+    """
+    def __init__(self, name, spec):
+        self.name = name
+        self.match = [m.lower() for m in spec.get('match', [])]
+        self.widgets = spec['widgets']
+        for wd in self.widgets:
+            if wd.get('kind') not in KINDS:
+                raise ValueError(f"layout {name}: unknown widget kind {wd.get('kind')!r}")
+        self._compiled = {}
+
+    def matches(self, dev):
+        name = (dev.name or '').lower()
+        guid = (dev.guid or '').lower()
+        return any(m in name or m == guid for m in self.match)
+
+    def compile(self, x0, y0, w, h):
+        """Display list for the panel rect, cached per rect."""
+        key = (x0, y0, w, h)
+        out = self._compiled.get(key)
+        if out is None:
+            if len(self._compiled) >= LAYOUT_CACHE_SIZE:
+                self._compiled.clear()
+            out = self._compiled[key] = self._compile(x0, y0, w, h)
+        return out
+
+    def _compile(self, x0, y0, w, h):
+        base = min(w, h)
+        out = []
+        anchors = {}   # id -> (cx, cy, half height, width)
+        for wd in self.widgets:
+            kind = wd['kind']
+            if kind == 'frame':
+                out.append(Widget(kind, sdl2.SDL_Rect(x0 + PAD, y0 + PAD, w - PAD*2, h - PAD*2),
+                                  None, None, None, None, None, None, tuple(wd['color']), None))
+                continue
+            cx = cy = None
+            if 'center' in wd:
+                cx = x0 + int(w * wd['center'][0])
+                cy = int(y0 + h * wd['center'][1])
+            if kind == 'dpad':
+                hub, arms = dpad_geometry(cx, cy, int(base * wd['size']))
+                out.append(Widget(kind, hub, cx, cy, None, None, None, None, None, arms))
+            elif kind == 'button':
+                r = int(base * wd['radius'])
+                ox, oy = wd.get('offset', (0.0, 0.0))
+                cx += int(r * ox)
+                cy += int(r * oy)
+                out.append(Widget(kind, None, cx, cy, r, wd['label'], _button(wd['button']), None,
+                                  (tuple(wd['on']), tuple(wd['off'])), None))
+                anchors[wd.get('id')] = (cx, cy, r, 2 * r)
+            elif kind == 'stick':
+                r = int(base * wd['radius'])
+                ax, ay = wd['axes']
+                out.append(Widget(kind, None, cx, cy, r, None, None, (_axis(ax), _axis(ay)), None, None))
+                anchors[wd.get('id')] = (cx, cy, r, 2 * r)
+            elif kind == 'pill':
+                mw, mh = wd.get('min', (0, 0))
+                pw = max(mw, int(base * wd['size'][0]))
+                ph = max(mh, int(base * wd['size'][1]))
+                if 'edge' in wd:
+                    cy = y0 + PAD + ph//2 + 6
+                    step = wd.get('slot', 0) * (pw + 10)
+                    if wd['edge'] == 'left':
+                        cx = x0 + PAD + pw//2 + 8 + step
+                    else:
+                        cx = x0 + w - PAD - pw//2 - 8 - step
+                elif 'under' in wd:
+                    ref = anchors[wd['under']]
+                    cx, cy = ref[0], ref[1] + ref[2] + wd.get('gap', 0)
+                rect = sdl2.SDL_Rect(cx - pw//2, cy - ph//2, pw, ph)
+                out.append(Widget(kind, rect, cx, cy, None, wd['label'],
+                                  _button(wd['button']) if 'button' in wd else None,
+                                  _axis(wd['axis']) if 'axis' in wd else None, None, None))
+                anchors[wd.get('id')] = (cx, cy, ph//2, pw)
+            elif kind == 'trigger_bar':
+                cx, cy, half, bw = anchors[wd['under']]
+                bh = max(4, half // 2)
+                rect = sdl2.SDL_Rect(cx - bw//2, cy + half + wd.get('gap', 0), bw, bh)
+                out.append(Widget(kind, rect, None, None, None, None, None, _axis(wd['axis']), None, None))
+        return tuple(out)
+
+
+class LayoutSet:
+    """Every layout in LAYOUT_DIR; devices get the first one whose "match"
+    strings occur in their name (or equal their GUID), else the default."""
+    def __init__(self, directory=LAYOUT_DIR, default=LAYOUT_DEFAULT):
+        self.layouts = {}
+        for path in sorted(Path(directory).glob('*.json')):
+            spec = json.loads(path.read_text())
+            self.layouts[path.stem] = Layout(spec.get('name', path.stem), spec)
+        if default not in self.layouts:
+            raise FileNotFoundError(f"layout {default!r} not found in {directory}")
+        self.default = self.layouts[default]
+        self._by_device = {}
+
+    def for_device(self, dev):
+        key = (dev.guid, dev.name)
+        layout = self._by_device.get(key)
+        if layout is None:
+            layout = next((lo for lo in self.layouts.values()
+                           if lo is not self.default and lo.matches(dev)), self.default)
+            self._by_device[key] = layout
+        return layout
+
+
+class RawLayout:
+    """Generated grid for a RawJoystick of any shape: rows of axis bars,
+    a row of hats (drawn as D-pads) and trackballs, then every button as a
+    numbered cell, in the column count that gives the largest cells.
+    compile() keeps the result per rect and device shape like Layout."""
+    BAR_H = 14
+    LABEL_W = 44
+    HAT = 66
+    BALL_W = 110
+    CELL_MAX = 56
+    GAP = 6
+
+    def __init__(self):
+        self._compiled = {}
+
+    @staticmethod
+    def shape(joy):
+        return (joy.n_axes, joy.n_buttons, joy.n_hats, joy.n_balls)
+
+    def name(self, joy):
+        return "raw %da %db %dh %dt" % self.shape(joy)
+
+    def compile(self, x0, y0, w, h, joy):
+        key = (x0, y0, w, h) + self.shape(joy)
+        out = self._compiled.get(key)
+        if out is None:
+            if len(self._compiled) >= LAYOUT_CACHE_SIZE:
+                self._compiled.clear()
+            out = self._compiled[key] = self._compile(x0, y0, w, h, *self.shape(joy))
+        return out
+
+    def _compile(self, x0, y0, w, h, n_axes, n_buttons, n_hats, n_balls):
+        gap, lw = self.GAP, self.LABEL_W
+        out = [Widget('frame', sdl2.SDL_Rect(x0 + PAD, y0 + PAD, w - PAD*2, h - PAD*2),
+                      None, None, None, None, None, None, PANEL_ACCENT, None)]
+        ix, iy = x0 + PAD + 8, y0 + PAD + 8
+        iw, bottom = w - 2 * (PAD + 8), y0 + h - PAD - 8
+        # Axis bars, up to 8 per column
+        cols = max(1, min(4, math.ceil(n_axes / 8)))
+        cw = (iw - gap * (cols - 1)) // cols
+        for a in range(n_axes):
+            bx = ix + (a % cols) * (cw + gap)
+            by = iy + (a // cols) * (self.BAR_H + gap)
+            out.append(Widget('raw_axis', sdl2.SDL_Rect(bx + lw, by, max(1, cw - lw), self.BAR_H),
+                              bx, by + self.BAR_H//2, None, f"A{a}", None, a, None, None))
+        if n_axes:
+            iy += math.ceil(n_axes / cols) * (self.BAR_H + gap)
+        # Hats and balls share rows, wrapping at the panel width
+        items = [('raw_hat', i, lw + self.HAT) for i in range(n_hats)]
+        items += [('raw_ball', i, lw + self.BALL_W) for i in range(n_balls)]
+        x = ix
+        for kind, i, iw_item in items:
+            if x > ix and x + iw_item > ix + iw:
+                x = ix
+                iy += self.HAT + gap
+            cy = iy + self.HAT//2
+            if kind == 'raw_hat':
+                hub, arms = dpad_geometry(x + lw + self.HAT//2, cy, self.HAT)
+                arms = tuple((rect, _HAT_BITS[btn], tri) for rect, btn, tri in arms)
+                out.append(Widget(kind, hub, x, cy, None, f"H{i}", None, i, None, arms))
+            else:
+                rect = sdl2.SDL_Rect(x + lw, cy - 12, self.BALL_W, 24)
+                out.append(Widget(kind, rect, x, cy, None, f"T{i}", None, i, None, None))
+            x += iw_item + gap * 2
+        if items:
+            iy += self.HAT + gap
+        # Buttons: square cells filling what is left
+        bh = bottom - iy
+        if n_buttons and bh > 0 and iw > 0:
+            cols = max(range(1, n_buttons + 1),
+                       key=lambda c: min(iw / c, bh / math.ceil(n_buttons / c)))
+            cell = min(iw // cols, bh // math.ceil(n_buttons / cols), self.CELL_MAX)
+            for b in range(n_buttons):
+                cx = ix + (b % cols) * cell
+                cy = iy + (b // cols) * cell
+                rect = sdl2.SDL_Rect(cx, cy, max(1, cell - 4), max(1, cell - 4))
+                out.append(Widget('raw_button', rect, cx + rect.w//2, cy + rect.h//2, None,
+                                  str(b), b, None, None, None))
+        return tuple(out)
@@ -0,0 +1,18 @@
+# Optional numpy for the stick analyzers (heatmap, calibration), imported by
+# the first one that needs it so startup never pays for it; without numpy
+# they fall back to their array / pure-Python paths
+_numpy = None
+_checked = False
+
+
+def load_numpy():
+    """The numpy module, or None when it is not installed."""
+    global _numpy, _checked
+    if not _checked:
+        _checked = True
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            pass
+    return _numpy
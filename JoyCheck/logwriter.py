@@ -0,0 +1,119 @@
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from config import (LOG_DIR, EVENT_LOG_FILE, EVENT_LOG_MAX_BYTES, EVENT_LOG_BACKUPS,
+                    EVENT_LOG_QUEUE, EVENT_LOG_FSYNC_S)
+
+_STOP = object()
+
+
+class LogWriter:
+    """Structured event log written from a background thread.
+
+    write() only timestamps the record and puts it on a bounded queue; it
+    never blocks. When the queue is full the record is counted in
+    `dropped` instead. The writer thread formats records as JSON lines,
+    writes them in batches, rotates the file by size (events.log,
+    events.log.1, ...) and fsyncs every fsync_s seconds.
+    """
+    def __init__(self, directory=LOG_DIR, filename=EVENT_LOG_FILE,
+                 max_bytes=EVENT_LOG_MAX_BYTES, backups=EVENT_LOG_BACKUPS,
+                 queue_size=EVENT_LOG_QUEUE, fsync_s=EVENT_LOG_FSYNC_S, batch=256):
+        self.path = Path(directory) / filename
+        self.max_bytes = int(max_bytes)
+        self.backups = max(0, int(backups))
+        self.fsync_s = float(fsync_s)
+        self.batch = max(1, int(batch))
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._thread = None
+        self._file = None
+        self.dropped = 0
+        self.written = 0
+        self._reported_dropped = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="joycheck-logwriter", daemon=True)
+        self._thread.start()
+
+    def write(self, kind: str, **fields) -> bool:
+        """Queue one record; returns False (and counts a drop) if the queue is full."""
+        if self._thread is None:
+            return False
+        try:
+            self._queue.put_nowait((time.time(), kind, fields))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout=2.0):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    # --- writer thread ---
+    def _run(self):
+        self._open()
+        last_sync = time.monotonic()
+        stop = False
+        while not stop:
+            try:
+                items = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                items = []
+            while len(items) < self.batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in items:
+                stop = True
+                items = [it for it in items if it is not _STOP]
+            lines = [self._format(*it) for it in items]
+            if self.dropped != self._reported_dropped:
+                self._reported_dropped = self.dropped
+                lines.append(self._format(time.time(), 'dropped', {'count': self.dropped}))
+            if lines:
+                self._file.write(''.join(lines))
+                self.written += len(items)
+                if self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            now = time.monotonic()
+            if stop or now - last_sync >= self.fsync_s:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                last_sync = now
+        self._file.close()
+        self._file = None
+
+    def _format(self, ts, kind, fields):
+        rec = {'t': round(ts, 4), 'kind': kind}
+        rec.update(fields)
+        return json.dumps(rec, separators=(',', ':')) + '\n'
+
+    def _open(self):
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=64 * 1024)
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups:
+            for i in range(self.backups - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._open()
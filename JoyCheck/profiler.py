@@ -0,0 +1,293 @@
+import json
+import os
+import platform
+import time
+from pathlib import Path
+
+import sdl2
+
+from config import LOG_DIR, PROFILE_STATS_MAX_BYTES, STARTUP_LOG_FILE
+
+# Environment switches
+STATS_ENV = "JOYCHECK_STATS"        # path of a rolling JSON-lines stats file ("1" = logs/stats.jsonl)
+CPROFILE_ENV = "JOYCHECK_CPROFILE"  # dump a cProfile every N seconds to logs/
+
+# SDL calls that submit work to the renderer
+DRAW_FUNCS = ('SDL_RenderClear', 'SDL_RenderCopy', 'SDL_RenderCopyEx',
+              'SDL_RenderDrawPoint', 'SDL_RenderDrawPoints',
+              'SDL_RenderDrawLine', 'SDL_RenderDrawLines',
+              'SDL_RenderDrawRect', 'SDL_RenderDrawRects',
+              'SDL_RenderFillRect', 'SDL_RenderFillRects',
+              'SDL_RenderGeometry', 'SDL_RenderGeometryRaw')
+STATE_FUNCS = ('SDL_SetRenderDrawColor', 'SDL_SetRenderDrawBlendMode',
+               'SDL_SetRenderTarget', 'SDL_CreateTexture',
+               'SDL_CreateTextureFromSurface', 'SDL_UpdateTexture',
+               'SDL_DestroyTexture')
+
+# UIRenderer primitives counted per call
+PRIMITIVES = ('_fill_rect', '_draw_rect', '_fill_circle', '_draw_circle', '_fill_triangle')
+# Panels drawn from inside BodyRenderer, timed as their own section
+NESTED = {'_draw_log': 'log', '_draw_latency': 'log', '_draw_calibration': 'log',
+          '_draw_resolution': 'log'}
+
+
+class CallCounter:
+    """Count calls to selected sdl2 functions by wrapping the module attributes."""
+    def __init__(self, names=DRAW_FUNCS + STATE_FUNCS):
+        self.names = names
+        self.counts = dict.fromkeys(names, 0)
+        self._orig = {}
+
+    def install(self):
+        for name in self.names:
+            fn = getattr(sdl2, name, None)
+            if fn is None or name in self._orig:
+                continue
+            self._orig[name] = fn
+            setattr(sdl2, name, self._wrap(name, fn))
+
+    def uninstall(self):
+        for name, fn in self._orig.items():
+            setattr(sdl2, name, fn)
+        self._orig.clear()
+
+    def _wrap(self, name, fn):
+        counts = self.counts
+        def wrapper(*args):
+            counts[name] += 1
+            return fn(*args)
+        return wrapper
+
+    def reset(self):
+        for name in self.counts:
+            self.counts[name] = 0
+
+    def total(self, names=None):
+        return sum(self.counts[n] for n in (names or self.names))
+
+
+class FrameProfiler:
+    """Per-frame section timings and draw-call counters.
+
+    The loop calls begin_frame(), then lap(name) after each stage (time
+    since the previous lap, minus nested panels timed separately), and
+    end_frame() once the frame was presented. Frames skipped before
+    end_frame() are discarded. Averages over the last second are kept in
+    `summary` for the overlay and the optional stats file.
+    """
+    def __init__(self, ui):
+        self.ui = ui
+        self.enabled = False
+        self.calls = CallCounter()
+        self.summary = {}
+        self.version = 0
+        self._frame = {}
+        self._acc = {}
+        self._frames = 0
+        self._nested = 0.0
+        self._mark = 0.0
+        self._window_start = time.perf_counter()
+        self._patched = []
+        self._stats_path = None
+        self._cprofile = None
+        self._cprofile_every = 0.0
+        self._cprofile_last = 0.0
+
+        stats = os.environ.get(STATS_ENV)
+        if stats:
+            self._stats_path = Path(LOG_DIR) / "stats.jsonl" if stats == "1" else Path(stats)
+        every = os.environ.get(CPROFILE_ENV)
+        if every:
+            try:
+                self._cprofile_every = max(1.0, float(every))
+            except ValueError:
+                self._cprofile_every = 0.0
+        if self._stats_path is not None:
+            self.enable()
+        if self._cprofile_every:
+            self._start_cprofile()
+
+    # --- switching ---
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.calls.install()
+        # Enabled mid-frame (P key): start timing from here, not from a stale mark
+        self._frame.clear()
+        self._nested = 0.0
+        self._mark = self._window_start = time.perf_counter()
+        ui = self.ui
+        for name in PRIMITIVES:
+            self._patch(ui, name, self._counted(name, getattr(ui, name)))
+        self._patch(ui.font, 'draw_text', self._counted('draw_text', ui.font.draw_text))
+        for name, section in NESTED.items():
+            self._patch(ui, name, self._timed(section, getattr(ui, name)))
+
+    def disable(self):
+        if not self.enabled or self._stats_path is not None:
+            return   # the stats file keeps instrumentation on
+        self.enabled = False
+        self.calls.uninstall()
+        for obj, name in self._patched:
+            delattr(obj, name)   # back to the class attribute
+        self._patched.clear()
+        self.summary = {}
+        self.version += 1
+
+    def _patch(self, obj, name, fn):
+        setattr(obj, name, fn)
+        self._patched.append((obj, name))
+
+    def _counted(self, name, fn):
+        frame = self._frame
+        key = 'n_' + name.lstrip('_')
+        def wrapper(*args, **kw):
+            frame[key] = frame.get(key, 0) + 1
+            return fn(*args, **kw)
+        return wrapper
+
+    def _timed(self, section, fn):
+        frame = self._frame
+        def wrapper(*args, **kw):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kw)
+            finally:
+                dt = time.perf_counter() - t0
+                frame[section] = frame.get(section, 0.0) + dt * 1000.0
+                self._nested += dt
+        return wrapper
+
+    # --- per frame ---
+    def begin_frame(self):
+        if self._cprofile is not None:
+            self._maybe_dump_cprofile()
+        if not self.enabled:
+            return
+        self._frame.clear()
+        self.calls.reset()
+        self._nested = 0.0
+        self._mark = time.perf_counter()
+
+    def lap(self, section):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        ms = (now - self._mark - self._nested) * 1000.0
+        self._frame[section] = self._frame.get(section, 0.0) + ms
+        self._nested = 0.0
+        self._mark = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        frame = self._frame
+        frame['sdl_draw'] = self.calls.total(DRAW_FUNCS)
+        frame['sdl_calls'] = self.calls.total()
+        acc = self._acc
+        for key, val in frame.items():
+            acc[key] = acc.get(key, 0.0) + val
+        self._frames += 1
+        now = time.perf_counter()
+        if now - self._window_start >= 1.0:
+            n = max(1, self._frames)
+            self.summary = {key: val / n for key, val in acc.items()}
+            self.summary['frames'] = self._frames
+            self.version += 1
+            acc.clear()
+            self._frames = 0
+            self._window_start = now
+            if self._stats_path is not None:
+                self._append_stats()
+
+    def overlay_lines(self):
+        s = self.summary
+        if not s:
+            return ["PROFILE: COLLECTING"]
+        lines = [f"PROFILE  {s.get('frames', 0)} FRAMES/S"]
+        for section in ('input', 'layer', 'header', 'body', 'log', 'footer', 'present'):
+            if section in s:
+                lines.append(f"{section.upper():<8}{s[section]:6.2f} MS")
+        lines.append(f"SDL DRAW {s.get('sdl_draw', 0):6.0f}")
+        lines.append(f"SDL ALL  {s.get('sdl_calls', 0):6.0f}")
+        for name in PRIMITIVES + ('draw_text',):
+            key = 'n_' + name.lstrip('_')
+            if key in s:
+                lines.append(f"{name.strip('_').upper():<13}{s[key]:5.0f}")
+        return lines
+
+    # --- outputs ---
+    def _append_stats(self):
+        path = self._stats_path
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists() and path.stat().st_size > PROFILE_STATS_MAX_BYTES:
+                os.replace(path, path.with_name(path.name + ".1"))
+            rec = {'t': round(time.time(), 3)}
+            rec.update({k: round(v, 3) for k, v in self.summary.items()})
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(rec, separators=(',', ':')) + "\n")
+        except OSError:
+            self._stats_path = None
+
+    def _start_cprofile(self):
+        import cProfile
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+        self._cprofile_last = time.monotonic()
+
+    def _maybe_dump_cprofile(self):
+        now = time.monotonic()
+        if now - self._cprofile_last < self._cprofile_every:
+            return
+        prof = self._cprofile
+        prof.disable()
+        try:
+            out = Path(LOG_DIR)
+            out.mkdir(parents=True, exist_ok=True)
+            prof.dump_stats(str(out / time.strftime("cprofile-%Y%m%d-%H%M%S.prof")))
+        except OSError:
+            pass
+        self._start_cprofile()
+
+    def close(self):
+        if self._cprofile is not None:
+            self._cprofile_last = 0.0
+            self._maybe_dump_cprofile()
+            self._cprofile.disable()
+            self._cprofile = None
+        self.calls.uninstall()
+
+
+class StartupTimeline:
+    """Milliseconds from launch to each startup milestone (import, window, first present...)."""
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks = []
+        self.written = False
+
+    def mark(self, name):
+        self.marks.append((name, (time.perf_counter() - self.t0) * 1000.0))
+
+    def has(self, name):
+        return any(n == name for n, _ms in self.marks)
+
+    def line(self):
+        parts = [f"{name}={ms:.1f}" for name, ms in self.marks]
+        return " ".join(parts)
+
+    def write(self, directory=LOG_DIR, filename=STARTUP_LOG_FILE):
+        """Append one line per launch: time, platform, then the marks in ms."""
+        if self.written:
+            return None
+        self.written = True
+        path = Path(directory) / filename
+        rec = f"{time.strftime('%Y-%m-%d %H:%M:%S')} {platform.release()} {platform.machine()} {self.line()}\n"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(rec)
+        except OSError:
+            return None
+        return path
@@ -0,0 +1,129 @@
+import math
+from array import array
+
+import sdl2
+
+from config import RESOLUTION_INTERVAL_S
+
+# Triggers report 0..32767, sticks the full int16 range
+TRIGGER_AXES = (sdl2.SDL_CONTROLLER_AXIS_TRIGGERLEFT, sdl2.SDL_CONTROLLER_AXIS_TRIGGERRIGHT)
+# values() compares the bitset against zeros this many bytes at a time
+_CHUNK = 256
+_ZERO_CHUNK = bytes(_CHUNK)
+
+
+class AxisLevels:
+    """Every raw int16 value an axis has reported: a 65536-bit set plus 256 bucket counts."""
+    __slots__ = ('bits', 'buckets', 'distinct', 'samples')
+
+    def __init__(self):
+        self.bits = bytearray(8192)
+        self.buckets = array('I', bytes(4 * 256))
+        self.distinct = 0
+        self.samples = 0
+
+    def add(self, raw):
+        i = raw + 32768
+        self.buckets[i >> 8] += 1
+        self.samples += 1
+        bit = 1 << (i & 7)
+        if not self.bits[i >> 3] & bit:
+            self.bits[i >> 3] |= bit
+            self.distinct += 1
+
+    def values(self):
+        """Observed raw values in ascending order; empty 256-byte chunks of
+        the bitset are skipped with one comparison each."""
+        out = []
+        bits = self.bits
+        for start in range(0, len(bits), _CHUNK):
+            chunk = bits[start:start + _CHUNK]
+            if chunk == _ZERO_CHUNK:
+                continue
+            for j, byte in enumerate(chunk, start):
+                if byte:
+                    base = (j << 3) - 32768
+                    for k in range(8):
+                        if byte >> k & 1:
+                            out.append(base + k)
+        return out
+
+    def clear(self):
+        self.bits = bytearray(8192)
+        self.buckets = array('I', bytes(4 * 256))
+        self.distinct = 0
+        self.samples = 0
+
+
+def analyze_levels(levels, trigger=False):
+    """Distinct levels, quantization step, effective bits and digital detection."""
+    vals = levels.values()
+    n = len(vals)
+    out = {'distinct': n, 'samples': levels.samples}
+    if not n:
+        return out
+    lo, hi = vals[0], vals[-1]
+    out.update(min=lo, max=hi)
+    full = 32768 if trigger else 65536
+    # Digital: only rest and full-scale values seen, and full scale reached
+    extremes = (0, 32767) if trigger else (-32768, 0, 32767)
+    out['digital'] = (2 <= n <= len(extremes) and hi - lo > 30000
+                      and all(min(abs(v - e) for e in extremes) < 1024 for v in vals))
+    if n >= 3:
+        gaps = {}
+        for a, b in zip(vals, vals[1:]):
+            gaps[b - a] = gaps.get(b - a, 0) + 1
+        # Quantization step: the smallest gap seen more than once (a single
+        # small gap can be a glitch), else the most common one
+        repeated = [g for g, c in gaps.items() if c > 1]
+        step = min(repeated) if repeated else max(gaps.items(), key=lambda kv: (kv[1], -kv[0]))[0]
+        out['step'] = step
+        out['bits'] = math.log2(full / step)
+    elif n == 2:
+        out['bits'] = 1.0
+    return out
+
+
+class ResolutionStore:
+    """Per-axis resolution report of the displayed controller, refreshed while enabled."""
+    def __init__(self, interval_s=RESOLUTION_INTERVAL_S):
+        self.enabled = False
+        self.version = 0
+        self.interval_s = float(interval_s)
+        self.reports = {}   # instance_id -> [analyze_levels() per axis]
+        self._last_run = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.version += 1
+
+    def tick(self, now, dev):
+        """Re-analyze `dev` (the one the panel shows, or None) every interval_s."""
+        if not self.enabled or now - self._last_run < self.interval_s:
+            return
+        self._last_run = now
+        self.reports = {}
+        if dev is not None:
+            self.reports[dev.instance_id] = [analyze_levels(lv, axis in TRIGGER_AXES)
+                                             for axis, lv in enumerate(dev.levels)]
+        self.version += 1
+
+    def get(self, instance_id):
+        return self.reports.get(instance_id)
+
+    def prune(self, live_ids):
+        """Drop reports of removed devices; the next tick re-analyzes at once,
+        so a replugged pad under a reused id never shows the old counts."""
+        stale = [iid for iid in self.reports if iid not in live_ids]
+        for iid in stale:
+            del self.reports[iid]
+        if stale:
+            self._last_run = 0.0
+            self.version += 1
+
+    def reset(self, devices):
+        for dev in devices.values():
+            for lv in dev.levels:
+                lv.clear()
+        self.reports.clear()
+        self.version += 1
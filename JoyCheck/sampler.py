@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+
+import sdl2
+
+from config import SAMPLER_HZ, STICK_TRAIL_MAX
+from input_device import N_STICK_AXES
+
+
+class _Snapshot:
+    """One side of the double buffer. seq is odd while the sampler writes it."""
+    def __init__(self):
+        self.seq = 0
+        self.states = {}   # instance_id -> [t, button_mask, axis0 .. axisN]
+
+
+class _RateEstimator:
+    """Estimate a device's report rate from the intervals between value changes."""
+    def __init__(self, size=256):
+        self.intervals = deque(maxlen=size)
+        self.last_change = None
+
+    def changed(self, t: float):
+        if self.last_change is not None:
+            self.intervals.append(t - self.last_change)
+        self.last_change = t
+
+    def estimate(self):
+        """(hz, jitter_ms) or None until enough changes have been seen."""
+        iv = sorted(self.intervals)
+        if len(iv) < 8:
+            return None
+        median = iv[len(iv) // 2]
+        if median <= 0:
+            return None
+        mean = sum(iv) / len(iv)
+        var = sum((x - mean) ** 2 for x in iv) / len(iv)
+        return 1.0 / median, (var ** 0.5) * 1000.0
+
+
+class InputSampler:
+    """Background thread that samples every controller at a fixed rate.
+
+    Button edges go to a deque in order, so presses shorter than a frame
+    survive; the latest axis values sit in a lock-free double buffer
+    (sequence-checked) that the render loop reads through apply().
+    """
+    def __init__(self, devmgr, rate_hz=SAMPLER_HZ):
+        self.devmgr = devmgr
+        self.rate_hz = max(1, min(1000, int(rate_hz)))
+        self._buffers = (_Snapshot(), _Snapshot())
+        self._front = 0
+        self._edges = deque()   # (instance_id, btn, pressed, t)
+        self._sticks = deque(maxlen=STICK_TRAIL_MAX)   # (instance_id, lx, ly, rx, ry)
+        self._masks = {}        # instance_id -> last button mask (sampler side)
+        self._last = {}         # instance_id -> last raw tuple (sampler side)
+        self._rates = {}        # instance_id -> _RateEstimator
+        self._thread = None
+        self._running = False
+        self.samples = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="joycheck-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    # --- sampler thread ---
+    def _run(self):
+        period = 1.0 / self.rate_hz
+        next_t = time.perf_counter()
+        while self._running:
+            self._sample_once()
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.perf_counter()  # fell behind; don't try to catch up
+
+    def _sample_once(self):
+        back = self._buffers[1 - self._front]
+        back.seq += 1   # odd: being written
+        now = time.perf_counter()
+        t = sdl2.SDL_GetTicks() / 1000.0
+        seen = set()
+        sdl2.SDL_LockJoysticks()
+        try:
+            sdl2.SDL_GameControllerUpdate()
+            for iid, dev in list(self.devmgr.devices.items()):
+                ctrl = dev.ctrl
+                if not ctrl:
+                    continue
+                seen.add(iid)
+                mask = 0
+                for btn in range(sdl2.SDL_CONTROLLER_BUTTON_MAX):
+                    if sdl2.SDL_GameControllerGetButton(ctrl, btn):
+                        mask |= 1 << btn
+                axes = tuple(sdl2.SDL_GameControllerGetAxis(ctrl, axis) for axis in range(len(dev.raw)))
+                self._record(iid, t, now, mask, axes)
+                state = back.states.get(iid)
+                if state is None:
+                    back.states[iid] = [t, mask, *axes]
+                else:
+                    state[0] = t
+                    state[1] = mask
+                    state[2:] = axes
+        finally:
+            sdl2.SDL_UnlockJoysticks()
+        for iid in [i for i in back.states if i not in seen]:
+            del back.states[iid]
+            self._masks.pop(iid, None)
+            self._last.pop(iid, None)
+            self._rates.pop(iid, None)
+        back.seq += 1   # even: consistent
+        self._front = 1 - self._front
+        self.samples += 1
+
+    def _record(self, iid, t, now, mask, axes):
+        prev_mask = self._masks.get(iid, 0)
+        if mask != prev_mask:
+            diff = mask ^ prev_mask
+            btn = 0
+            while diff:
+                if diff & 1:
+                    self._edges.append((iid, btn, bool(mask >> btn & 1), t))
+                diff >>= 1
+                btn += 1
+            self._masks[iid] = mask
+        raw = (mask, axes)
+        last = self._last.get(iid)
+        if last != raw:
+            if last is None or last[1][:N_STICK_AXES] != axes[:N_STICK_AXES]:
+                self._sticks.append((iid, *axes[:N_STICK_AXES]))
+            self._last[iid] = raw
+            est = self._rates.get(iid)
+            if est is None:
+                est = self._rates[iid] = _RateEstimator()
+            est.changed(now)
+
+    # --- render thread ---
+    def snapshot(self):
+        """Consistent copy of the newest sample: {instance_id: [t, mask, axes...]}."""
+        while True:
+            buf = self._buffers[self._front]
+            seq = buf.seq
+            if seq & 1:
+                continue
+            states = {iid: list(v) for iid, v in list(buf.states.items())}
+            if buf.seq == seq:
+                return states
+
+    def apply(self, devmgr) -> bool:
+        """Feed queued edges and the newest axis values into the Controllers."""
+        changed = False
+        while self._edges:
+            iid, btn, pressed, t = self._edges.popleft()
+            dev = devmgr.devices.get(iid)
+            if dev and dev.set_button(btn, pressed, t):
+                changed = True
+        while self._sticks:
+            iid, lx, ly, rx, ry = self._sticks.popleft()
+            dev = devmgr.devices.get(iid)
+            if dev:
+                dev.push_stick(lx, ly, rx, ry)
+        for iid, state in self.snapshot().items():
+            dev = devmgr.devices.get(iid)
+            if not dev:
+                continue
+            for axis, raw in enumerate(state[2:]):
+                if dev.set_axis(axis, raw, track=False):
+                    changed = True
+        return changed
+
+    def rates(self):
+        """{instance_id: (hz, jitter_ms)} for devices with an estimate."""
+        out = {}
+        for iid, est in list(self._rates.items()):
+            r = est.estimate()
+            if r is not None:
+                out[iid] = r
+        return out
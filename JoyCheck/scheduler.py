@@ -0,0 +1,66 @@
+import time
+
+import sdl2
+
+from config import FPS, IDLE_AFTER_MS, IDLE_FPS
+
+
+class FrameScheduler:
+    """Frame pacing with an idle governor.
+
+    wait() sleeps only for what is left of the frame period after the work,
+    and not at all after a present when the renderer is vsynced and the
+    measured present interval shows vsync really blocks. With no input for
+    idle_after_ms it drops to idle_fps and blocks in SDL_WaitEventTimeout,
+    so the next controller event wakes the loop at once.
+    """
+    def __init__(self, fps=FPS, vsync=False, refresh_hz=60,
+                 idle_after_ms=IDLE_AFTER_MS, idle_fps=IDLE_FPS):
+        self.period = 1.0 / max(1, fps)
+        self.vsync = bool(vsync)
+        self.refresh = 1.0 / (refresh_hz if refresh_hz and refresh_hz > 0 else 60)
+        self.idle_after = max(0, idle_after_ms) / 1000.0
+        self.idle_period = 1.0 / max(1, idle_fps)
+        self._last_input = time.perf_counter()
+        self._last_present = None
+        self._relied_on_vsync = False
+        self._vsync_misses = 0
+        self.idle_waits = 0
+
+    def note_input(self, t=None):
+        self._last_input = time.perf_counter() if t is None else t
+
+    @property
+    def idle(self):
+        return bool(self.idle_after) and time.perf_counter() - self._last_input > self.idle_after
+
+    def presented(self, t=None):
+        t = time.perf_counter() if t is None else t
+        if self._relied_on_vsync and self._last_present is not None:
+            # Some drivers report vsync but never block: give up on it after
+            # a few unslept frames that came back faster than the refresh
+            if t - self._last_present < self.refresh * 0.75:
+                self._vsync_misses += 1
+                if self._vsync_misses >= 3:
+                    self.vsync = False
+            else:
+                self._vsync_misses = 0
+        self._last_present = t
+
+    def wait(self, frame_start, presented) -> bool:
+        """Pace the loop after a frame that started at frame_start; True if it idled."""
+        now = time.perf_counter()
+        self._relied_on_vsync = False
+        if self.idle:
+            remaining = self.idle_period - (now - frame_start)
+            if remaining > 0.001:
+                self.idle_waits += 1
+                sdl2.SDL_WaitEventTimeout(None, int(remaining * 1000))
+            return True
+        if presented and self.vsync:
+            self._relied_on_vsync = True
+            return False
+        remaining = self.period - (now - frame_start)
+        if remaining > 0.001:
+            sdl2.SDL_Delay(int(remaining * 1000))
+        return False
@@ -0,0 +1,220 @@
+import json
+import struct
+import time
+from pathlib import Path
+
+import sdl2
+
+from config import LOG_DIR, SESSION_FILE, SESSION_FLUSH_BYTES
+from input_device import N_STICK_AXES, RawJoystick
+
+MAGIC = b'JCSESS1\n'
+HEADER_LEN = struct.Struct('<I')
+# Microseconds since the session start, instance id, kind, index, raw value
+RECORD = struct.Struct('<QhBBh')
+# HAT carries the SDL_HAT_* bits; BALL one relative motion per record,
+# index 2*ball for x and 2*ball + 1 for y
+BUTTON, AXIS, ADDED, REMOVED, FRAME, HAT, BALL = range(7)
+
+
+class SessionRecorder:
+    """Every controller and raw joystick state change written to a compact binary file.
+
+    The file starts with MAGIC and a length-prefixed JSON header naming
+    the devices present (raw joysticks with their "raw" shape), followed by RECORD entries. ADDED records
+    carry their device's JSON (value = byte length) right after them;
+    FRAME marks the end of one frame's input. Records are packed into a
+    bytearray and appended to the file only every flush_bytes.
+    """
+    def __init__(self, devices, path=None, directory=LOG_DIR, flush_bytes=SESSION_FLUSH_BYTES):
+        self.path = Path(path) if path else Path(directory) / time.strftime(SESSION_FILE)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_bytes = int(flush_bytes)
+        self.records = 0
+        self._file = open(self.path, 'ab')
+        self._buf = bytearray()
+        self._t0 = time.perf_counter()
+        self._dirty = False
+        header = json.dumps({'version': 1, 'started': time.time(),
+                             'devices': [_describe(dev) for dev in devices.values()]}).encode()
+        self._buf += MAGIC + HEADER_LEN.pack(len(header)) + header
+
+    def _append(self, iid, kind, index, value):
+        self._buf += RECORD.pack(int((time.perf_counter() - self._t0) * 1e6), iid, kind, index, value)
+        self.records += 1
+        if len(self._buf) >= self.flush_bytes:
+            self.flush()
+
+    def button(self, iid, btn, pressed):
+        self._append(iid, BUTTON, btn, 1 if pressed else 0)
+        self._dirty = True
+
+    def axis(self, iid, axis, raw):
+        self._append(iid, AXIS, axis, raw)
+        self._dirty = True
+
+    def hat(self, iid, hat, value):
+        self._append(iid, HAT, hat, value)
+        self._dirty = True
+
+    def ball(self, iid, ball, dx, dy):
+        for i, d in ((2 * ball, dx), (2 * ball + 1, dy)):
+            if d:
+                self._append(iid, BALL, i, max(-32768, min(32767, d)))
+        self._dirty = True
+
+    def added(self, dev):
+        info = json.dumps(_describe(dev)).encode()
+        self._append(dev.instance_id, ADDED, 0, len(info))
+        self._buf += info
+        self._dirty = True
+
+    def removed(self, iid):
+        self._append(iid, REMOVED, 0, 0)
+        self._dirty = True
+
+    def frame(self):
+        """End of one frame's input; written only when something changed."""
+        if self._dirty:
+            self._append(0, FRAME, 0, 0)
+            self._dirty = False
+
+    def flush(self):
+        if self._buf and self._file is not None:
+            self._file.write(self._buf)
+            self._buf.clear()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+def _describe(dev):
+    info = {'id': dev.instance_id, 'name': dev.name, 'guid': dev.guid}
+    if isinstance(dev, RawJoystick):
+        info['raw'] = list(dev.shape)
+    return info
+
+
+def read_session(path):
+    """(header dict, [(t_us, iid, kind, index, value, device info or None), ...])."""
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path}: not a JoyCheck session")
+    pos = len(MAGIC)
+    (n,) = HEADER_LEN.unpack_from(data, pos)
+    pos += HEADER_LEN.size
+    header = json.loads(data[pos:pos + n])
+    pos += n
+    records = []
+    while pos + RECORD.size <= len(data):
+        t_us, iid, kind, index, value = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        info = None
+        if kind == ADDED:
+            info = json.loads(data[pos:pos + value])
+            pos += value
+        records.append((t_us, iid, kind, index, value, info))
+    return header, records
+
+
+class SessionReplayer:
+    """Feeds a recorded session back into DeviceManager virtual controllers
+    (and virtual raw joysticks for devices recorded with a "raw" shape).
+
+    In real time the records due since the replay started are applied on
+    each poll(); with realtime=False every poll() applies one recorded
+    frame, so the same file always drives the same sequence of frames.
+    Edge times are the current SDL tick, as for live input.
+    """
+    def __init__(self, devmgr, path, realtime=True):
+        self.devmgr = devmgr
+        self.path = Path(path)
+        self.realtime = bool(realtime)
+        self.header, self.records = read_session(self.path)
+        self.pos = 0
+        self.frames = 0
+        self._t0 = None
+        self._devices = {}   # recorded instance id -> Controller or RawJoystick
+        for info in self.header['devices']:
+            self._add(info)
+
+    @property
+    def finished(self):
+        return self.pos >= len(self.records)
+
+    def _add(self, info):
+        if info['id'] in self._devices:
+            return   # re-announced while already open (initial scan plus its ADDED event)
+        if 'raw' in info:
+            dev = self.devmgr.add_virtual_joystick(info['name'], info.get('guid', ''), info['raw'])
+        else:
+            dev = self.devmgr.add_virtual(info['name'], info.get('guid', ''))
+        self._devices[info['id']] = dev
+
+    def _remove(self, dev):
+        if isinstance(dev, RawJoystick):
+            self.devmgr.remove_joystick(dev.instance_id)
+        else:
+            self.devmgr.remove_by_instance_id(dev.instance_id)
+
+    def poll(self) -> bool:
+        """Apply the records due now. True if any state changed."""
+        records = self.records
+        if self.pos >= len(records):
+            return False
+        if self.realtime:
+            if self._t0 is None:
+                self._t0 = time.perf_counter() - records[self.pos][0] * 1e-6
+            due = int((time.perf_counter() - self._t0) * 1e6)
+        t = sdl2.SDL_GetTicks() / 1000.0
+        changed = False
+        moved = set()
+        while self.pos < len(records):
+            t_us, iid, kind, index, value, info = records[self.pos]
+            if self.realtime and t_us > due:
+                break
+            self.pos += 1
+            if kind == FRAME:
+                self.frames += 1
+                if not self.realtime:
+                    break
+                continue
+            if kind == ADDED:
+                self._add(info)
+                changed = True
+                continue
+            dev = self._devices.get(iid)
+            if dev is None:
+                continue
+            if kind == REMOVED:
+                del self._devices[iid]
+                self._remove(dev)
+                changed = True
+            elif isinstance(dev, RawJoystick):
+                if kind == BUTTON:
+                    changed |= dev.set_button(index, value != 0)
+                elif kind == AXIS:
+                    changed |= dev.set_axis(index, value)
+                elif kind == HAT:
+                    changed |= dev.set_hat(index, value)
+                elif kind == BALL:
+                    dx, dy = (value, 0) if index % 2 == 0 else (0, value)
+                    changed |= dev.move_ball(index // 2, dx, dy)
+            elif kind == BUTTON:
+                changed |= dev.set_button(index, value != 0, t)
+            elif kind == AXIS:
+                if dev.set_axis(index, value, track=False):
+                    changed = True
+                    if index < N_STICK_AXES:
+                        moved.add(dev)
+        for dev in moved:
+            dev.push_stick(*dev.raw[:N_STICK_AXES])
+        return changed
+
+    def close(self):
+        for dev in self._devices.values():
+            self._remove(dev)
+        self._devices.clear()
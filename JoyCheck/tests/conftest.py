@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# Modules are imported by bare name, as app.py does from its own directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
@@ -0,0 +1,28 @@
+from array import array
+
+from calibration import CalibrationStore
+
+
+class _Dev:
+    def __init__(self, lx, ly):
+        self.raw = array('h', [lx, ly, 0, 0, 0, 0])
+
+
+def test_resting_stick_is_sampled_by_time_not_by_changes():
+    store = CalibrationStore(sample_hz=100)
+    store.toggle()
+    devices = {0: _Dev(1500, -900)}   # steady drift: the raw value never changes
+    store.sample(0.0, devices)
+    store.sample(0.5, devices)        # one slow frame covers 50 sample periods
+    store.tick(10.0)
+    res = store.get(0, 0)
+    assert res['rest_samples'] == 51
+    cx, cy = res['center']
+    assert abs(cx - 1500 / 32767) < 1e-4 and abs(cy + 900 / 32767) < 1e-4
+    assert res['noise'] < 1e-6
+
+
+def test_disabled_store_does_not_sample():
+    store = CalibrationStore()
+    store.sample(0.0, {0: _Dev(0, 0)})
+    assert not store.analyzers
@@ -0,0 +1,59 @@
+import sdl2
+
+from evdev_input import EvdevBackend, EVENT, EV_SYN, EV_KEY, EV_ABS, SYN_REPORT, SYN_DROPPED
+from input_device import DeviceManager
+
+BTN_B, ABS_X = 0x131, 0x00
+
+
+def _backend():
+    sdl2.SDL_Init(sdl2.SDL_INIT_GAMECONTROLLER)
+    devmgr = DeviceManager()
+    return devmgr, EvdevBackend(devmgr)
+
+
+def test_key_after_abs_in_one_batch_keeps_its_timestamp():
+    devmgr, backend = _backend()
+    # 0..65535 axis: its scale bias is -32768, which must not leak into edge times
+    data = b''.join([EVENT.pack(1000, 0, EV_ABS, ABS_X, 40000),
+                     EVENT.pack(1000, 5000, EV_KEY, BTN_B, 1),
+                     EVENT.pack(1000, 5000, EV_SYN, SYN_REPORT, 0)])
+    dev = backend.open_stream(data, absinfo={ABS_X: (0, 65535)})
+    src = backend.sources[dev.instance_id]
+    backend.buf[:len(data)] = data
+    backend._decode(src, len(data), offset=-990.0)
+    (btn, pressed, t), = dev.button_edges()
+    assert btn == sdl2.SDL_CONTROLLER_BUTTON_B and pressed
+    assert abs(t - 10.005) < 1e-6
+    assert dev.raw[sdl2.SDL_CONTROLLER_AXIS_LEFTX] == 40000 - 32768
+    backend.close()
+
+
+def test_replayed_stream_stamps_edges_with_current_tick():
+    devmgr, backend = _backend()
+    data = b''.join([EVENT.pack(1000, 0, EV_ABS, ABS_X, 100),
+                     EVENT.pack(1000, 5000, EV_KEY, BTN_B, 1),
+                     EVENT.pack(1000, 5000, EV_SYN, SYN_REPORT, 0)])
+    dev = backend.open_stream(data)
+    before = sdl2.SDL_GetTicks() / 1000.0
+    assert backend.poll()
+    (_btn, _pressed, t), = dev.button_edges()
+    assert before <= t <= sdl2.SDL_GetTicks() / 1000.0
+    backend.close()
+
+
+def test_drops_and_unmapped_codes_are_reported():
+    devmgr, backend = _backend()
+    data = b''.join([EVENT.pack(1000, 0, EV_KEY, 0x2c0, 1),        # BTN_TRIGGER_HAPPY1: no mapping
+                     EVENT.pack(1000, 0, EV_KEY, 0x2c0, 0),
+                     EVENT.pack(1000, 0, EV_SYN, SYN_DROPPED, 0),
+                     EVENT.pack(1000, 0, EV_KEY, BTN_B, 1),         # discarded until the next report
+                     EVENT.pack(1000, 0, EV_SYN, SYN_REPORT, 0)])
+    dev = backend.open_stream(data, name="pad")
+    backend.poll()
+    assert backend.drain_notes() == [f"{dev.instance_id} EVDEV UNMAPPED 0x1:0x2c0",
+                                     f"{dev.instance_id} EVDEV SYN_DROPPED #1"]
+    assert backend.drain_notes() == []
+    assert backend.summary() == ["pad reports=1 dropped=1 unmapped=0x1:0x2c0*2"]
+    assert not dev.buttons[sdl2.SDL_CONTROLLER_BUTTON_B]
+    backend.close()
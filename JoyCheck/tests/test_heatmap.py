@@ -0,0 +1,15 @@
+from heatmap import StickHeatmap
+
+
+def test_decay_reshades_only_live_cells_and_drops_faded_ones():
+    hm = StickHeatmap(size=64, saturation=24)
+    hm.add_raw([0, 0, 32767], [0, 0, 32767])
+    hm.texture_ptr = object()   # pretend uploaded; only _dirty is checked here
+    hm._dirty = None
+    hm.decay(factor=0.5)
+    assert hm._dirty == [32, 32, 64, 64]   # bounding rect of the two live cells
+    for _ in range(4):
+        hm.decay(factor=0.5)
+    centre = 32 * 64 + 32
+    assert hm._live == {centre}            # 1.0 faded below 0.05, 2.0 has not yet
+    assert hm.pixels[4 * (63 * 64 + 63) + 3] == 0
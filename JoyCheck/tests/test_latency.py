@@ -0,0 +1,24 @@
+from latency import LatencyTracker
+
+
+def test_edges_close_on_the_next_present():
+    tracker = LatencyTracker(max_ms=100)
+    tracker.on_edge(0, 1, True, 10.0)      # disabled: ignored
+    tracker.on_present(20.0)
+    assert tracker.summary() == []
+
+    tracker.toggle()
+    for i, lat in enumerate((4, 6, 8, 250)):
+        t = 1000.0 * i
+        tracker.on_edge(0, 1, True, t)
+        tracker.on_edge(0, 2, False, t + 1)
+        tracker.on_present(t + lat)
+    (b1, n1, mn1, p50_1, _, _, mx1), (b2, n2, mn2, _, _, _, _) = tracker.summary()
+    assert (b1, n1, mn1, p50_1, mx1) == (1, 4, 4, 6, 250)
+    assert (b2, n2, mn2) == (2, 4, 3)
+    assert tracker.hist[1].counts[101] == 1   # above max_ms lands in the last bucket
+
+    tracker.reset()
+    assert tracker.summary() == []
+    tracker.on_present(5000.0)
+    assert tracker.summary() == []
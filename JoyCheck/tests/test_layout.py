@@ -0,0 +1,15 @@
+from pathlib import Path
+
+from layout import LayoutSet
+
+LAYOUT_DIR = Path(__file__).resolve().parent.parent / "layouts"
+
+
+def test_default_face_buttons_form_a_cross():
+    layout = LayoutSet(LAYOUT_DIR).default
+    buttons = {wd.label: wd for wd in layout.compile(0, 80, 1280, 560) if wd.kind == 'button'}
+    a, b, x, y = buttons['A'], buttons['B'], buttons['X'], buttons['Y']
+    assert a.cy == y.cy
+    assert x.cx == b.cx
+    assert y.cx < x.cx < a.cx
+    assert x.cy < a.cy < b.cy
@@ -0,0 +1,40 @@
+import random
+
+from resolution import AxisLevels, ResolutionStore
+
+
+def test_values_match_a_full_scan():
+    lv = AxisLevels()
+    rng = random.Random(3)
+    seen = {rng.randint(-32768, 32767) for _ in range(500)} | {-32768, 32767, 0}
+    for v in seen:
+        lv.add(v)
+    assert lv.values() == sorted(seen)
+    assert lv.distinct == len(seen)
+
+
+def test_tick_analyzes_only_the_given_device():
+    class Dev:
+        instance_id = 7
+        levels = [AxisLevels() for _ in range(6)]
+    store = ResolutionStore(interval_s=0.0)
+    store.toggle()
+    store.tick(1.0, Dev)
+    assert list(store.reports) == [7]
+    store.tick(2.0, None)
+    assert store.get(7) is None
+
+
+def test_prune_drops_removed_devices():
+    class Dev:
+        instance_id = 3
+        levels = [AxisLevels() for _ in range(6)]
+    store = ResolutionStore(interval_s=10.0)
+    store.toggle()
+    store.tick(10.0, Dev)
+    store.prune({3: Dev})
+    assert store.get(3) is not None
+    store.prune({})
+    assert store.get(3) is None
+    store.tick(11.0, Dev)   # within the interval, but the pruned store re-runs at once
+    assert store.get(3) is not None
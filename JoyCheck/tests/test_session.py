@@ -0,0 +1,28 @@
+from input_device import DeviceManager
+from session import SessionRecorder, SessionReplayer
+
+
+def test_raw_joystick_round_trip(tmp_path):
+    path = tmp_path / "raw.jcs"
+    src = DeviceManager()
+    joy = src.add_virtual_joystick("Wheel", "abc", (3, 20, 1, 1))
+    recorder = SessionRecorder(src.joysticks, path=path)
+    src.set_recorder(recorder)
+    joy.set_button(17, True)
+    joy.set_axis(2, -12000)
+    joy.set_hat(0, 0x03)
+    joy.move_ball(0, 5, -7)
+    recorder.frame()
+    recorder.close()
+
+    dst = DeviceManager()
+    replayer = SessionReplayer(dst, path, realtime=False)
+    assert replayer.poll()
+    (copy,) = dst.joysticks.values()
+    assert copy.shape == (3, 20, 1, 1)
+    assert copy.mask == 1 << 17
+    assert list(copy.axes) == [0, 0, -12000]
+    assert list(copy.hats) == [0x03]
+    assert list(copy.balls) == [5, -7]
+    replayer.close()
+    assert not dst.joysticks
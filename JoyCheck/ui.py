@@ -1,23 +1,75 @@
 from pathlib import Path
+from array import array
+from collections import OrderedDict
+import ctypes
 import math
+import threading
 import sdl2
 import sdl2.surface
-import sdl2.sdlttf as sdlttf
 
-from config import PAD, PANEL_BG, PANEL_ACCENT, AXIS_BAR_BG, AXIS_BAR_FG
-
-try:
-    from port_gui.gui import FontManager
-except Exception:
-    FontManager = None
+from config import (BG_COLOR, PANEL_BG, PANEL_ACCENT, AXIS_BAR_BG, AXIS_BAR_FG,
+                    TEXT_CACHE_MAX_ENTRIES, TEXT_CACHE_MAX_BYTES,
+                    SPRITE_CACHE_MAX_ENTRIES, SPRITE_CACHE_MAX_BYTES)
+from input_device import button_name, axis_name
+
+# Imported on first TTF use: loading SDL_ttf (and port_gui) is slow on SD cards
+sdlttf = None
+FontManager = None
+_ttf_imported = False
+
+
+def _import_ttf():
+    global sdlttf, FontManager, _ttf_imported
+    if _ttf_imported:
+        return
+    try:
+        import sdl2.sdlttf as mod
+        sdlttf = mod
+    except Exception:
+        sdlttf = None
+    try:
+        from port_gui.gui import FontManager as fm
+        FontManager = fm
+    except Exception:
+        FontManager = None
+    _ttf_imported = True
+
+
+def _sdl_version_at_least(major, minor, patch):
+    ver = sdl2.SDL_version()
+    sdl2.SDL_GetVersion(ctypes.byref(ver))
+    return (ver.major, ver.minor, ver.patch) >= (major, minor, patch)
+
+
+# SDL_RenderGeometry(Raw) only exists since SDL 2.0.18, and older PySDL2
+# builds have no binding for it even on a newer libSDL
+HAS_RENDER_GEOMETRY = (_sdl_version_at_least(2, 0, 18)
+                       and hasattr(sdl2, 'SDL_RenderGeometryRaw'))
+_WHITE = sdl2.SDL_Color(255, 255, 255, 255)
+
+
+def _texture_from_rgba(renderer, w, h, pixels):
+    """Create a blended static texture from a bytearray of RGBA32 pixels."""
+    tex = sdl2.SDL_CreateTexture(renderer, sdl2.SDL_PIXELFORMAT_RGBA32,
+                                 sdl2.SDL_TEXTUREACCESS_STATIC, w, h)
+    if not tex:
+        return None
+    buf = (ctypes.c_ubyte * len(pixels)).from_buffer(pixels)
+    if sdl2.SDL_UpdateTexture(tex, None, buf, w * 4) != 0:
+        sdl2.SDL_DestroyTexture(tex)
+        return None
+    sdl2.SDL_SetTextureBlendMode(tex, sdl2.SDL_BLENDMODE_BLEND)
+    return tex
 
 
 class EventLog:
     def __init__(self, max_lines=200):
         from collections import deque
         self.lines = deque(maxlen=max_lines)
+        self.version = 0
     def add(self, text: str):
         self.lines.append(text)
+        self.version += 1
     def tail(self, n):
         n = max(0, n)
         if n >= len(self.lines):
@@ -25,6 +77,274 @@ class EventLog:
         return list(self.lines)[-n:]
     def clear(self):
         self.lines.clear()
+        self.version += 1
+
+
+class TextureCache:
+    """Bounded LRU of textures, e.g. rendered text keyed by (text, color, size).
+
+    Evicts least recently used entries once either the entry count or the
+    total texture memory (w * h * 4 bytes) goes over its limit.
+    """
+    def __init__(self, max_entries=TEXT_CACHE_MAX_ENTRIES, max_bytes=TEXT_CACHE_MAX_BYTES):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._entries = OrderedDict()  # key -> (texture, w, h)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    def __len__(self):
+        return len(self._entries)
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+    def put(self, key, texture, w, h):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._release(old)
+        self._entries[key] = (texture, w, h)
+        self.bytes += w * h * 4
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                          or self.bytes > self.max_bytes):
+            _key, entry = self._entries.popitem(last=False)
+            self._release(entry)
+            self.evictions += 1
+    def _release(self, entry):
+        tex, w, h = entry
+        self.bytes -= w * h * 4
+        if tex:
+            sdl2.SDL_DestroyTexture(tex)
+    def clear(self):
+        """Drop every texture, e.g. after a renderer reset or a resize."""
+        while self._entries:
+            _key, entry = self._entries.popitem()
+            self._release(entry)
+        self.bytes = 0
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self.bytes,
+                'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+
+class _Canvas:
+    """Tiny RGBA32 software raster used to bake sprites once."""
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.buf = bytearray(w * h * 4)
+    def point(self, x, y, color):
+        if 0 <= x < self.w and 0 <= y < self.h:
+            self._over((y * self.w + x) * 4, color)
+    def hline(self, x0, x1, y, color):
+        if not 0 <= y < self.h:
+            return
+        x0 = max(0, x0)
+        x1 = min(self.w - 1, x1)
+        if x1 < x0:
+            return
+        if color[3] == 255:
+            start = (y * self.w + x0) * 4
+            self.buf[start:start + (x1 - x0 + 1) * 4] = bytes(color) * (x1 - x0 + 1)
+            return
+        for x in range(x0, x1 + 1):
+            self._over((y * self.w + x) * 4, color)
+    def vline(self, x, y0, y1, color):
+        for y in range(max(0, y0), min(self.h - 1, y1) + 1):
+            self.point(x, y, color)
+    def _over(self, i, color):
+        r, g, b, a = color
+        buf = self.buf
+        da = buf[i + 3]
+        if a == 255 or da == 0:
+            buf[i:i + 4] = bytes(color)
+            return
+        keep = da * (255 - a) // 255
+        oa = a + keep
+        buf[i] = (r * a + buf[i] * keep) // oa
+        buf[i + 1] = (g * a + buf[i + 1] * keep) // oa
+        buf[i + 2] = (b * a + buf[i + 2] * keep) // oa
+        buf[i + 3] = oa
+    # Same pixel coverage as the UIRenderer line/point primitives
+    def disc(self, cx, cy, r, color):
+        for dy in range(-r, r + 1):
+            w = int((r*r - dy*dy) ** 0.5)
+            self.hline(cx - w, cx + w, cy + dy, color)
+    def ring(self, cx, cy, r, color):
+        steps = max(24, int(r * 0.8))
+        for i in range(steps):
+            ang = 2 * math.pi * i / steps
+            self.point(int(cx + r * math.cos(ang)), int(cy + r * math.sin(ang)), color)
+
+
+def _triangle_spans(p1, p2, p3):
+    """Scanlines (y, x_left, x_right) covering a triangle."""
+    pts = sorted([p1, p2, p3], key=lambda p: p[1])
+    (x1,y1),(x2,y2),(x3,y3)=pts
+    def interp(y, xa,ya, xb,yb):
+        if yb==ya: return xa
+        return xa + (xb-xa)*(y-ya)/(yb-ya)
+    y = int(y1)
+    while y <= int(y3):
+        if y < y2:
+            xa = interp(y, x1,y1, x2,y2)
+            xb = interp(y, x1,y1, x3,y3)
+        else:
+            xa = interp(y, x2,y2, x3,y3)
+            xb = interp(y, x1,y1, x3,y3)
+        if xa>xb: xa,xb=xb,xa
+        yield y, xa, xb
+        y += 1
+
+
+def _bake_stick(r, dzr):
+    c = _Canvas(2*r + 1, 2*r + 1)
+    c.disc(r, r, r, (40, 44, 48, 255))
+    c.ring(r, r, r, (100, 105, 110, 255))
+    c.ring(r, r, int(r*0.86), (140,145,150,255))
+    if dzr > 0:
+        c.ring(r, r, dzr, (200, 180, 120, 180))
+    c.hline(0, 2*r, r, (120,125,130,200))
+    c.vline(r, 0, 2*r, (120,125,130,200))
+    return c
+
+
+class SpriteCache:
+    """Composite shapes (the stick well) rasterized once per size into textures.
+
+    Keys are tuples starting with the shape name; the rest are the arguments
+    of the matching baker. Owners clear it when the layout size changes.
+    """
+    BAKERS = {'stick': _bake_stick}
+    def __init__(self, renderer, batch=None):
+        self.ren = renderer
+        self.batch = batch   # flushed before each copy to keep draw order
+        self.cache = TextureCache(SPRITE_CACHE_MAX_ENTRIES, SPRITE_CACHE_MAX_BYTES)
+    def get(self, key):
+        """Return (texture, w, h), or None if the sprite cannot be a texture."""
+        entry = self.cache.get(key)
+        if entry is None:
+            canvas = self.BAKERS[key[0]](*key[1:])
+            tex = _texture_from_rgba(self.ren, canvas.w, canvas.h, canvas.buf)
+            entry = (tex, canvas.w, canvas.h)
+            self.cache.put(key, tex, canvas.w, canvas.h)
+        return entry if entry[0] else None
+    def blit(self, key, x, y):
+        entry = self.get(key)
+        if entry is None:
+            return False
+        tex, w, h = entry
+        if self.batch is not None:
+            self.batch.flush()
+        sdl2.SDL_RenderCopy(self.ren, tex, None, sdl2.SDL_Rect(x, y, w, h))
+        return True
+    def clear(self):
+        self.cache.clear()
+
+
+class GeometryBatch:
+    """Command buffer for the untextured primitives.
+
+    Shapes are appended as triangles to packed vertex (float x, y) and
+    color (RGBA bytes) arrays, and flush() submits them all in one
+    SDL_RenderGeometryRaw call. Without RenderGeometry (SDL < 2.0.18 or
+    no PySDL2 binding) they are kept as rects instead and sent with one
+    SDL_RenderFillRects per run of equal color. Anything that copies a texture or switches
+    the render target flushes first, so draw order is kept.
+    """
+    def __init__(self, renderer, geometry=HAS_RENDER_GEOMETRY):
+        self.ren = renderer
+        self.geometry = bool(geometry)
+        self.xy = array('f')
+        self.rgba = array('B')
+        self._runs = []     # fallback: [(color, [SDL_Rect, ...]), ...] in draw order
+        self._fans = {}     # segments -> unit circle points
+        self.flushes = 0
+
+    def _rects(self, color):
+        if not self._runs or self._runs[-1][0] != color:
+            self._runs.append((color, []))
+        return self._runs[-1][1]
+
+    def rect(self, x, y, w, h, color):
+        if w <= 0 or h <= 0:
+            return
+        if self.geometry:
+            x1, y1 = x + w, y + h
+            self.xy.extend((x, y, x1, y, x1, y1, x, y, x1, y1, x, y1))
+            self.rgba.frombytes(bytes(color) * 6)
+        else:
+            self._rects(tuple(color)).append(sdl2.SDL_Rect(x, y, w, h))
+
+    def outline(self, x, y, w, h, color):
+        """One-pixel border inside the rect, like SDL_RenderDrawRect."""
+        self.rect(x, y, w, 1, color)
+        if h > 1:
+            self.rect(x, y + h - 1, w, 1, color)
+            self.rect(x, y + 1, 1, h - 2, color)
+            self.rect(x + w - 1, y + 1, 1, h - 2, color)
+
+    def disc(self, cx, cy, r, color):
+        """Filled circle as a triangle fan (scanline spans in the fallback)."""
+        if not self.geometry:
+            rects = self._rects(tuple(color))
+            for dy in range(-r, r + 1):
+                w = int((r*r - dy*dy) ** 0.5)
+                rects.append(sdl2.SDL_Rect(cx - w, cy + dy, 2*w + 1, 1))
+            return
+        n = max(12, min(64, r))
+        unit = self._fans.get(n)
+        if unit is None:
+            unit = self._fans[n] = [(math.cos(2 * math.pi * i / n), math.sin(2 * math.pi * i / n))
+                                    for i in range(n + 1)]
+        ox, oy, rr = cx + 0.5, cy + 0.5, r + 0.5
+        pts = [(ox + rr * c, oy + rr * s) for c, s in unit]
+        xy = self.xy
+        for (ax, ay), (bx, by) in zip(pts, pts[1:]):
+            xy.extend((ox, oy, ax, ay, bx, by))
+        self.rgba.frombytes(bytes(color) * (3 * n))
+
+    def ring(self, cx, cy, r, color):
+        """Dotted circle outline: the points the old per-point loop drew."""
+        steps = max(24, int(r * 0.8))
+        for i in range(steps):
+            ang = 2 * math.pi * i / steps
+            self.rect(int(cx + r * math.cos(ang)), int(cy + r * math.sin(ang)), 1, 1, color)
+
+    def triangle(self, p1, p2, p3, color):
+        if self.geometry:
+            self.xy.extend((p1[0], p1[1], p2[0], p2[1], p3[0], p3[1]))
+            self.rgba.frombytes(bytes(color) * 3)
+            return
+        rects = self._rects(tuple(color))
+        for y, xa, xb in _triangle_spans(p1, p2, p3):
+            rects.append(sdl2.SDL_Rect(int(xa), y, int(xb) - int(xa) + 1, 1))
+
+    def flush(self):
+        """Submit everything queued since the last flush."""
+        if self.geometry:
+            n = len(self.xy) // 2
+            if not n:
+                return
+            xy = (ctypes.c_float * len(self.xy)).from_buffer(self.xy)
+            col = (sdl2.SDL_Color * n).from_buffer(self.rgba)
+            sdl2.SDL_RenderGeometryRaw(self.ren, None, xy, 8, col, 4, None, 0, n, None, 0, 0)
+            del xy, col   # release the buffer exports before resizing
+            del self.xy[:]
+            del self.rgba[:]
+        else:
+            if not self._runs:
+                return
+            for color, rects in self._runs:
+                sdl2.SDL_SetRenderDrawColor(self.ren, *color)
+                sdl2.SDL_RenderFillRects(self.ren, (sdl2.SDL_Rect * len(rects))(*rects), len(rects))
+            self._runs = []
+        self.flushes += 1
 
 
 class TinyFont:
@@ -65,61 +385,314 @@ class TinyFont:
         '7':[0b11111,0b00001,0b00010,0b00100,0b01000,0b10000,0b10000],
         '8':[0b01110,0b10001,0b10001,0b01110,0b10001,0b10001,0b01110],
         '9':[0b01110,0b10001,0b10001,0b01111,0b00001,0b00010,0b01100],
+        'a':[0b00000,0b00000,0b01110,0b00001,0b01111,0b10001,0b01111],
+        'b':[0b10000,0b10000,0b10110,0b11001,0b10001,0b10001,0b11110],
+        'c':[0b00000,0b00000,0b01110,0b10000,0b10000,0b10001,0b01110],
+        'd':[0b00001,0b00001,0b01101,0b10011,0b10001,0b10001,0b01111],
+        'e':[0b00000,0b00000,0b01110,0b10001,0b11111,0b10000,0b01110],
+        'f':[0b00110,0b01001,0b01000,0b11100,0b01000,0b01000,0b01000],
+        'g':[0b00000,0b01111,0b10001,0b10001,0b01111,0b00001,0b01110],
+        'h':[0b10000,0b10000,0b10110,0b11001,0b10001,0b10001,0b10001],
+        'i':[0b00100,0b00000,0b01100,0b00100,0b00100,0b00100,0b01110],
+        'j':[0b00010,0b00000,0b00110,0b00010,0b00010,0b10010,0b01100],
+        'k':[0b10000,0b10000,0b10010,0b10100,0b11000,0b10100,0b10010],
+        'l':[0b01100,0b00100,0b00100,0b00100,0b00100,0b00100,0b01110],
+        'm':[0b00000,0b00000,0b11010,0b10101,0b10101,0b10001,0b10001],
+        'n':[0b00000,0b00000,0b10110,0b11001,0b10001,0b10001,0b10001],
+        'o':[0b00000,0b00000,0b01110,0b10001,0b10001,0b10001,0b01110],
+        'p':[0b00000,0b00000,0b11110,0b10001,0b11110,0b10000,0b10000],
+        'q':[0b00000,0b00000,0b01101,0b10011,0b01111,0b00001,0b00001],
+        'r':[0b00000,0b00000,0b10110,0b11001,0b10000,0b10000,0b10000],
+        's':[0b00000,0b00000,0b01110,0b10000,0b01110,0b00001,0b11110],
+        't':[0b01000,0b01000,0b11100,0b01000,0b01000,0b01001,0b00110],
+        'u':[0b00000,0b00000,0b10001,0b10001,0b10001,0b10011,0b01101],
+        'v':[0b00000,0b00000,0b10001,0b10001,0b10001,0b01010,0b00100],
+        'w':[0b00000,0b00000,0b10001,0b10001,0b10101,0b10101,0b01010],
+        'x':[0b00000,0b00000,0b10001,0b01010,0b00100,0b01010,0b10001],
+        'y':[0b00000,0b00000,0b10001,0b10001,0b01111,0b00001,0b01110],
+        'z':[0b00000,0b00000,0b11111,0b00010,0b00100,0b01000,0b11111],
+        '!':[0b00100,0b00100,0b00100,0b00100,0b00000,0b00000,0b00100],
+        '"':[0b01010,0b01010,0b01010,0b00000,0b00000,0b00000,0b00000],
+        '#':[0b01010,0b01010,0b11111,0b01010,0b11111,0b01010,0b01010],
+        '$':[0b00100,0b01111,0b10100,0b01110,0b00101,0b11110,0b00100],
+        '%':[0b11000,0b11001,0b00010,0b00100,0b01000,0b10011,0b00011],
+        '&':[0b01100,0b10010,0b10100,0b01000,0b10101,0b10010,0b01101],
+        "'":[0b01100,0b00100,0b01000,0b00000,0b00000,0b00000,0b00000],
+        '(':[0b00010,0b00100,0b01000,0b01000,0b01000,0b00100,0b00010],
+        ')':[0b01000,0b00100,0b00010,0b00010,0b00010,0b00100,0b01000],
+        '*':[0b00000,0b00100,0b10101,0b01110,0b10101,0b00100,0b00000],
+        '+':[0b00000,0b00100,0b00100,0b11111,0b00100,0b00100,0b00000],
+        ',':[0b00000,0b00000,0b00000,0b00000,0b01100,0b00100,0b01000],
+        '-':[0b00000,0b00000,0b00000,0b11111,0b00000,0b00000,0b00000],
+        '.':[0b00000,0b00000,0b00000,0b00000,0b00000,0b01100,0b01100],
+        '/':[0b00000,0b00001,0b00010,0b00100,0b01000,0b10000,0b00000],
+        ':':[0b00000,0b01100,0b01100,0b00000,0b01100,0b01100,0b00000],
+        ';':[0b00000,0b01100,0b01100,0b00000,0b01100,0b00100,0b01000],
+        '<':[0b00010,0b00100,0b01000,0b10000,0b01000,0b00100,0b00010],
+        '=':[0b00000,0b00000,0b11111,0b00000,0b11111,0b00000,0b00000],
+        '>':[0b01000,0b00100,0b00010,0b00001,0b00010,0b00100,0b01000],
+        '?':[0b01110,0b10001,0b00001,0b00010,0b00100,0b00000,0b00100],
+        '@':[0b01110,0b10001,0b00001,0b01101,0b10101,0b10101,0b01110],
+        '[':[0b01110,0b01000,0b01000,0b01000,0b01000,0b01000,0b01110],
+        '\\':[0b00000,0b10000,0b01000,0b00100,0b00010,0b00001,0b00000],
+        ']':[0b01110,0b00010,0b00010,0b00010,0b00010,0b00010,0b01110],
+        '^':[0b00100,0b01010,0b10001,0b00000,0b00000,0b00000,0b00000],
+        '_':[0b00000,0b00000,0b00000,0b00000,0b00000,0b00000,0b11111],
+        '`':[0b01000,0b00100,0b00010,0b00000,0b00000,0b00000,0b00000],
+        '{':[0b00010,0b00100,0b00100,0b01000,0b00100,0b00100,0b00010],
+        '|':[0b00100,0b00100,0b00100,0b00100,0b00100,0b00100,0b00100],
+        '}':[0b01000,0b00100,0b00100,0b00010,0b00100,0b00100,0b01000],
+        '~':[0b00000,0b00000,0b01000,0b10101,0b00010,0b00000,0b00000],
         ' ': [0b00000]*7,
     }
     W, H = 5, 7
+    COLOR = (230, 230, 230, 255)
     def __init__(self, renderer, scale=2):
         self.ren = renderer
         self.scale = max(1, int(scale))
+        self._chars = ''.join(self.GLYPHS)
+        self._index = {ch: i for i, ch in enumerate(self._chars)}
+        self._runs = {ch: self._glyph_runs(bits) for ch, bits in self.GLYPHS.items()}
+        self._atlas = {}   # scale -> SDL_Texture (None if it could not be created)
+        self._atlas_for(self.scale)
+    def _glyph(self, ch):
+        if ch in self._index:
+            return ch
+        up = ch.upper()
+        return up if up in self._index else '?'
+    def _glyph_runs(self, bits):
+        """Lit pixels of a glyph merged into horizontal runs: [(col, row, len), ...]."""
+        runs = []
+        for row, b in enumerate(bits):
+            col = 0
+            while col < self.W:
+                if b & (1 << (self.W - 1 - col)):
+                    start = col
+                    while col < self.W and b & (1 << (self.W - 1 - col)):
+                        col += 1
+                    runs.append((start, row, col - start))
+                else:
+                    col += 1
+        return runs
+    def _atlas_for(self, scale):
+        """One white-on-transparent texture holding every glyph at this scale."""
+        if scale in self._atlas:
+            return self._atlas[scale]
+        gw, gh = self.W * scale, self.H * scale
+        aw = gw * len(self._chars)
+        buf = bytearray(aw * gh * 4)
+        for i, ch in enumerate(self._chars):
+            for col, row, n in self._runs[ch]:
+                for py in range(row * scale, (row + 1) * scale):
+                    start = (py * aw + i * gw + col * scale) * 4
+                    buf[start:start + n * scale * 4] = b'\xff' * (n * scale * 4)
+        tex = _texture_from_rgba(self.ren, aw, gh, buf)
+        if tex:
+            sdl2.SDL_SetTextureColorMod(tex, *self.COLOR[:3])
+            sdl2.SDL_SetTextureAlphaMod(tex, self.COLOR[3])
+        self._atlas[scale] = tex
+        return tex
+    def invalidate(self):
+        """Rebuild atlases after a renderer reset."""
+        scales = list(self._atlas)
+        self.destroy()
+        for scale in scales:
+            self._atlas_for(scale)
+    def destroy(self):
+        """Free the atlases (the font is being dropped)."""
+        for tex in self._atlas.values():
+            if tex:
+                sdl2.SDL_DestroyTexture(tex)
+        self._atlas.clear()
     def size(self, text):
         return ((self.W+1)*self.scale*len(text), self.H*self.scale)
     def draw(self, text, x, y):
+        text = [self._glyph(ch) for ch in str(text)]
+        if not text:
+            return
+        tex = self._atlas_for(self.scale)
+        if tex and HAS_RENDER_GEOMETRY:
+            self._draw_geometry(tex, text, x, y)
+        elif tex:
+            sx = self.scale
+            gw, gh = self.W * sx, self.H * sx
+            src = sdl2.SDL_Rect(0, 0, gw, gh)
+            dst = sdl2.SDL_Rect(x, y, gw, gh)
+            for ch in text:
+                if ch != ' ':
+                    src.x = self._index[ch] * gw
+                    sdl2.SDL_RenderCopy(self.ren, tex, src, dst)
+                dst.x += (self.W + 1) * sx
+        else:
+            self._draw_rects(text, x, y)
+    def _draw_geometry(self, tex, text, x, y):
+        """Whole string as one textured triangle list."""
+        sx = self.scale
+        gw, gh = self.W * sx, self.H * sx
+        step = (self.W + 1) * sx
+        du = 1.0 / len(self._chars)
+        xy = array('f')
+        uv = array('f')
+        n = 0
+        for ch in text:
+            if ch != ' ':
+                u0 = self._index[ch] * du
+                x1 = x + gw
+                y1 = y + gh
+                xy.extend((x, y, x1, y, x1, y1, x, y1))
+                uv.extend((u0, 0.0, u0 + du, 0.0, u0 + du, 1.0, u0, 1.0))
+                n += 1
+            x += step
+        if not n:
+            return
+        idx = array('i')
+        for q in range(0, n * 4, 4):
+            idx.extend((q, q + 1, q + 2, q, q + 2, q + 3))
+        sdl2.SDL_RenderGeometryRaw(self.ren, tex,
+            (ctypes.c_float * len(xy)).from_buffer(xy), 8,
+            _WHITE, 0,
+            (ctypes.c_float * len(uv)).from_buffer(uv), 8,
+            n * 4, (ctypes.c_int * len(idx)).from_buffer(idx), len(idx), 4)
+    def _draw_rects(self, text, x, y):
+        """Fallback without an atlas: every run of every glyph in one FillRects call."""
         sx = self.scale
-        for ch in str(text).upper():
-            glyph = self.GLYPHS.get(ch, self.GLYPHS[' '])
-            for row, bits in enumerate(glyph):
-                for col in range(self.W):
-                    if bits & (1 << (self.W - 1 - col)):
-                        rx = x + col * sx
-                        ry = y + row * sx
-                        sdl2.SDL_SetRenderDrawColor(self.ren, 230, 230, 230, 255)
-                        sdl2.SDL_RenderFillRect(self.ren, sdl2.SDL_Rect(rx, ry, sx, sx))
-            x += (self.W + 1) * sx
+        step = (self.W + 1) * sx
+        rects = []
+        for ch in text:
+            for col, row, n in self._runs[ch]:
+                rects.append(sdl2.SDL_Rect(x + col * sx, y + row * sx, n * sx, sx))
+            x += step
+        if rects:
+            sdl2.SDL_SetRenderDrawColor(self.ren, *self.COLOR)
+            sdl2.SDL_RenderFillRects(self.ren, (sdl2.SDL_Rect * len(rects))(*rects), len(rects))
 
 
 class Font:
-    def __init__(self, renderer):
+    """TTF text with a TinyFont fallback.
+
+    With background=True the constructor returns at once with TinyFont and
+    SDL_ttf is imported and the font opened on a worker thread; the render
+    loop calls poll_loaded() to swap it in once ready.
+    """
+    def __init__(self, renderer, use_ttf=True, background=False, batch=None):
         self.renderer = renderer
+        self.batch = batch   # GeometryBatch flushed before each string
         self.color = sdl2.SDL_Color(230, 230, 230, 255)
         self.ttf = None
+        self.size = 18
         self.fm = None
         self.tiny = None
+        self.cache = TextureCache(TEXT_CACHE_MAX_ENTRIES, TEXT_CACHE_MAX_BYTES)
+        self._loader = None
+        self._loaded = None
+        if not use_ttf:
+            self.tiny = TinyFont(renderer, scale=2)
+            return
+        if background:
+            self.tiny = TinyFont(renderer, scale=2)
+            self._loader = threading.Thread(target=self._load_worker, name="joycheck-font", daemon=True)
+            self._loader.start()
+            return
+        self._install(self._open_ttf())
+    def _open_ttf(self):
+        """Import SDL_ttf and open the bundled font; no renderer access (thread safe)."""
+        _import_ttf()
+        if sdlttf is None:
+            return None
+        if sdlttf.TTF_WasInit() == 0:
+            sdlttf.TTF_Init()
+        font_path = Path("Roboto-Regular.ttf")
+        if not font_path.exists():
+            return None
+        return sdlttf.TTF_OpenFont(bytes(str(font_path), "utf-8"), self.size) or None
+    def _load_worker(self):
+        try:
+            self._loaded = (self._open_ttf(),)
+        except Exception:
+            self._loaded = (None,)
+    def _install(self, ttf):
+        """Use FontManager when port_gui provides one, else the opened TTF font."""
         if FontManager is not None:
             try:
-                self.fm = FontManager(renderer)
+                self.fm = FontManager(self.renderer)
                 font_path = Path("Roboto-Regular.ttf")
                 if font_path.exists():
                     self.fm.load(str(font_path))
             except Exception:
                 self.fm = None
         if self.fm is None:
-            if sdlttf.TTF_WasInit() == 0:
-                sdlttf.TTF_Init()
-            font_path = Path("Roboto-Regular.ttf")
-            if font_path.exists():
-                self.ttf = sdlttf.TTF_OpenFont(bytes(str(font_path), "utf-8"), 18)
+            self.ttf = ttf
+        elif ttf:
+            sdlttf.TTF_CloseFont(ttf)
         if self.fm is None and self.ttf is None:
-            self.tiny = TinyFont(renderer, scale=2)
+            if self.tiny is None:
+                self.tiny = TinyFont(self.renderer, scale=2)
+        elif self.tiny is not None:
+            self.tiny.destroy()
+            self.tiny = None
+    @property
+    def loading(self):
+        return self._loader is not None
+    def poll_loaded(self) -> bool:
+        """Swap in the font from the background loader; True if text metrics changed."""
+        if self._loader is None or self._loaded is None:
+            return False
+        self._loader.join()
+        self._loader = None
+        ttf, = self._loaded
+        self._loaded = None
+        self._install(ttf)
+        if self.fm is None and self.ttf is None:
+            return False
+        self.cache.clear()
+        return True
+    def _texture(self, text):
+        """Return cached (texture, w, h) for text, rasterizing it on a miss."""
+        c = self.color
+        key = (text, (c.r, c.g, c.b, c.a), self.size)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry
+        surf = sdlttf.TTF_RenderUTF8_Blended(self.ttf, text.encode("utf-8"), c)
+        if not surf:
+            return None
+        w, h = surf.contents.w, surf.contents.h
+        tex = sdl2.SDL_CreateTextureFromSurface(self.renderer, surf)
+        sdl2.SDL_FreeSurface(surf)
+        if not tex:
+            return None
+        self.cache.put(key, tex, w, h)
+        return (tex, w, h)
+    def invalidate(self):
+        """Forget cached textures (renderer reset or window resize)."""
+        self.cache.clear()
+        if self.tiny is not None:
+            self.tiny.invalidate()
+    def close(self):
+        """Free the cached textures and close the TTF font (renderer teardown)."""
+        if self._loader is not None:
+            self._loader.join()
+            self.poll_loaded()
+        self.cache.clear()
+        if self.ttf:
+            sdlttf.TTF_CloseFont(self.ttf)
+            self.ttf = None
+        if self.tiny is not None:
+            self.tiny.destroy()
+            self.tiny = None
     def text_size(self, text):
+        text = str(text)
         if self.ttf:
-            w = sdl2.Sint32()
-            h = sdl2.Sint32()
-            if sdlttf.TTF_SizeUTF8(self.ttf, text.encode("utf-8"), w, h) == 0:
-                return int(w.value), int(h.value)
+            entry = self._texture(text)
+            if entry is not None:
+                return entry[1], entry[2]
         if self.tiny:
             return self.tiny.size(text)
         return (len(text)*8, 16)
     def draw_text(self, text: str, x: int, y: int):
+        text = str(text)
+        if self.batch is not None:
+            self.batch.flush()
         if self.fm is not None:
             try:
                 self.fm.draw(text, x, y)
@@ -127,13 +700,10 @@ class Font:
             except Exception:
                 pass
         if self.ttf:
-            surf = sdlttf.TTF_RenderUTF8_Blended(self.ttf, text.encode("utf-8"), self.color)
-            if surf:
-                tex = sdl2.SDL_CreateTextureFromSurface(self.renderer, surf)
-                dst = sdl2.SDL_Rect(x, y, surf.contents.w, surf.contents.h)
-                sdl2.SDL_RenderCopy(self.renderer, tex, None, dst)
-                sdl2.SDL_DestroyTexture(tex)
-                sdl2.SDL_FreeSurface(surf)
+            entry = self._texture(text)
+            if entry is not None:
+                tex, w, h = entry
+                sdl2.SDL_RenderCopy(self.renderer, tex, None, sdl2.SDL_Rect(x, y, w, h))
                 return
         if self.tiny is not None:
             self.tiny.draw(text, x, y)
@@ -143,116 +713,151 @@ class Font:
 
 
 class UIRenderer:
-    def __init__(self, renderer, devmgr, eventlog: EventLog):
+    def __init__(self, renderer, devmgr, eventlog: EventLog, use_ttf=True, background_font=False):
         self.ren = renderer
         self.devmgr = devmgr
         self.log = eventlog
-        self.font = Font(renderer)
+        self.batch = GeometryBatch(renderer)
+        self.font = Font(renderer, use_ttf=use_ttf, background=background_font, batch=self.batch)
+        self.sprites = SpriteCache(renderer, self.batch)
+        # None draws widgets whole; 'static' draws only their idle look and
+        # 'dynamic' only what changes on top of it (see ui_layers)
+        self.layer = None
+        self._body = None   # BodyRenderer behind draw_body()
+
+    def invalidate(self):
+        """Drop every cached texture (renderer reset or window resize)."""
+        self.font.invalidate()
+        self.sprites.clear()
+
+    def flush(self):
+        """Submit the queued primitives (before present or a render target switch)."""
+        self.batch.flush()
 
     def _fill_rect(self, rect, color):
-        sdl2.SDL_SetRenderDrawColor(self.ren, *color)
-        sdl2.SDL_RenderFillRect(self.ren, rect)
+        self.batch.rect(rect.x, rect.y, rect.w, rect.h, color)
     def _draw_rect(self, rect, color):
-        sdl2.SDL_SetRenderDrawColor(self.ren, *color)
-        sdl2.SDL_RenderDrawRect(self.ren, rect)
+        self.batch.outline(rect.x, rect.y, rect.w, rect.h, color)
     def _draw_circle(self, cx, cy, r, color):
-        sdl2.SDL_SetRenderDrawColor(self.ren, *color)
-        steps = max(24, int(r * 0.8))
-        for i in range(steps):
-            ang = 2 * math.pi * i / steps
-            x = int(cx + r * math.cos(ang))
-            y = int(cy + r * math.sin(ang))
-            sdl2.SDL_RenderDrawPoint(self.ren, x, y)
+        self.batch.ring(cx, cy, r, color)
     def _fill_circle(self, cx, cy, r, color):
-        sdl2.SDL_SetRenderDrawColor(self.ren, *color)
-        for dy in range(-r, r + 1):
-            w = int((r*r - dy*dy) ** 0.5)
-            sdl2.SDL_RenderDrawLine(self.ren, cx - w, cy + dy, cx + w, cy + dy)
+        self.batch.disc(cx, cy, r, color)
     def _fill_triangle(self, p1, p2, p3, color):
-        sdl2.SDL_SetRenderDrawColor(self.ren, *color)
-        pts = sorted([p1, p2, p3], key=lambda p: p[1])
-        (x1,y1),(x2,y2),(x3,y3)=pts
-        def interp(y, xa,ya, xb,yb):
-            if yb==ya: return xa
-            return xa + (xb-xa)*(y-ya)/(yb-ya)
-        y = int(y1)
-        while y <= int(y3):
-            if y < y2:
-                xa = interp(y, x1,y1, x2,y2)
-                xb = interp(y, x1,y1, x3,y3)
-            else:
-                xa = interp(y, x2,y2, x3,y3)
-                xb = interp(y, x1,y1, x3,y3)
-            if xa>xb: xa,xb=xb,xa
-            sdl2.SDL_RenderDrawLine(self.ren, int(xa), y, int(xb), y)
-            y += 1
-
-    def _stick(self, cx, cy, r, xval, yval, deadzone):
-        self._fill_circle(cx, cy, r, (40, 44, 48, 255))
-        self._draw_circle(cx, cy, r, (100, 105, 110, 255))
-        self._draw_circle(cx, cy, int(r*0.86), (140,145,150,255))
+        self.batch.triangle(p1, p2, p3, color)
+
+    def _stick(self, cx, cy, r, xval, yval, deadzone, heat=None, processed=None, shape=None):
+        """Stick well with the raw position dot; `processed` (x, y) after the
+        deadzone engine is drawn as a second dot, `shape` 'axial' shows the
+        deadzone as a cross instead of a circle."""
+        idle = self.layer != 'dynamic'     # well and deadzone marks
+        live = self.layer != 'static'      # heatmap and position dots
         dzr = int(r*0.86*max(0.0, min(1.0, deadzone)))
-        if dzr > 0:
-            self._draw_circle(cx, cy, dzr, (200, 180, 120, 180))
-        sdl2.SDL_SetRenderDrawColor(self.ren, 120,125,130,200)
-        sdl2.SDL_RenderDrawLine(self.ren, cx - r, cy, cx + r, cy)
-        sdl2.SDL_RenderDrawLine(self.ren, cx, cy - r, cx, cy + r)
+        axial = shape == 'axial'
+        if axial:
+            band, dzr = dzr, 0
+        if idle and not self.sprites.blit(('stick', r, dzr), cx - r, cy - r):
+            self._fill_circle(cx, cy, r, (40, 44, 48, 255))
+            self._draw_circle(cx, cy, r, (100, 105, 110, 255))
+            self._draw_circle(cx, cy, int(r*0.86), (140,145,150,255))
+            if dzr > 0:
+                self._draw_circle(cx, cy, dzr, (200, 180, 120, 180))
+            self.batch.rect(cx - r, cy, 2*r + 1, 1, (120,125,130,200))
+            self.batch.rect(cx, cy - r, 1, 2*r + 1, (120,125,130,200))
+        if live and heat is not None:
+            tex = heat.texture(self.ren)
+            if tex:
+                span = int(r*0.86)
+                self.batch.flush()
+                sdl2.SDL_RenderCopy(self.ren, tex, None, sdl2.SDL_Rect(cx - span, cy - span, 2*span, 2*span))
+        if idle and axial and band > 0:
+            span = int(r*0.86)
+            self._fill_rect(sdl2.SDL_Rect(cx - band, cy - span, 2*band, 2*span), (200, 180, 120, 60))
+            self._fill_rect(sdl2.SDL_Rect(cx - span, cy - band, 2*span, 2*band), (200, 180, 120, 60))
+        if not live:
+            return
         px = cx + int(int(r*0.86) * max(-1.0, min(1.0, xval)))
         py = cy + int(int(r*0.86) * max(-1.0, min(1.0, yval)))
         self._fill_rect(sdl2.SDL_Rect(px - 3, py - 3, 6, 6), (220, 230, 210, 255))
+        if processed is not None:
+            qx = cx + int(int(r*0.86) * max(-1.0, min(1.0, processed[0])))
+            qy = cy + int(int(r*0.86) * max(-1.0, min(1.0, processed[1])))
+            self._fill_rect(sdl2.SDL_Rect(qx - 3, qy - 3, 6, 6), (90, 220, 120, 255))
+
+    def _pressed_pass(self, pressed):
+        """Filter a two-state widget through the current layer: the state to
+        draw it in, or None when this pass leaves it out."""
+        if self.layer == 'static':
+            return False
+        if self.layer == 'dynamic' and not pressed:
+            return None
+        return pressed
 
     def _button_circle(self, cx, cy, r, label, pressed, color_on, color_off):
+        pressed = self._pressed_pass(pressed)
+        if pressed is None:
+            return
+        if self.layer == 'dynamic':
+            self._fill_circle(cx, cy, r, BG_COLOR)   # cover the idle button in the layer
         col = color_on if pressed else color_off
         self._fill_circle(cx, cy, r, col)
         self._draw_circle(cx, cy, r, (230,230,230,220))
         self.font.draw_center(label, cx, cy)
 
-    def _pill(self, cx, cy, w, h, label, pressed):
-        x = cx - w//2
-        y = cy - h//2
-        self._fill_rect(sdl2.SDL_Rect(x, y, w, h), (80,160,120,200) if pressed else (55,58,62,200))
-        self._draw_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_ACCENT)
-        self.font.draw_center(label, cx, cy)
-
-    def _dpad(self, cx, cy, size, dev):
-        arm = size // 3
-        gap = max(8, size // 8)  # increased spacing between D-Pad buttons
-        up_r = sdl2.SDL_Rect(cx - arm//2, cy - gap - arm, arm, arm)
-        down_r = sdl2.SDL_Rect(cx - arm//2, cy + gap, arm, arm)
-        left_r = sdl2.SDL_Rect(cx - gap - arm, cy - arm//2, arm, arm)
-        right_r = sdl2.SDL_Rect(cx + gap, cy - arm//2, arm, arm)
-        hub_r = sdl2.SDL_Rect(cx - arm//2, cy - arm//2, arm, arm)
-        def draw_btn(rect, pressed):
+    def _pill(self, rect, label, pressed):
+        pressed = self._pressed_pass(pressed)
+        if pressed is None:
+            return
+        if self.layer == 'dynamic':
+            self._fill_rect(rect, BG_COLOR)
+        self._fill_rect(rect, (80,160,120,200) if pressed else (55,58,62,200))
+        self._draw_rect(rect, PANEL_ACCENT)
+        if label is not None:
+            self.font.draw_center(label, rect.x + rect.w//2, rect.y + rect.h//2)
+
+    def _trigger_bar(self, x, y, w, h, value, raw_value=None):
+        """Analog trigger bar: filled to `value`; a tick marks `raw_value` when it differs."""
+        if self.layer != 'dynamic':
+            self._fill_rect(sdl2.SDL_Rect(x, y, w, h), AXIS_BAR_BG)
+        if self.layer == 'static':
+            return
+        fill = int(w * max(0.0, min(1.0, value)))
+        if fill > 0:
+            self._fill_rect(sdl2.SDL_Rect(x, y, fill, h), AXIS_BAR_FG)
+        if raw_value is not None and raw_value != value:
+            tx = x + int((w - 1) * max(0.0, min(1.0, raw_value)))
+            self._fill_rect(sdl2.SDL_Rect(tx, y, 1, h), (200, 180, 120, 255))
+
+    def _dpad(self, hub, arms, mask):
+        """D-pad from layout.dpad_geometry(): (rect, bit, arrow) arms around the
+        hub rect, each pressed while that bit of `mask` is set."""
+        arrow_col = (230,230,230,220)
+        drawn = []
+        for rect, bit, tri in arms:
+            pressed = self._pressed_pass(bool(mask >> bit & 1))
+            if pressed is None:
+                continue
+            if self.layer == 'dynamic':
+                self._fill_rect(rect, BG_COLOR)
             self._fill_rect(rect, (80,160,120,200) if pressed else (55,58,62,200))
             self._draw_rect(rect, PANEL_ACCENT)
-        btn_up = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_DPAD_UP', 11)
-        btn_down = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_DPAD_DOWN', 12)
-        btn_left = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_DPAD_LEFT', 13)
-        btn_right = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_DPAD_RIGHT', 14)
-        draw_btn(up_r,    dev.buttons.get(btn_up,0)==1)
-        draw_btn(down_r,  dev.buttons.get(btn_down,0)==1)
-        draw_btn(left_r,  dev.buttons.get(btn_left,0)==1)
-        draw_btn(right_r, dev.buttons.get(btn_right,0)==1)
-        self._fill_rect(hub_r, (45,48,52,200))
-        self._draw_rect(hub_r, PANEL_ACCENT)
-        arrow_col = (230,230,230,220)
-        m = 4
-        self._fill_triangle((up_r.x + up_r.w//2, up_r.y + m),
-                            (up_r.x + m, up_r.y + up_r.h - m),
-                            (up_r.x + up_r.w - m, up_r.y + up_r.h - m),
-                            arrow_col)
-        self._fill_triangle((down_r.x + down_r.w//2, down_r.y + down_r.h - m),
-                            (down_r.x + m, down_r.y + m),
-                            (down_r.x + down_r.w - m, down_r.y + m),
-                            arrow_col)
-        self._fill_triangle((left_r.x + m, left_r.y + left_r.h//2),
-                            (left_r.x + left_r.w - m, left_r.y + m),
-                            (left_r.x + left_r.w - m, left_r.y + left_r.h - m),
-                            arrow_col)
-        self._fill_triangle((right_r.x + right_r.w - m, right_r.y + right_r.h//2),
-                            (right_r.x + m, right_r.y + m),
-                            (right_r.x + m, right_r.y + right_r.h - m),
-                            arrow_col)
+            drawn.append(tri)
+        if self.layer != 'dynamic':
+            self._fill_rect(hub, (45,48,52,200))
+            self._draw_rect(hub, PANEL_ACCENT)
+        for tri in drawn:
+            self._fill_triangle(*tri, arrow_col)
+
+    def _axis_bar(self, x, y, w, h, value):
+        """Signed axis bar: filled from the centre towards `value` in -1..1."""
+        mid = x + w//2
+        if self.layer != 'dynamic':
+            self._fill_rect(sdl2.SDL_Rect(x, y, w, h), AXIS_BAR_BG)
+            self._fill_rect(sdl2.SDL_Rect(mid, y, 1, h), PANEL_ACCENT)
+        if self.layer == 'static':
+            return
+        end = mid + int((w//2) * max(-1.0, min(1.0, value)))
+        if end != mid:
+            self._fill_rect(sdl2.SDL_Rect(min(mid, end), y, abs(end - mid), h), AXIS_BAR_FG)
 
     def _draw_log(self, x, y, w, h):
         self._fill_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_BG)
@@ -265,6 +870,105 @@ class UIRenderer:
         for ln in lines:
             self.font.draw_text(ln, x + 8, py)
             py += line_h
+    def _draw_latency(self, x, y, w, h, tracker):
+        self._fill_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_BG)
+        self._draw_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_ACCENT)
+        self.font.draw_text("LATENCY  T OFF  E CSV  R RESET", x + 8, y + 8)
+        line_h = 18
+        max_lines = max(1, (h - 30) // line_h)
+        py = y + 28
+        self.font.draw_text("BTN    N  MIN P50 P95 P99", x + 8, py)
+        py += line_h
+        for btn, n, mn, p50, p95, p99, _mx in tracker.summary()[:max_lines - 1]:
+            self.font.draw_text(f"{button_name(btn)[:5]:<5}{n:>4} {mn:>4}{p50:>4}{p95:>4}{p99:>4}", x + 8, py)
+            py += line_h
+    def _draw_calibration(self, x, y, w, h, store, dev):
+        self._fill_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_BG)
+        self._draw_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_ACCENT)
+        self.font.draw_text("CALIBRATION  A OFF  J EXPORT", x + 8, y + 8)
+        line_h = 18
+        py = y + 28
+        lines = []
+        for side, label in ((0, "L"), (1, "R")):
+            res = store.get(dev.instance_id, side) if dev else None
+            if not res:
+                lines.append(f"{label}  NO DATA")
+                continue
+            if 'center' in res:
+                cx, cy = res['center']
+                lines.append(f"{label}  CTR {cx:+.3f},{cy:+.3f} NOISE {res['noise']:.3f}")
+                lines.append(f"   DEADZONE {res['deadzone']:.2f}")
+            else:
+                lines.append(f"{label}  CTR: LET THE STICK REST")
+            if 'range' in res:
+                lines.append(f"   RANGE {res['range']:.2f}  SECT {res['sectors_reached']}/{len(res['sector_max'])}")
+                lines.append(f"   CIRC {100 * res['circularity_error']:.1f}%  ASYM {100 * res.get('asymmetry', 0.0):.1f}%")
+            else:
+                lines.append("   RANGE: ROTATE THE STICK")
+        for ln in lines[:max(1, (h - 30) // line_h)]:
+            self.font.draw_text(ln, x + 8, py)
+            py += line_h
+    def _draw_resolution(self, x, y, w, h, store, dev):
+        self._fill_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_BG)
+        self._draw_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_ACCENT)
+        self.font.draw_text("RESOLUTION  B OFF", x + 8, y + 8)
+        line_h = 18
+        max_lines = max(1, (h - 30) // line_h)
+        py = y + 28
+        reports = store.get(dev.instance_id) if dev else None
+        if not reports:
+            self.font.draw_text("MOVE EVERY AXIS", x + 8, py)
+            return
+        for axis, rep in enumerate(reports[:max_lines]):
+            if rep['distinct'] < 2:
+                kind = "-"
+            elif rep.get('digital'):
+                kind = "DIGITAL"
+            else:
+                kind = f"{rep['bits']:.1f} BIT" if 'bits' in rep else "?"
+            self.font.draw_text(f"{axis_name(axis)[:12]:<12}{rep['distinct']:>6} LV  {kind}", x + 8, py)
+            py += line_h
+    def _draw_profile(self, x, y, lines):
+        """Profiler overlay: a panel of text lines anchored at its top-right corner (x, y)."""
+        line_h = 18
+        w = max(self.font.text_size(ln)[0] for ln in lines) + 16
+        h = len(lines) * line_h + 12
+        self._fill_rect(sdl2.SDL_Rect(x - w, y, w, h), PANEL_BG)
+        self._draw_rect(sdl2.SDL_Rect(x - w, y, w, h), PANEL_ACCENT)
+        py = y + 6
+        for ln in lines:
+            self.font.draw_text(ln, x - w + 8, py)
+            py += line_h
+    def _draw_frame_graph(self, x, y, w, h, recorder):
+        """Bar graph of recent frame times; red bars missed the refresh interval."""
+        self._fill_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_BG)
+        self._draw_rect(sdl2.SDL_Rect(x, y, w, h), PANEL_ACCENT)
+        s = recorder.summary()
+        if s is None:
+            self.font.draw_text("FRAME TIME: WAITING", x + 8, y + 6)
+            return
+        self.font.draw_text(f"P50 {s['p50_ms']:.1f} P99 {s['p99_ms']:.1f} MAX {s['max_ms']:.1f} "
+                            f"JIT {s['jitter_ms']:.1f} MISS {recorder.missed}", x + 8, y + 6)
+        gx, gy = x + 8, y + 28
+        gw, gh = w - 16, h - 36
+        if gw < 2 or gh < 4:
+            return
+        top = recorder.refresh_ms * 3.0
+        vals = recorder.samples()[-(gw // 2):]
+        miss = []   # bars never overlap: misses go last, in one color run
+        bx = gx + gw - 2 * len(vals)
+        for ms in vals:
+            bh = max(1, min(gh, int(gh * ms / top)))
+            if ms > recorder.miss_ms:
+                miss.append((bx, bh))
+            else:
+                self.batch.rect(bx, gy + gh - bh, 2, bh, AXIS_BAR_FG)
+            bx += 2
+        for bx, bh in miss:
+            self.batch.rect(bx, gy + gh - bh, 2, bh, (220, 60, 60, 255))
+        # Refresh interval reference line
+        ry = gy + gh - int(gh * recorder.refresh_ms / top)
+        self._fill_rect(sdl2.SDL_Rect(gx, ry, gw, 1), PANEL_ACCENT)
     # === Split methods ===
     def draw_header(self, width: int, header_h: int, stats: dict):
         from ui_header import HeaderRenderer
@@ -274,130 +978,16 @@ class UIRenderer:
         FooterRenderer(self).draw(width, height, footer_h)
     def draw_body(self, width: int, height: int, header_h: int, footer_h: int,
                   stick_deadzone=0.15, trigger_deadzone=0.05, show_log=False):
-        from ui_body import BodyRenderer
-        BodyRenderer(self).draw(width, height, header_h, footer_h,
-                                stick_deadzone, trigger_deadzone, show_log)
-
-
-
+        if self._body is None:
+            from ui_body import BodyRenderer
+            self._body = BodyRenderer(self)   # keeps its compiled layouts
+        self._body.draw(width, height, header_h, footer_h,
+                        stick_deadzone, trigger_deadzone, show_log)
     def draw(self, width: int, height: int, stick_deadzone=0.15, trigger_deadzone=0.05, stats=None, fn_key=False, show_log=False):
-        pad = max(8, int(min(width, height) * 0.015))
+        """Whole frame through the split renderers (kept for older callers)."""
         header_h = int(height * 0.10)
         footer_h = int(height * 0.10)
-        # header
-        self._fill_rect(sdl2.SDL_Rect(0, 0, width, header_h), (32, 35, 38, 255))
-        self._draw_rect(sdl2.SDL_Rect(0, 0, width, header_h), (90, 95, 100, 255))
-        hdr = f"JoyCheck  DEVS:{stats.get('devices',0) if stats else 0}  FPS:{stats.get('fps',0) if stats else 0}  DZ STICK:{stick_deadzone:.2f}  DZ TRIG:{trigger_deadzone:.2f}"
-        _hw,_hh = self.font.text_size(hdr)
-        _hy = max(0, (header_h - _hh)//2)
-        self.font.draw_text(hdr, pad, _hy)
-        # footer
-        self._fill_rect(sdl2.SDL_Rect(0, height - footer_h, width, footer_h), (32, 35, 38, 255))
-        self._draw_rect(sdl2.SDL_Rect(0, height - footer_h, width, footer_h), (90, 95, 100, 255))
-        _ft = "DuongTH - HungDuongWP@gmail.com"
-        _fw,_fh = self.font.text_size(_ft)
-        _fy = height - footer_h + max(0, (footer_h - _fh)//2)
-        self.font.draw_text(_ft, pad, _fy)
-
-        devs = list(self.devmgr.devices.values())
-        dev = devs[0] if devs else None
-        if not dev:
-            self.font.draw_text("NO CONTROLLER", pad, header_h + pad)
-            return
-
-        right_margin = 0
-        if show_log:
-            log_w = max(240, int(width * 0.30))
-            self._draw_log(width - log_w - pad, header_h + pad, log_w, height - header_h - footer_h - pad*2)
-            right_margin = log_w + pad*2
-
-        w = width - right_margin
-        h = height - header_h - footer_h
-        y0 = header_h
-
-        # centers
-        dpad_cx, dpad_cy = int(w * 0.22), int(y0 + h * 0.30)
-        abxy_cx, abxy_cy = int(w * 0.78), int(y0 + h * 0.30)
-        left_cx, left_cy = int(w * 0.22), int(y0 + h * 0.74)
-        right_cx, right_cy = int(w * 0.78), int(y0 + h * 0.74)
-        f_cx, f_cy = int(w * 0.50), int(y0 + h * 0.14)
-        sel_cx, sel_cy = int(w * 0.42), int(y0 + h * 0.46)
-        start_cx, start_cy = int(w * 0.58), int(y0 + h * 0.46)
-
-        base = min(w, h)
-        abxy_r = int(base * 0.05)
-        # Select/Start bigger
-        pill_w, pill_h = int(base * 0.12 * 1.2 * 1.3), int(base * 0.04 * 1.2 * 1.3)
-        f_r = int(base * 0.02 * 1.5)
-
-        # ABXY span to match D-pad
-        abxy_delta = int(abxy_r * 2.3)
-        abxy_span = 2 * abxy_delta + 2 * abxy_r
-        dpad_size = abxy_span
-
-        self._draw_rect(sdl2.SDL_Rect(pad, y0 + pad, w - pad*2, h - pad*2), PANEL_ACCENT)
-
-        # D-Pad
-        self._dpad(dpad_cx, dpad_cy, dpad_size, dev)
-
-        # ABXY plus layout
-        A = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_A', 0)
-        B = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_B', 1)
-        X = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_X', 2)
-        Y = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_Y', 3)
-        self._button_circle(abxy_cx, abxy_cy - abxy_delta, abxy_r, "X",
-                            dev.buttons.get(X,0)==1, (60,80,200,220), (40,44,48,255))
-        self._button_circle(abxy_cx - abxy_delta, abxy_cy, abxy_r, "Y",
-                            dev.buttons.get(Y,0)==1, (40,160,80,220), (40,44,48,255))
-        self._button_circle(abxy_cx + abxy_delta, abxy_cy, abxy_r, "A",
-                            dev.buttons.get(A,0)==1, (200,60,60,220), (40,44,48,255))
-        self._button_circle(abxy_cx, abxy_cy + abxy_delta, abxy_r, "B",
-                            dev.buttons.get(B,0)==1, (220,170,40,220), (40,44,48,255))
-
-        # FN circle
-        guide = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_GUIDE', 5)
-        fn_pressed = dev.buttons.get(guide,0)==1
-        self._button_circle(f_cx, f_cy, f_r, "F", fn_pressed, (180, 220, 160, 230), (55,58,62,200))
-
-        # Select / Start pills
-        back = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_BACK', 4)
-        start = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_START', 6)
-        self._pill(sel_cx, sel_cy, pill_w, pill_h, "SELECT", dev.buttons.get(back,0)==1)
-        self._pill(start_cx, start_cy, pill_w, pill_h, "START", dev.buttons.get(start,0)==1)
-
-        # Corner shoulders/triggers (horizontal)
-        lb = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_LEFTSHOULDER', 9)
-        rb = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_RIGHTSHOULDER', 10)
-        lt_axis = getattr(sdl2, 'SDL_CONTROLLER_AXIS_TRIGGERLEFT', 4)
-        rt_axis = getattr(sdl2, 'SDL_CONTROLLER_AXIS_TRIGGERRIGHT', 5)
-        lt_pressed = (dev.axes.get(lt_axis, 0.0) or 0.0) > 0.5
-        rt_pressed = (dev.axes.get(rt_axis, 0.0) or 0.0) > 0.5
-
-        corner_w = max(80, int(base * 0.16))
-        corner_h = max(18, int(base * 0.05))
-        y_top = y0 + pad + corner_h//2 + 6
-        # Left top: LB (left)  LT (right)
-        lb_cx = pad + corner_w//2 + 8
-        lt_cx = lb_cx + corner_w + 10
-        self._pill(lb_cx, y_top, corner_w, corner_h, 'L1', dev.buttons.get(lb,0)==1)
-        self._pill(lt_cx, y_top, corner_w, corner_h, 'L2', lt_pressed)
-        # Right top: RT (left)  RB (right)
-        rb_cx = w - pad - corner_w//2 - 8
-        rt_cx = rb_cx - corner_w - 10
-        self._pill(rt_cx, y_top, corner_w, corner_h, 'R2', rt_pressed)
-        self._pill(rb_cx, y_top, corner_w, corner_h, 'R1', dev.buttons.get(rb,0)==1)
-
-        # Sticks and L3/R3 pills
-        lx = dev.axes.get(sdl2.SDL_CONTROLLER_AXIS_LEFTX, 0.0)
-        ly = dev.axes.get(sdl2.SDL_CONTROLLER_AXIS_LEFTY, 0.0)
-        rx = dev.axes.get(sdl2.SDL_CONTROLLER_AXIS_RIGHTX, 0.0)
-        ry = dev.axes.get(sdl2.SDL_CONTROLLER_AXIS_RIGHTY, 0.0)
-        self._stick(left_cx, left_cy, int(base * 0.156), lx, ly, stick_deadzone)
-        self._stick(right_cx, right_cy, int(base * 0.156), rx, ry, stick_deadzone)
-
-        l3_btn = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_LEFTSTICK', 7)
-        r3_btn = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_RIGHTSTICK', 8)
-        mini_w = int(base * 0.12 * 1.6)
-        mini_h = max(12, int(base * 0.04 * 1.1))
-        self._pill(left_cx, left_cy + int(base * 0.156) + 18, mini_w, mini_h, 'L3', dev.buttons.get(l3_btn,0)==1)
-        self._pill(right_cx, right_cy + int(base * 0.156) + 18, mini_w, mini_h, 'R3', dev.buttons.get(r3_btn,0)==1)
+        self.draw_header(width, header_h, dict(stats or {}, stick_dz=stick_deadzone, trig_dz=trigger_deadzone))
+        self.draw_body(width, height, header_h, footer_h, stick_deadzone, trigger_deadzone, show_log)
+        self.draw_footer(width, height, footer_h)
+        self.flush()
@@ -1,108 +1,240 @@
+import math
 import sdl2
-from config import PAD
+from config import PAD, BG_COLOR, AXIS_BAR_BG, TRIGGER_PRESS_THRESHOLD
+from input_device import RawJoystick
+from layout import LayoutSet, RawLayout
 from ui import UIRenderer
 
 class BodyRenderer:
-    def __init__(self, ui: UIRenderer):
+    def __init__(self, ui: UIRenderer, layouts=None):
         self.ui = ui
+        self.layouts = layouts if layouts is not None else LayoutSet()
+        self.raw_layout = RawLayout()
+        self._layout_key = None
+        self._heatmaps = None
+        self._deadzones = None
+        self._tiles = {}   # instance_id -> (target texture, key it was drawn for)
 
     def draw(self, width: int, height: int, header_h: int, footer_h: int,
-             stick_deadzone=0.15, trigger_deadzone=0.05, show_log=False):
-        """Render main body using the device state and UIRenderer primitives."""
-        devs = list(self.ui.devmgr.devices.values())
+             stick_deadzone=0.15, trigger_deadzone=0.05, show_log=False,
+             latency=None, tiled=False, heatmaps=None, calibration=None, deadzones=None,
+             resolution=None):
+        """Render main body using the device state and UIRenderer primitives.
+
+        With tiled=True every connected device gets its own scaled-down panel;
+        unmapped joysticks follow the controllers with a generated raw grid.
+        An enabled heatmaps.HeatmapStore is drawn under each stick; with a
+        deadzone.DeadzoneEngine each stick also shows its processed position.
+        Under ui.layer 'static' only the frame and idle controller are drawn,
+        under 'dynamic' only panels, tiles and pressed/moving parts.
+        """
+        self._heatmaps = heatmaps if heatmaps is not None and heatmaps.enabled else None
+        self._deadzones = deadzones
+        show_latency = latency is not None and latency.enabled
+        show_calib = calibration is not None and calibration.enabled
+        show_res = resolution is not None and resolution.enabled
+        layout_key = (width, height, header_h, footer_h, show_log, show_latency, show_calib, show_res, tiled)
+        if layout_key != self._layout_key:
+            # Sprite radii depend on the layout size
+            self.ui.sprites.clear()
+            self._layout_key = layout_key
+        devs = list(self.ui.devmgr.devices.values()) + list(self.ui.devmgr.joysticks.values())
         dev = devs[0] if devs else None
         if not dev:
-            self.ui.font.draw_text("NO CONTROLLER", PAD, header_h + PAD)
+            if self.ui.layer != 'dynamic':
+                self.ui.font.draw_text("NO CONTROLLER", PAD, header_h + PAD)
             return
 
-        # Optional log panel
-        right_margin = 0
+        # Optional log / latency / calibration / resolution panels share one right-hand column
+        panels = []
         if show_log:
+            panels.append(self.ui._draw_log)
+        if show_latency:
+            panels.append(lambda x, y, w, h: self.ui._draw_latency(x, y, w, h, latency))
+        if show_calib:
+            panels.append(lambda x, y, w, h: self.ui._draw_calibration(x, y, w, h, calibration, dev))
+        if show_res:
+            panels.append(lambda x, y, w, h: self.ui._draw_resolution(x, y, w, h, resolution, dev))
+        right_margin = 0
+        if panels:
             log_w = max(240, int(width * 0.30))
-            self.ui._draw_log(width - log_w - PAD, header_h + PAD,
-                              log_w, height - header_h - footer_h - PAD*2)
             right_margin = log_w + PAD*2
+        if panels and self.ui.layer != 'static':
+            col_x = width - log_w - PAD
+            col_y = header_h + PAD
+            col_h = height - header_h - footer_h - PAD*2
+            part = (col_h - PAD * (len(panels) - 1)) // len(panels)
+            for i, panel in enumerate(panels):
+                py = col_y + i * (part + PAD)
+                ph = part if i < len(panels) - 1 else col_y + col_h - py
+                panel(col_x, py, log_w, ph)
 
         # Working area
         w = width - right_margin
         h = height - header_h - footer_h
-        y0 = header_h
+        if tiled:
+            if self.ui.layer == 'static':
+                return
+            # Tiles are cached whole in their own textures
+            layer, self.ui.layer = self.ui.layer, None
+            self._draw_tiles(devs, 0, header_h, w, h, stick_deadzone, trigger_deadzone)
+            self.ui.layer = layer
+        else:
+            self._draw_panel(dev, 0, header_h, w, h, stick_deadzone, trigger_deadzone)
 
-        # Key positions
-        dpad_cx, dpad_cy   = int(w * 0.22), int(y0 + h * 0.30)
-        abxy_cx, abxy_cy   = int(w * 0.78), int(y0 + h * 0.30)
-        left_cx, left_cy   = int(w * 0.22), int(y0 + h * 0.74)
-        right_cx, right_cy = int(w * 0.78), int(y0 + h * 0.74)
-        f_cx, f_cy         = int(w * 0.50), int(y0 + h * 0.14)
-        sel_cx, sel_cy     = int(w * 0.42), int(y0 + h * 0.46)
-        start_cx, start_cy = int(w * 0.58), int(y0 + h * 0.46)
+    def layout_name(self):
+        """Layout of the device shown full size, None without a controller."""
+        devmgr = self.ui.devmgr
+        dev = next(iter(devmgr.devices.values()), None)
+        if dev is not None:
+            return self.layouts.for_device(dev).name
+        joy = next(iter(devmgr.joysticks.values()), None)
+        return self.raw_layout.name(joy) if joy is not None else None
 
-        base = min(w, h)
-        abxy_r = int(base * 0.05)
-        pill_w, pill_h = int(base * 0.12 * 1.2 * 1.3), int(base * 0.04 * 1.2 * 1.3)
-        f_r = int(base * 0.02 * 1.5)
-        abxy_delta = int(abxy_r * 2.3)
-        abxy_span = 2 * abxy_delta + 2 * abxy_r
-        dpad_size = abxy_span
+    def invalidate(self):
+        """Drop tile textures (renderer reset or resize)."""
+        for tex, _key in self._tiles.values():
+            sdl2.SDL_DestroyTexture(tex)
+        self._tiles.clear()
 
-        # Outer frame of body
-        self.ui._draw_rect(sdl2.SDL_Rect(PAD, y0 + PAD, w - PAD*2, h - PAD*2), (90,95,100,255))
-
-        # D-Pad
-        self.ui._dpad(dpad_cx, dpad_cy, dpad_size, dev)
-
-        # ABXY buttons
-        A = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_A', 0)
-        B = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_B', 1)
-        X = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_X', 2)
-        Y = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_Y', 3)
-        self.ui._button_circle(abxy_cx, abxy_cy - abxy_delta, abxy_r, "X", dev.buttons.get(X,0)==1, (60,80,200,220), (40,44,48,255))
-        self.ui._button_circle(abxy_cx - abxy_delta, abxy_cy, abxy_r, "Y", dev.buttons.get(Y,0)==1, (40,160,80,220), (40,44,48,255))
-        self.ui._button_circle(abxy_cx + abxy_delta, abxy_r + abxy_cy, abxy_r, "A", dev.buttons.get(A,0)==1, (200,60,60,220), (40,44,48,255))
-        self.ui._button_circle(abxy_cx, abxy_cy + abxy_delta, abxy_r, "B", dev.buttons.get(B,0)==1, (220,170,40,220), (40,44,48,255))
+    def _draw_tiles(self, devs, x, y, w, h, stick_deadzone, trigger_deadzone):
+        """Grid of device panels. Each tile is kept in a render-target texture
+        and only redrawn when its device state, size or deadzones change."""
+        n = len(devs)
+        # Column count that gives the largest tile short side
+        cols = max(range(1, n + 1), key=lambda c: min(w / c, h / math.ceil(n / c)))
+        rows = int(math.ceil(n / cols))
+        tw = (w - PAD) // cols - PAD
+        th = (h - PAD) // rows - PAD
+        if tw <= 0 or th <= 0:
+            return
+        label_h = self.ui.font.text_size("Ag")[1] + 4
+        can_target = bool(sdl2.SDL_RenderTargetSupported(self.ui.ren))
+        live = set()
+        for i, dev in enumerate(devs):
+            tx = x + PAD + (i % cols) * (tw + PAD)
+            ty = y + PAD + (i // cols) * (th + PAD)
+            live.add(dev.instance_id)
+            dst = sdl2.SDL_Rect(tx, ty, tw, th)
+            tex = self._tile_texture(dev, tw, th, label_h, stick_deadzone, trigger_deadzone) if can_target else None
+            if tex:
+                self.ui.flush()
+                sdl2.SDL_RenderCopy(self.ui.ren, tex, None, dst)
+            else:
+                self._draw_tile(dev, tx, ty, tw, th, label_h, stick_deadzone, trigger_deadzone)
+        for iid in [i for i in self._tiles if i not in live]:
+            sdl2.SDL_DestroyTexture(self._tiles.pop(iid)[0])
 
-        # FN / GUIDE
-        guide = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_GUIDE', 5)
-        self.ui._button_circle(f_cx, f_cy, f_r, "F", dev.buttons.get(guide,0)==1, (180,220,160,230), (55,58,62,200))
+    def _tile_texture(self, dev, tw, th, label_h, stick_deadzone, trigger_deadzone):
+        heat_version = self._heatmaps.version if self._heatmaps is not None else None
+        dz_version = self._deadzones.version if self._deadzones is not None else None
+        key = (dev.version, tw, th, stick_deadzone, trigger_deadzone, heat_version, dz_version)
+        entry = self._tiles.get(dev.instance_id)
+        if entry is not None and entry[1] == key:
+            return entry[0]
+        tex = entry[0] if entry is not None else None
+        if tex is not None and entry[1][1:3] != (tw, th):
+            sdl2.SDL_DestroyTexture(tex)
+            tex = None
+        if tex is None:
+            tex = sdl2.SDL_CreateTexture(self.ui.ren, sdl2.SDL_PIXELFORMAT_RGBA8888,
+                                         sdl2.SDL_TEXTUREACCESS_TARGET, tw, th)
+            if not tex:
+                self._tiles.pop(dev.instance_id, None)
+                return None
+        ren = self.ui.ren
+        self.ui.flush()
+        sdl2.SDL_SetRenderTarget(ren, tex)
+        sdl2.SDL_SetRenderDrawColor(ren, *BG_COLOR)
+        sdl2.SDL_RenderClear(ren)
+        self._draw_tile(dev, 0, 0, tw, th, label_h, stick_deadzone, trigger_deadzone)
+        self.ui.flush()
+        sdl2.SDL_SetRenderTarget(ren, None)
+        self._tiles[dev.instance_id] = (tex, key)
+        return tex
 
-        # Select / Start
-        back = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_BACK', 4)
-        start = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_START', 6)
-        self.ui._pill(sel_cx, sel_cy, pill_w, pill_h, "SELECT", dev.buttons.get(back,0)==1)
-        self.ui._pill(start_cx, start_cy, pill_w, pill_h, "START", dev.buttons.get(start,0)==1)
+    def _draw_tile(self, dev, x, y, w, h, label_h, stick_deadzone, trigger_deadzone):
+        self.ui.font.draw_text(f"{dev.instance_id}: {dev.name}", x + PAD, y + 2)
+        self._draw_panel(dev, x, y + label_h, w, h - label_h, stick_deadzone, trigger_deadzone)
 
-        # LB/RB + LT/RT
-        lb = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_LEFTSHOULDER', 9)
-        rb = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_RIGHTSHOULDER', 10)
-        lt_axis = getattr(sdl2, 'SDL_CONTROLLER_AXIS_TRIGGERLEFT', 4)
-        rt_axis = getattr(sdl2, 'SDL_CONTROLLER_AXIS_TRIGGERRIGHT', 5)
-        lt_pressed = (dev.axes.get(lt_axis, 0.0) or 0.0) > 0.5
-        rt_pressed = (dev.axes.get(rt_axis, 0.0) or 0.0) > 0.5
+    def _draw_panel(self, dev, x0, y0, w, h, stick_deadzone, trigger_deadzone):
+        if isinstance(dev, RawJoystick):
+            self._draw_raw(dev, x0, y0, w, h)
+        else:
+            self._draw_device(dev, x0, y0, w, h, stick_deadzone, trigger_deadzone)
 
-        corner_w = max(80, int(base * 0.16))
-        corner_h = max(18, int(base * 0.05))
-        y_top = y0 + PAD + corner_h//2 + 6
-        # Left top
-        lb_cx = PAD + corner_w//2 + 8
-        lt_cx = lb_cx + corner_w + 10
-        self.ui._pill(lb_cx, y_top, corner_w, corner_h, 'L1', dev.buttons.get(lb,0)==1)
-        self.ui._pill(lt_cx, y_top, corner_w, corner_h, 'L2', lt_pressed)
-        # Right top
-        rb_cx = w - PAD - corner_w//2 - 8
-        rt_cx = rb_cx - corner_w - 10
-        self.ui._pill(rt_cx, y_top, corner_w, corner_h, 'R2', rt_pressed)
-        self.ui._pill(rb_cx, y_top, corner_w, corner_h, 'R1', dev.buttons.get(rb,0)==1)
+    def _draw_device(self, dev, x0, y0, w, h, stick_deadzone, trigger_deadzone):
+        """One controller panel inside the rect (x0, y0, w, h): walks the
+        device's layout, compiled once for this rect, against its state."""
+        ui = self.ui
+        buttons = dev.buttons
+        dz = self._deadzones
+        heat = self._heatmaps
+        for wd in self.layouts.for_device(dev).compile(x0, y0, w, h):
+            kind = wd.kind
+            if kind == 'button':
+                ui._button_circle(wd.cx, wd.cy, wd.r, wd.label, buttons.get(wd.button,0)==1, *wd.style)
+            elif kind == 'pill':
+                if wd.axis is None:
+                    pressed = buttons.get(wd.button,0)==1
+                else:
+                    pressed = self._trigger(dev, wd.axis)[0] > TRIGGER_PRESS_THRESHOLD
+                ui._pill(wd.rect, wd.label, pressed)
+            elif kind == 'stick':
+                ax, ay = wd.axis
+                side = ax // 2   # heatmaps and analyzers keep left (0) / right (1) sticks
+                ui._stick(wd.cx, wd.cy, wd.r, dev.axes.get(ax, 0.0), dev.axes.get(ay, 0.0), stick_deadzone,
+                          heat.get(dev.instance_id, side) if heat is not None else None,
+                          dz.stick(dev.raw[ax], dev.raw[ay]) if dz is not None else None,
+                          dz.shape if dz is not None else None)
+            elif kind == 'trigger_bar':
+                # Processed fill, raw tick
+                r = wd.rect
+                ui._trigger_bar(r.x, r.y, r.w, r.h, *self._trigger(dev, wd.axis))
+            elif kind == 'dpad':
+                ui._dpad(wd.rect, wd.parts, dev.mask)
+            elif kind == 'frame':
+                if ui.layer != 'dynamic':
+                    ui._draw_rect(wd.rect, wd.style)
 
-        # Sticks + L3/R3
-        lx = dev.axes.get(getattr(sdl2, 'SDL_CONTROLLER_AXIS_LEFTX', 0), 0.0)
-        ly = dev.axes.get(getattr(sdl2, 'SDL_CONTROLLER_AXIS_LEFTY', 1), 0.0)
-        rx = dev.axes.get(getattr(sdl2, 'SDL_CONTROLLER_AXIS_RIGHTX', 2), 0.0)
-        ry = dev.axes.get(getattr(sdl2, 'SDL_CONTROLLER_AXIS_RIGHTY', 3), 0.0)
-        self.ui._stick(left_cx, left_cy, int(base * 0.156), lx, ly, stick_deadzone)
-        self.ui._stick(right_cx, right_cy, int(base * 0.156), rx, ry, stick_deadzone)
+    def _draw_raw(self, joy, x0, y0, w, h):
+        """Raw joystick panel: walks the generated RawLayout grid against
+        the joystick's event-fed state."""
+        ui = self.ui
+        idle = ui.layer != 'dynamic'
+        text_h = ui.font.text_size("Ag")[1]
+        labels = []   # button numbers go on after every cell: one batch flush, not one per cell
+        for wd in self.raw_layout.compile(x0, y0, w, h, joy):
+            kind = wd.kind
+            if kind == 'raw_button':
+                pressed = bool(joy.mask >> wd.button & 1)
+                ui._pill(wd.rect, None, pressed)
+                if idle or pressed:
+                    labels.append(wd)
+                continue
+            if kind == 'frame':
+                if idle:
+                    ui._draw_rect(wd.rect, wd.style)
+                continue
+            if idle:
+                ui.font.draw_text(wd.label, wd.cx, wd.cy - text_h//2)
+            if kind == 'raw_axis':
+                r = wd.rect
+                ui._axis_bar(r.x, r.y, r.w, r.h, joy.axes[wd.axis] / 32767.0)
+            elif kind == 'raw_hat':
+                ui._dpad(wd.rect, wd.parts, joy.hats[wd.axis])
+            elif kind == 'raw_ball':
+                if idle:
+                    ui._fill_rect(wd.rect, AXIS_BAR_BG)
+                dx, dy = joy.balls[2*wd.axis], joy.balls[2*wd.axis + 1]
+                if ui.layer != 'static' and (dx or dy):
+                    ui.font.draw_text(f"{dx:+d} {dy:+d}", wd.rect.x + 4, wd.cy - text_h//2)
+        for wd in labels:
+            ui.font.draw_center(wd.label, wd.cx, wd.cy)
 
-        l3_btn = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_LEFTSTICK', 7)
-        r3_btn = getattr(sdl2, 'SDL_CONTROLLER_BUTTON_RIGHTSTICK', 8)
-        mini_w = int(base * 0.12 * 1.6); mini_h = max(12, int(base * 0.04 * 1.1))
-        self.ui._pill(left_cx, left_cy + int(base * 0.156) + 18, mini_w, mini_h, 'L3', dev.buttons.get(l3_btn,0)==1)
-        self.ui._pill(right_cx, right_cy + int(base * 0.156) + 18, mini_w, mini_h, 'R3', dev.buttons.get(r3_btn,0)==1)
+    def _trigger(self, dev, axis):
+        """(processed, raw) trigger value in 0..1."""
+        raw = max(0.0, dev.axes.get(axis, 0.0) or 0.0)
+        if self._deadzones is None:
+            return raw, raw
+        return self._deadzones.trigger(dev.raw[axis]), raw
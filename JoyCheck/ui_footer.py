@@ -8,6 +8,8 @@ class FooterRenderer:
 
     def draw(self, width: int, height: int, footer_h: int):
         """Render footer area. Uses UIRenderer primitives and font."""
+        if self.ui.layer == 'dynamic':
+            return   # nothing here changes: it all lives in the static layer
         self.ui._fill_rect(sdl2.SDL_Rect(0, height - footer_h, width, footer_h), (32, 35, 38, 255))
         self.ui._draw_rect(sdl2.SDL_Rect(0, height - footer_h, width, footer_h), (90, 95, 100, 255))
 
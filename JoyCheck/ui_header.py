@@ -8,8 +8,11 @@ class HeaderRenderer:
 
     def draw(self, width: int, header_h: int, stats: dict):
         """Render header area. Uses UIRenderer primitives and font."""
-        self.ui._fill_rect(sdl2.SDL_Rect(0, 0, width, header_h), (32, 35, 38, 255))
-        self.ui._draw_rect(sdl2.SDL_Rect(0, 0, width, header_h), (90, 95, 100, 255))
+        if self.ui.layer != 'dynamic':
+            self.ui._fill_rect(sdl2.SDL_Rect(0, 0, width, header_h), (32, 35, 38, 255))
+            self.ui._draw_rect(sdl2.SDL_Rect(0, 0, width, header_h), (90, 95, 100, 255))
+        if self.ui.layer == 'static':
+            return
 
         devices = int((stats or {}).get('devices', 0) or 0)
         fps = (stats or {}).get('fps', 0)
@@ -17,5 +20,18 @@ class HeaderRenderer:
         trig_dz = float((stats or {}).get('trig_dz', 0.0) or 0.0)
 
         hdr = f"JoyCheck  DEVS:{devices}  FPS:{fps}  DZ STICK:{stick_dz:.2f}  DZ TRIG:{trig_dz:.2f}"
+        shape = (stats or {}).get('dz_shape')
+        if shape:
+            hdr += f" {shape.upper()}"
+            anti = (stats or {}).get('anti_dz')
+            if anti:
+                hdr += f" ANTI:{anti:.2f}"
+        skip = (stats or {}).get('skip')
+        if skip is not None:
+            hdr += f"  SKIP:{skip}%"
+        rates = (stats or {}).get('hz')
+        if rates is not None:
+            # Estimated report rate per controller, from the background sampler
+            hdr += "  HZ:" + (",".join(f"{hz:.0f}" for hz, _jit in rates.values()) or "-")
         _w, th = self.ui.font.text_size(hdr)
         self.ui.font.draw_text(hdr, PAD, max(0, (header_h - th)//2))
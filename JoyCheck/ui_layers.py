@@ -0,0 +1,74 @@
+import sdl2
+from config import BG_COLOR
+from ui import UIRenderer
+
+class LayerCompositor:
+    """Static chrome and the idle controller kept in one render-target texture.
+
+    The layer (header/footer backgrounds, footer text, body frame, every
+    widget in its released state) is redrawn only when its key changes:
+    window size, visible panels, deadzone marks or the selected device.
+    Each frame copies it once and draws the dynamic pass on top.
+    """
+    def __init__(self, ui: UIRenderer):
+        self.ui = ui
+        self.texture = None
+        self.size = None
+        self.key = None
+        self.rebuilds = 0
+
+    def draw(self, key, width: int, height: int, draw_static) -> bool:
+        """Copy the layer for `key`, first rebuilding it with draw_static()
+        when the key changed. Leaves ui.layer at 'dynamic' and returns True;
+        False (ui.layer None) when render targets are unavailable and the
+        caller has to draw everything itself."""
+        ren = self.ui.ren
+        self.ui.layer = None
+        if key != self.key or self.texture is None:
+            if not self._ensure_texture(width, height):
+                return False
+            self.ui.flush()
+            sdl2.SDL_SetRenderTarget(ren, self.texture)
+            sdl2.SDL_SetRenderDrawColor(ren, *BG_COLOR)
+            sdl2.SDL_RenderClear(ren)
+            self.ui.layer = 'static'
+            try:
+                draw_static()
+            finally:
+                self.ui.layer = None
+                self.ui.flush()
+                sdl2.SDL_SetRenderTarget(ren, None)
+            self.key = key
+            self.rebuilds += 1
+        self.ui.flush()
+        sdl2.SDL_RenderCopy(ren, self.texture, None, None)
+        self.ui.layer = 'dynamic'
+        return True
+
+    def end(self):
+        """Back to whole-widget drawing for overlays after the dynamic pass."""
+        self.ui.layer = None
+
+    def _ensure_texture(self, width, height):
+        if self.texture is not None and self.size == (width, height):
+            return True
+        self.invalidate()
+        if not sdl2.SDL_RenderTargetSupported(self.ui.ren):
+            return False
+        tex = sdl2.SDL_CreateTexture(self.ui.ren, sdl2.SDL_PIXELFORMAT_RGBA8888,
+                                     sdl2.SDL_TEXTUREACCESS_TARGET, width, height)
+        if not tex:
+            return False
+        # Opaque: copying it replaces the frame instead of blending
+        sdl2.SDL_SetTextureBlendMode(tex, sdl2.SDL_BLENDMODE_NONE)
+        self.texture = tex
+        self.size = (width, height)
+        return True
+
+    def invalidate(self):
+        """Drop the layer (resize, renderer reset or font change)."""
+        if self.texture is not None:
+            sdl2.SDL_DestroyTexture(self.texture)
+        self.texture = None
+        self.size = None
+        self.key = None